@@ -1,15 +1,15 @@
 import os  # Manejo de rutas de archivos
 import sys  # Acceso a funciones del sistema
 import json  # Para procesar respuestas JSON
-import urllib.request  # Para hacer solicitudes HTTP
-import ssl  # Para contexto SSL
-import certifi  # Certificados raíz actualizados
+# urllib, ssl y certifi se importan en los hilos de consulta y descarga: no retrasan la apertura de la ventana
 import subprocess  # Para ejecutar procesos externos
 import time  # Medir tiempo y calcular velocidad
+import threading  # Consulta y descarga en segundo plano
 from tkinter import messagebox  # Cuadros de diálogo para el usuario
 
 from logger_utils import configurar_logger  # Función personalizada para logging
 from version import __version__  # Importa la versión actual del sistema
+from eventos import bus_eventos  # Avisos desde los hilos de consulta y descarga a la interfaz
 
 logger = configurar_logger("actualizacion")  # Función personalizada para logging
 
@@ -17,123 +17,161 @@ def verificar_actualizacion(root, barra_progreso, porcentaje_var, frame_progreso
     """
     Verifica si hay una nueva versión disponible del programa en GitHub.
     Descarga draftsender.exe si es necesario y lo ejecuta como draftsender_<versión>.exe
+    La consulta y la descarga corren en segundo plano y avisan a la interfaz por bus_eventos;
+    los widgets solo se tocan desde los manejadores, en el hilo de Tk.
     """
     url_api = "https://api.github.com/repos/azambrano18/draftsender/releases/latest"
+    archivos = {}
 
-    try:
-        logger.info("Verificando actualización...")
-        status_var.set("Verificando actualizaciones...")
-        status_label.pack(side="bottom", pady=(0, 5))
-        root.update_idletasks()
+    def ocultar_progreso():
+        frame_progreso.pack_forget()
+        status_label.pack_forget()
 
-        context = ssl.create_default_context(cafile=certifi.where())
-        with urllib.request.urlopen(url_api, context=context) as response:
-            data = json.loads(response.read())
-            ultima_version = data["tag_name"].lstrip("v")
-            assets = data["assets"]
-            logger.info(f"Última versión disponible: {ultima_version}")
-
-            barra_progreso["value"] = 0
-            porcentaje_var.set("0%")
-            frame_progreso.pack(side="bottom", fill="x", padx=10, pady=5)
-            root.update_idletasks()
-
-        if forzar or ultima_version != obtener_version_actual():
-            logger.info("Nueva versión detectada. Solicitando confirmación al usuario.")
-
-            if messagebox.askyesno("Actualización disponible", f"Hay una nueva versión ({ultima_version}). ¿Deseas descargarla ahora?"):
-                exe_dir = os.path.dirname(sys.executable)
-
-                archivos = {
-                    "draftsender.exe": f"draftsender_{ultima_version}.exe"
-                }
-
-                descargas = [a for a in assets if a["name"] in archivos]
-                if not descargas:
-                    logger.warning("No se encontraron archivos para descargar.")
-                    messagebox.showwarning("No hay archivos", "No se encontraron archivos para actualizar.")
-                    frame_progreso.pack_forget()
-                    status_label.pack_forget()
-                    return
-
-                avance = 100 // len(descargas)
-                base = 0
-
-                for asset in descargas:
-                    nombre = asset["name"]
-                    url = asset["browser_download_url"]
-                    destino = os.path.join(exe_dir, archivos[nombre])
-
-                    logger.info(f"Descargando {nombre} desde {url} a {destino}")
-                    root.update_idletasks()
-
-                    try:
-                        urllib.request.urlretrieve(
-                            url,
-                            destino,
-                            reporthook=crear_hook(base, avance, barra_progreso, porcentaje_var, root, status_var)
-                        )
-                    except Exception as e:
-                        logger.error(f"Error al descargar el archivo {nombre}: {e}")
-                        messagebox.showerror("Error de descarga", f"No se pudo descargar el archivo {nombre}. Intenta nuevamente.")
-                        frame_progreso.pack_forget()
-                        status_label.pack_forget()
-                        return
-
-                    base += avance
-
-                barra_progreso["value"] = 100
-                porcentaje_var.set("100%")
-                status_var.set("Actualización descargada y aplicada.")
-                root.update_idletasks()
-
-                def ocultar_mensaje():
-                    try:
-                        status_var.set("")
-                        frame_progreso.pack_forget()
-                        status_label.pack_forget()
-                    except Exception as e:
-                        logger.warning(f"Error al ocultar elementos: {e}")
-
-                root.after(5000, ocultar_mensaje)
-
-                nuevo_path = os.path.join(exe_dir, f"draftsender_{ultima_version}.exe")
-                logger.info(f"Ejecución de la nueva versión: {nuevo_path}")
-                messagebox.showinfo("Actualización", "Se lanzará la nueva versión ahora.")
-                subprocess.Popen([nuevo_path])
-                sys.exit()
-        else:
+    def terminar():
+        for tipo, manejador in manejadores.items():
+            bus_eventos.desuscribir(tipo, manejador)
+
+    def al_consultar(ultima_version=None, assets=None, error=None):
+        if error:
+            logger.error(f"Fallo en la verificación de actualización desde {url_api}: {error}")
+            messagebox.showerror("Error", f"No se pudo verificar actualización:\n{error}")
+            status_var.set("Error al verificar actualización")
+            root.after(5000, lambda: status_var.set(""))
+            ocultar_progreso()
+            return terminar()
+
+        logger.info(f"Última versión disponible: {ultima_version}")
+        barra_progreso["value"] = 0
+        porcentaje_var.set("0%")
+        frame_progreso.pack(side="bottom", fill="x", padx=10, pady=5)
+
+        if not (forzar or ultima_version != obtener_version_actual()):
             logger.info("Ya tienes la última versión.")
             status_var.set("Ya tienes la última versión instalada.")
             root.after(5000, lambda: status_var.set(""))
-            frame_progreso.pack_forget()
-            status_label.pack_forget()
+            ocultar_progreso()
+            return terminar()
+
+        logger.info("Nueva versión detectada. Solicitando confirmación al usuario.")
+        if not messagebox.askyesno("Actualización disponible", f"Hay una nueva versión ({ultima_version}). ¿Deseas descargarla ahora?"):
+            return terminar()
+
+        archivos["draftsender.exe"] = f"draftsender_{ultima_version}.exe"
+        descargas = [a for a in assets if a["name"] in archivos]
+        if not descargas:
+            logger.warning("No se encontraron archivos para descargar.")
+            messagebox.showwarning("No hay archivos", "No se encontraron archivos para actualizar.")
+            ocultar_progreso()
+            return terminar()
+
+        threading.Thread(
+            target=descargar_archivos,
+            args=(descargas, archivos, ultima_version),
+            name="DescargaActualizacion",
+            daemon=True
+        ).start()
+
+    def al_progresar(porcentaje, velocidad_kb):
+        barra_progreso["value"] = porcentaje
+        porcentaje_var.set(f"{porcentaje}%")
+        status_var.set(f"Descargando... {velocidad_kb:.1f} KB/s")
+
+    def al_descargar(nuevo_path=None, nombre=None, error=None):
+        terminar()
+        if error:
+            logger.error(f"Error al descargar el archivo {nombre}: {error}")
+            messagebox.showerror("Error de descarga", f"No se pudo descargar el archivo {nombre}. Intenta nuevamente.")
+            ocultar_progreso()
+            return
+
+        barra_progreso["value"] = 100
+        porcentaje_var.set("100%")
+        status_var.set("Actualización descargada y aplicada.")
+
+        def ocultar_mensaje():
+            try:
+                status_var.set("")
+                ocultar_progreso()
+            except Exception as e:
+                logger.warning(f"Error al ocultar elementos: {e}")
+
+        root.after(5000, ocultar_mensaje)
+
+        logger.info(f"Ejecución de la nueva versión: {nuevo_path}")
+        messagebox.showinfo("Actualización", "Se lanzará la nueva versión ahora.")
+        subprocess.Popen([nuevo_path])
+        sys.exit()
+
+    manejadores = {
+        "actualizacion_consultada": al_consultar,
+        "progreso_descarga": al_progresar,
+        "fin_descarga": al_descargar,
+    }
+    for tipo, manejador in manejadores.items():
+        bus_eventos.suscribir(tipo, manejador)
+
+    logger.info("Verificando actualización...")
+    status_var.set("Verificando actualizaciones...")
+    status_label.pack(side="bottom", pady=(0, 5))
+    threading.Thread(target=consultar_ultima_version, args=(url_api,), name="ConsultaActualizacion", daemon=True).start()
+
+def consultar_ultima_version(url_api):
+    """
+    Consulta la última versión publicada (en segundo plano) y publica "actualizacion_consultada".
+    """
+    try:
+        import ssl  # Para contexto SSL
+        import urllib.request  # Para hacer solicitudes HTTP
+        import certifi  # Certificados raíz actualizados
 
+        context = ssl.create_default_context(cafile=certifi.where())
+        with urllib.request.urlopen(url_api, context=context) as response:
+            data = json.loads(response.read())
+        bus_eventos.publicar("actualizacion_consultada", ultima_version=data["tag_name"].lstrip("v"), assets=data["assets"])
     except Exception as e:
         logger.exception(f"Fallo en la verificación de actualización desde {url_api}")
-        messagebox.showerror("Error", f"No se pudo verificar actualización:\n{e}")
-        status_var.set("Error al verificar actualización")
-        root.after(5000, lambda: status_var.set(""))
-        frame_progreso.pack_forget()
-        status_label.pack_forget()
+        bus_eventos.publicar("actualizacion_consultada", error=e)
+
+def descargar_archivos(descargas, archivos, ultima_version):
+    """
+    Descarga los archivos de la actualización (en segundo plano) y publica "progreso_descarga" y "fin_descarga".
+    """
+    import urllib.request
+
+    exe_dir = os.path.dirname(sys.executable)
+    avance = 100 // len(descargas)
+    base = 0
+
+    for asset in descargas:
+        nombre = asset["name"]
+        url = asset["browser_download_url"]
+        destino = os.path.join(exe_dir, archivos[nombre])
+
+        logger.info(f"Descargando {nombre} desde {url} a {destino}")
+        try:
+            urllib.request.urlretrieve(url, destino, reporthook=crear_hook(base, avance))
+        except Exception as e:
+            bus_eventos.publicar("fin_descarga", nombre=nombre, error=e)
+            return
+
+        base += avance
+
+    bus_eventos.publicar("fin_descarga", nuevo_path=os.path.join(exe_dir, f"draftsender_{ultima_version}.exe"))
 
 def obtener_version_actual():
     return __version__
 
-def crear_hook(base, avance, barra_progreso, porcentaje_var, root, status_var):
+def crear_hook(base, avance):
     inicio = time.time()
 
     def hook(count, block_size, total_size):
         if total_size > 0:
             porcentaje = int((count * block_size * 100) / total_size)
             total = min(100, base + int(porcentaje * avance / 100))
-            barra_progreso["value"] = total
-            porcentaje_var.set(f"{total}%")
 
             tiempo = time.time() - inicio
             velocidad_kb = (count * block_size) / 1024 / tiempo if tiempo > 0 else 0
-            status_var.set(f"Descargando... {velocidad_kb:.1f} KB/s")
-
-            root.update_idletasks()
+            # Se llama por cada bloque descargado; el bus fusiona la ráfaga antes de repintar
+            bus_eventos.publicar("progreso_descarga", porcentaje=total, velocidad_kb=velocidad_kb)
 
-    return hook
\ No newline at end of file
+    return hook
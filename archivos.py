@@ -1,6 +1,5 @@
 import os
 from tkinter import filedialog, messagebox
-from docx import Document
 from logger_utils import configurar_logger
 
 logger = configurar_logger("archivos")
@@ -28,6 +27,7 @@ def cargar_docx(ruta_visible_var, ruta_real_var):
                 messagebox.showerror("Archivo vacío", "El archivo Word seleccionado está vacío.")
                 return
 
+            from docx import Document  # python-docx solo se carga al elegir una plantilla
             doc = Document(archivo)
             contenido = "\n".join(p.text for p in doc.paragraphs).strip()
             if not contenido:
@@ -0,0 +1,183 @@
+import glob
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from logger_utils import configurar_logger
+from rutas import directorio_datos
+
+logger = configurar_logger("auditoria")
+
+REGISTROS_POR_ESCRITURA = 200  # Registros acumulados antes de escribir en el archivo
+SEGUNDOS_POR_ESCRITURA = 5.0  # Como máximo, tiempo que un registro espera en memoria
+CAMPOS_CREACION = ("fila", "plantilla", "huella_plantilla", "creado")  # Se copian a los registros de envío
+
+
+class RegistroAuditoria:
+    """
+    Un registro JSON por mensaje (una línea por borrador creado o enviado) en auditoria/<id_ejecucion>.jsonl,
+    dentro de la carpeta de datos del usuario. Los registros se acumulan en memoria y se escriben en bloque
+    cada REGISTROS_POR_ESCRITURA registros o SEGUNDOS_POR_ESCRITURA segundos, y al cerrar.
+    Campos: ejecucion, proceso, cuenta, momento, resultado y, según el caso, fila, destinatario, plantilla,
+    huella_plantilla, clave, id_borrador, creado, enviado, latencia_s, etapa y error.
+    Args:
+        proceso (str): "borradores" o "envios".
+        cuenta (str): Cuenta de Outlook de la ejecución.
+        id_ejecucion (str): Identificador de la ejecución (el mismo de sus métricas).
+    """
+
+    def __init__(self, proceso: str, cuenta: str, id_ejecucion: str, directorio: str = None):
+        self.proceso = proceso
+        self.cuenta = cuenta
+        self.id_ejecucion = id_ejecucion
+        self.ruta = os.path.join(directorio or directorio_datos("auditoria"), f"{id_ejecucion}.jsonl")
+        self.registros = 0
+        self._pendientes = []
+        self._ultima_escritura = time.monotonic()
+        self._lock = threading.Lock()
+
+    def registrar(self, resultado: str, **datos):
+        """
+        Agrega el registro de un mensaje. Args: resultado (str): p. ej. "creado", "duplicado", "enviado", "error".
+        """
+        registro = {
+            "ejecucion": self.id_ejecucion,
+            "proceso": self.proceso,
+            "cuenta": self.cuenta,
+            "momento": datetime.now().isoformat(timespec="milliseconds"),
+            "resultado": resultado,
+            **datos,
+        }
+        with self._lock:
+            self._pendientes.append(registro)
+            self.registros += 1
+            if (len(self._pendientes) >= REGISTROS_POR_ESCRITURA
+                    or time.monotonic() - self._ultima_escritura >= SEGUNDOS_POR_ESCRITURA):
+                self._escribir()
+
+    def _escribir(self):
+        if self._pendientes:
+            lineas = "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in self._pendientes)
+            with open(self.ruta, "a", encoding="utf-8") as archivo:
+                archivo.write(lineas)
+            self._pendientes.clear()
+        self._ultima_escritura = time.monotonic()
+
+    def cerrar(self):
+        """
+        Escribe los registros pendientes. No interrumpe el proceso si falla.
+        """
+        try:
+            with self._lock:
+                self._escribir()
+        except Exception:
+            logger.exception(f"No se pudo escribir la auditoría en {self.ruta}")
+
+
+def leer_registros(directorio: str = None, cuenta: str = None, desde: datetime = None):
+    """
+    Recorre los registros de auditoría guardados, opcionalmente de una cuenta y desde una fecha.
+    Las líneas dañadas (p. ej. de una ejecución interrumpida) se omiten.
+    """
+    directorio = directorio or directorio_datos("auditoria")
+    desde_texto = desde.isoformat() if desde else None
+    for ruta in sorted(glob.glob(os.path.join(directorio, "*.jsonl"))):
+        with open(ruta, encoding="utf-8") as archivo:
+            for linea in archivo:
+                try:
+                    registro = json.loads(linea)
+                except ValueError:
+                    continue
+                if cuenta and registro.get("cuenta", "").lower() != cuenta.lower():
+                    continue
+                if desde_texto and registro.get("momento", "") < desde_texto:
+                    continue
+                yield registro
+
+
+def buscar_creaciones(claves, cuenta: str = None, directorio: str = None) -> dict:
+    """
+    Datos de creación (CAMPOS_CREACION) de los borradores con esas claves, tomados de los registros "creado" de
+    las ejecuciones de creación. Si una clave se creó varias veces, vale la última.
+    Args: claves (iterable): Claves de borrador. cuenta (str): Solo registros de esta cuenta (opcional).
+    Returns: dict: Clave -> dict con los campos encontrados.
+    """
+    claves = {clave for clave in claves if clave}
+    creaciones = {}
+    if not claves:
+        return creaciones
+    directorio = directorio or directorio_datos("auditoria")
+    for ruta in sorted(glob.glob(os.path.join(directorio, "borradores_*.jsonl"))):
+        with open(ruta, encoding="utf-8") as archivo:
+            for linea in archivo:
+                if '"creado"' not in linea:
+                    continue  # Sin decodificar las líneas que no son de un borrador creado
+                try:
+                    registro = json.loads(linea)
+                except ValueError:
+                    continue
+                if registro.get("resultado") != "creado" or registro.get("clave") not in claves:
+                    continue
+                if cuenta and registro.get("cuenta", "").lower() != cuenta.lower():
+                    continue
+                creaciones[registro["clave"]] = {c: registro[c] for c in CAMPOS_CREACION if c in registro}
+    return creaciones
+
+
+def _percentiles(valores: list) -> dict:
+    if not valores:
+        return {}
+    valores = sorted(valores)
+
+    def percentil(p):
+        return round(valores[min(int(len(valores) * p / 100), len(valores) - 1)], 4)
+
+    return {"p50": percentil(50), "p95": percentil(95), "p99": percentil(99), "max": round(valores[-1], 4)}
+
+
+def resumir(registros, por: str = "ejecucion") -> list:
+    """
+    Resumen por ejecución o por cuenta: mensajes por resultado, tasa de error, ritmo y percentiles de latencia.
+    En los envíos incluye además el tiempo entre la creación del borrador y su envío: el campo "creado" del
+    registro de envío o, si no lo tiene, el del registro de creación con la misma clave.
+    Args: registros (iterable): Registros de leer_registros(). por (str): "ejecucion" o "cuenta".
+    Returns: list: Un dict por grupo, ordenados por su primer registro.
+    """
+    grupos = {}
+    creados = {}  # clave del borrador -> momento de creación
+    for registro in registros:
+        if registro.get("proceso") == "borradores" and registro.get("resultado") == "creado" and registro.get("clave"):
+            creados[registro["clave"]] = registro["momento"]
+        grupo = registro.get("ejecucion") if por == "ejecucion" else registro.get("cuenta")
+        grupos.setdefault((grupo, registro.get("proceso")), []).append(registro)
+
+    resumenes = []
+    for (grupo, proceso), lista in grupos.items():
+        resultados = {}
+        for registro in lista:
+            resultados[registro["resultado"]] = resultados.get(registro["resultado"], 0) + 1
+        inicio, fin = lista[0]["momento"], lista[-1]["momento"]
+        duracion = (datetime.fromisoformat(fin) - datetime.fromisoformat(inicio)).total_seconds()
+        completados = resultados.get("creado" if proceso == "borradores" else "enviado", 0)
+        resumen = {
+            por: grupo,
+            "proceso": proceso,
+            "inicio": inicio,
+            "fin": fin,
+            "mensajes": len(lista),
+            "resultados": resultados,
+            "tasa_error": round(resultados.get("error", 0) / len(lista), 4),
+            "por_minuto": round(completados * 60 / duracion, 2) if duracion > 0 else None,
+            "latencia_s": _percentiles([r["latencia_s"] for r in lista if r.get("latencia_s") is not None]),
+        }
+        if proceso == "envios":
+            esperas = [
+                (datetime.fromisoformat(r["enviado"]) - datetime.fromisoformat(creado)).total_seconds()
+                for r in lista if r.get("enviado")
+                for creado in [r.get("creado") or creados.get(r.get("clave"))] if creado
+            ]
+            resumen["creado_a_enviado_s"] = _percentiles(esperas)
+        resumenes.append(resumen)
+    return sorted(resumenes, key=lambda r: r["inicio"])
@@ -0,0 +1,429 @@
+import os
+import time
+import threading
+import itertools
+from dataclasses import dataclass
+
+from logger_utils import configurar_logger
+from metricas import medir
+
+logger = configurar_logger("backend_correo")
+
+# Carpeta, junto a Borradores, donde quedan los borradores que fallaron al enviarse
+NOMBRE_CUARENTENA = "Cuarentena DraftSender"
+
+
+class BorradorNoEncontrado(LookupError):
+    """
+    El borrador ya no está en la carpeta de borradores (se envió, movió o eliminó fuera de DraftSender).
+    """
+
+
+@dataclass
+class Borrador:
+    """
+    Datos mínimos de un borrador, independientes del backend.
+    """
+    id: str
+    destinatario: str
+    asunto: str
+    clave: str = ""  # clave_borrador guardada al crearlo (vacía si no lo creó DraftSender)
+
+
+class BackendCorreo:
+    """
+    Interfaz común para crear, listar y enviar borradores.
+    Se usa como context manager para que cada hilo abra y cierre su propia conexión:
+
+        with crear_backend(perfil=perfil) as backend:
+            backend.crear_borrador(cuenta, destinatario, asunto, cuerpo_html)
+    """
+
+    def abrir(self):
+        return self
+
+    def cerrar(self):
+        pass
+
+    def __enter__(self):
+        return self.abrir()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cerrar()
+
+    def listar_cuentas(self) -> list:
+        """Devuelve las direcciones SMTP de las cuentas disponibles."""
+        raise NotImplementedError
+
+    def obtener_firma(self, cuenta: str, archivo_firma: str = None) -> str:
+        """Devuelve la firma HTML de la cuenta."""
+        raise NotImplementedError
+
+    def crear_borrador(self, cuenta: str, destinatario: str, asunto: str, cuerpo_html: str, firma: str = None,
+                       clave: str = "") -> str:
+        """Crea y guarda un borrador, guardando en él la clave indicada. Devuelve su identificador."""
+        raise NotImplementedError
+
+    def listar_borradores(self, cuenta: str) -> list:
+        """Devuelve los borradores de la cuenta como lista de Borrador."""
+        raise NotImplementedError
+
+    def contar_borradores(self, cuenta: str) -> int:
+        return len(self.listar_borradores(cuenta))
+
+    def resolver_destinatarios(self, cuenta: str, id_borrador: str, cache=None) -> list:
+        """
+        Resuelve los destinatarios del borrador. Devuelve los nombres que no se pudieron resolver.
+        Con cache (CacheResolucion), los destinatarios con un resultado vigente no se vuelven a consultar.
+        """
+        raise NotImplementedError
+
+    def enviar(self, cuenta: str, id_borrador: str):
+        """Envía el borrador indicado."""
+        raise NotImplementedError
+
+    def mover_a_cuarentena(self, cuenta: str, id_borrador: str) -> str:
+        """Mueve el borrador a la carpeta de cuarentena. Devuelve su identificador en ella."""
+        raise NotImplementedError
+
+    def restaurar_de_cuarentena(self, cuenta: str, id_borrador: str) -> str:
+        """Devuelve a Borradores un borrador en cuarentena. Devuelve su nuevo identificador."""
+        raise NotImplementedError
+
+    def observar_borradores(self, cuenta: str, al_agregar=None, al_eliminar=None):
+        """
+        Hasta cerrar el backend, llama a al_agregar(Borrador) por cada borrador nuevo en la carpeta
+        y a al_eliminar() por cada borrador que sale de ella (enviado, movido o eliminado).
+        """
+        raise NotImplementedError
+
+    def procesar_eventos(self):
+        """Entrega los eventos pendientes de observar_borradores (en el hilo que abrió el backend)."""
+
+
+class BackendOutlookCOM(BackendCorreo):
+    """
+    Backend real: Outlook mediante COM (solo Windows).
+    Args: perfil (str): Perfil de Outlook con el que iniciar sesión (opcional).
+    """
+
+    def __init__(self, perfil: str = ""):
+        self.perfil = perfil
+        self.sesion = None
+        self._carpetas = {}
+        self._observadores = []
+
+    def abrir(self):
+        import pythoncom  # Para inicializar el modelo de objetos COM en el hilo actual
+        from outlook_utils import SesionOutlook
+
+        pythoncom.CoInitialize()
+        try:
+            self.sesion = SesionOutlook(self.perfil)
+        except Exception:
+            pythoncom.CoUninitialize()
+            raise
+        return self
+
+    def cerrar(self):
+        import pythoncom
+
+        self.sesion = None
+        self._carpetas.clear()
+        self._observadores.clear()
+        pythoncom.CoUninitialize()
+
+    def carpeta_borradores(self, cuenta: str):
+        from outlook_utils import obtener_carpeta_borradores
+
+        clave = cuenta.lower()
+        if clave not in self._carpetas:
+            self._carpetas[clave] = obtener_carpeta_borradores(self.sesion.namespace, cuenta)
+        return self._carpetas[clave]
+
+    def carpeta_cuarentena(self, cuenta: str):
+        clave = ("cuarentena", cuenta.lower())
+        if clave not in self._carpetas:
+            raiz = self.carpeta_borradores(cuenta).Parent
+            try:
+                self._carpetas[clave] = raiz.Folders.Item(NOMBRE_CUARENTENA)
+            except Exception:
+                self._carpetas[clave] = raiz.Folders.Add(NOMBRE_CUARENTENA)
+                logger.info(f"Carpeta '{NOMBRE_CUARENTENA}' creada para {cuenta}")
+        return self._carpetas[clave]
+
+    def _obtener_borrador(self, cuenta: str, id_borrador: str):
+        """
+        Devuelve el elemento si sigue en la carpeta de borradores; si no, lanza BorradorNoEncontrado.
+        """
+        try:
+            item = self.sesion.obtener_item(id_borrador)
+            en_borradores = item.Parent.EntryID == self.carpeta_borradores(cuenta).EntryID
+        except Exception as e:
+            raise BorradorNoEncontrado(id_borrador) from e
+        if not en_borradores:  # Eliminado por el usuario (Elementos eliminados) o movido a otra carpeta
+            raise BorradorNoEncontrado(id_borrador)
+        return item
+
+    def listar_cuentas(self) -> list:
+        return [account.SmtpAddress for account in self.sesion.namespace.Accounts]
+
+    def obtener_firma(self, cuenta: str, archivo_firma: str = None) -> str:
+        return self.sesion.obtener_firma(cuenta, archivo_firma)
+
+    def crear_borrador(self, cuenta: str, destinatario: str, asunto: str, cuerpo_html: str, firma: str = None,
+                       clave: str = "") -> str:
+        mensaje = self.sesion.crear_borrador(cuenta, destinatario, asunto, cuerpo_html, firma=firma, clave=clave)
+        return mensaje.EntryID
+
+    def listar_borradores(self, cuenta: str) -> list:
+        from outlook_utils import PROPIEDAD_CLAVE
+
+        # Una sola lectura masiva con Folder.GetTable en lugar de abrir cada elemento
+        tabla = self.carpeta_borradores(cuenta).GetTable()
+        tabla.Columns.RemoveAll()
+        for columna in ("EntryID", "To", "Subject", PROPIEDAD_CLAVE):
+            tabla.Columns.Add(columna)
+
+        borradores = []
+        while not tabla.EndOfTable:
+            entry_id, para, asunto, clave = tabla.GetNextRow().GetValues()
+            borradores.append(Borrador(entry_id, para or "", asunto or "", clave or ""))
+        return borradores
+
+    def contar_borradores(self, cuenta: str) -> int:
+        return self.carpeta_borradores(cuenta).Items.Count
+
+    def resolver_destinatarios(self, cuenta: str, id_borrador: str, cache=None) -> list:
+        item = self._obtener_borrador(cuenta, id_borrador)
+        sin_resolver = []
+        for destinatario in item.Recipients:
+            nombre = destinatario.Name
+            resuelto = cache.consultar(nombre) if cache is not None else None
+            if resuelto is None:
+                with medir("outlook.resolve"):
+                    resuelto = destinatario.Resolved or destinatario.Resolve()  # Resolve() consulta la libreta de direcciones
+                if cache is not None:
+                    cache.guardar(nombre, resuelto)
+            if not resuelto:
+                sin_resolver.append(nombre)
+        return sin_resolver
+
+    def enviar(self, cuenta: str, id_borrador: str):
+        item = self._obtener_borrador(cuenta, id_borrador)
+        with medir("outlook.send"):
+            item.Send()
+
+    def mover_a_cuarentena(self, cuenta: str, id_borrador: str) -> str:
+        item = self._obtener_borrador(cuenta, id_borrador)
+        return item.Move(self.carpeta_cuarentena(cuenta)).EntryID
+
+    def restaurar_de_cuarentena(self, cuenta: str, id_borrador: str) -> str:
+        item = self.sesion.obtener_item(id_borrador)
+        return item.Move(self.carpeta_borradores(cuenta)).EntryID
+
+    def observar_borradores(self, cuenta: str, al_agregar=None, al_eliminar=None):
+        import win32com.client
+        from outlook_utils import PROPIEDAD_CLAVE
+
+        class EventosItems:
+            def OnItemAdd(self, item):
+                if al_agregar is None:
+                    return
+                try:
+                    clave = item.PropertyAccessor.GetProperty(PROPIEDAD_CLAVE)
+                except Exception:
+                    clave = ""  # El borrador no lo creó DraftSender
+                try:
+                    al_agregar(Borrador(item.EntryID, item.To or "", item.Subject or "", clave or ""))
+                except Exception:
+                    logger.exception("Error al procesar un borrador nuevo")
+
+            def OnItemRemove(self):
+                # Outlook no indica qué elemento salió de la carpeta
+                if al_eliminar is None:
+                    return
+                try:
+                    al_eliminar()
+                except Exception:
+                    logger.exception("Error al procesar un borrador eliminado")
+
+        items = self.carpeta_borradores(cuenta).Items
+        # Se conservan las referencias: si se liberan, Outlook deja de enviar los eventos
+        self._observadores.append((items, win32com.client.WithEvents(items, EventosItems)))
+
+    def procesar_eventos(self):
+        import pythoncom
+
+        pythoncom.PumpWaitingMessages()
+
+
+class BackendFalso(BackendCorreo):
+    """
+    Outlook en memoria para pruebas y perfilado sin Windows.
+    Args:
+        cuentas (iterable): Cuentas SMTP disponibles.
+        latencia (float | dict): Segundos de espera por llamada; un dict permite indicarla por operación
+            ("crear_borrador", "listar_borradores", "resolver_destinatarios", "resolver_direccion", "enviar", ...).
+        firma (str): Firma HTML devuelta para todas las cuentas.
+        no_resolubles (iterable): Direcciones que resolver_destinatarios informará como no resueltas.
+    """
+
+    def __init__(self, cuentas=("usuario@ejemplo.com",), latencia=0.0, firma="", no_resolubles=()):
+        self.cuentas = list(cuentas)
+        self.latencia = latencia
+        self.firma = firma
+        self.no_resolubles = {d.lower() for d in no_resolubles}
+        self.borradores = {c.lower(): {} for c in self.cuentas}  # cuenta -> {id: Borrador} en orden de creación
+        self.cuarentena = {c.lower(): {} for c in self.cuentas}  # cuenta -> {id: Borrador}
+        self.observadores = {}  # cuenta -> lista de (al_agregar, al_eliminar)
+        self.cuerpos = {}  # id -> cuerpo HTML
+        self.enviados = []  # Borradores enviados, en orden
+        self.llamadas = {}  # operación -> número de llamadas
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _esperar(self, operacion: str):
+        with self._lock:
+            self.llamadas[operacion] = self.llamadas.get(operacion, 0) + 1
+        latencia = self.latencia.get(operacion, 0.0) if isinstance(self.latencia, dict) else self.latencia
+        if latencia:
+            time.sleep(latencia)
+
+    def _carpeta(self, cuenta: str) -> dict:
+        carpeta = self.borradores.get(cuenta.lower())
+        if carpeta is None:
+            raise RuntimeError(f"No se encontró la cuenta en Outlook: {cuenta}")
+        return carpeta
+
+    def listar_cuentas(self) -> list:
+        self._esperar("listar_cuentas")
+        return list(self.cuentas)
+
+    def obtener_firma(self, cuenta: str, archivo_firma: str = None) -> str:
+        self._esperar("obtener_firma")
+        self._carpeta(cuenta)
+        return self.firma
+
+    def crear_borrador(self, cuenta: str, destinatario: str, asunto: str, cuerpo_html: str, firma: str = None,
+                       clave: str = "") -> str:
+        self._esperar("crear_borrador")
+        carpeta = self._carpeta(cuenta)
+        with self._lock:
+            id_borrador = f"FALSO{next(self._ids):08d}"
+            carpeta[id_borrador] = Borrador(id_borrador, destinatario, asunto, clave)
+            self.cuerpos[id_borrador] = cuerpo_html + (self.firma if firma is None else firma)
+        self._avisar_agregado(cuenta, Borrador(id_borrador, destinatario, asunto, clave))
+        return id_borrador
+
+    def _avisar_agregado(self, cuenta: str, borrador: Borrador):
+        with self._lock:
+            observadores = list(self.observadores.get(cuenta.lower(), ()))
+        for al_agregar, _ in observadores:
+            if al_agregar is not None:
+                al_agregar(Borrador(borrador.id, borrador.destinatario, borrador.asunto, borrador.clave))
+
+    def _avisar_eliminado(self, cuenta: str):
+        with self._lock:
+            observadores = list(self.observadores.get(cuenta.lower(), ()))
+        for _, al_eliminar in observadores:
+            if al_eliminar is not None:
+                al_eliminar()
+
+    def listar_borradores(self, cuenta: str) -> list:
+        self._esperar("listar_borradores")
+        with self._lock:
+            return list(self._carpeta(cuenta).values())
+
+    def contar_borradores(self, cuenta: str) -> int:
+        self._esperar("contar_borradores")
+        return len(self._carpeta(cuenta))
+
+    def _borrador(self, cuenta: str, id_borrador: str) -> Borrador:
+        borrador = self._carpeta(cuenta).get(id_borrador)
+        if borrador is None:
+            raise BorradorNoEncontrado(id_borrador)
+        return borrador
+
+    def resolver_destinatarios(self, cuenta: str, id_borrador: str, cache=None) -> list:
+        self._esperar("resolver_destinatarios")
+        borrador = self._borrador(cuenta, id_borrador)
+        sin_resolver = []
+        for destinatario in filter(None, (d.strip() for d in borrador.destinatario.split(";"))):
+            resuelto = cache.consultar(destinatario) if cache is not None else None
+            if resuelto is None:
+                self._esperar("resolver_direccion")
+                resuelto = destinatario.lower() not in self.no_resolubles
+                if cache is not None:
+                    cache.guardar(destinatario, resuelto)
+            if not resuelto:
+                sin_resolver.append(destinatario)
+        return sin_resolver
+
+    def enviar(self, cuenta: str, id_borrador: str):
+        self._esperar("enviar")
+        with self._lock:
+            self._borrador(cuenta, id_borrador)
+            self.enviados.append(self._carpeta(cuenta).pop(id_borrador))
+        self._avisar_eliminado(cuenta)
+
+    def _mover(self, origen: dict, destino: dict, id_borrador: str) -> str:
+        # Como en Outlook, el elemento movido puede cambiar de identificador
+        with self._lock:
+            borrador = origen.pop(id_borrador)
+            borrador.id = f"FALSO{next(self._ids):08d}"
+            destino[borrador.id] = borrador
+            self.cuerpos[borrador.id] = self.cuerpos.pop(id_borrador, "")
+        return borrador.id
+
+    def mover_a_cuarentena(self, cuenta: str, id_borrador: str) -> str:
+        self._esperar("mover_a_cuarentena")
+        self._borrador(cuenta, id_borrador)
+        id_cuarentena = self._mover(self._carpeta(cuenta), self.cuarentena[cuenta.lower()], id_borrador)
+        self._avisar_eliminado(cuenta)
+        return id_cuarentena
+
+    def restaurar_de_cuarentena(self, cuenta: str, id_borrador: str) -> str:
+        self._esperar("restaurar_de_cuarentena")
+        carpeta = self._carpeta(cuenta)
+        id_restaurado = self._mover(self.cuarentena[cuenta.lower()], carpeta, id_borrador)
+        # Como en Outlook, el borrador restaurado llega como elemento nuevo de la carpeta
+        self._avisar_agregado(cuenta, carpeta[id_restaurado])
+        return id_restaurado
+
+    def observar_borradores(self, cuenta: str, al_agregar=None, al_eliminar=None):
+        self._carpeta(cuenta)
+        with self._lock:
+            self.observadores.setdefault(cuenta.lower(), []).append((al_agregar, al_eliminar))
+
+    def eliminar_borrador(self, cuenta: str, id_borrador: str):
+        """Simula que el usuario elimina un borrador desde Outlook."""
+        with self._lock:
+            eliminado = self._carpeta(cuenta).pop(id_borrador, None)
+        if eliminado is not None:
+            self._avisar_eliminado(cuenta)
+
+
+_backend_falso_compartido = None
+
+
+def crear_backend(tipo: str = None, **opciones) -> BackendCorreo:
+    """
+    Crea el backend de correo indicado. Por defecto usa la variable de entorno DRAFTSENDER_BACKEND
+    ("outlook" o "falso"); si no está definida, usa Outlook. Sin opciones, el backend falso es uno solo
+    por proceso, de modo que los borradores creados se ven luego al contar y enviar.
+    Args: tipo (str): "outlook" o "falso". **opciones: Argumentos del backend.
+    Returns: BackendCorreo: Backend sin abrir.
+    """
+    tipo = (tipo or os.environ.get("DRAFTSENDER_BACKEND") or "outlook").lower()
+    if tipo == "outlook":
+        return BackendOutlookCOM(**opciones)
+    if tipo == "falso":
+        global _backend_falso_compartido
+        opciones.pop("perfil", None)
+        if opciones:
+            return BackendFalso(**opciones)
+        if _backend_falso_compartido is None:
+            _backend_falso_compartido = BackendFalso()
+        return _backend_falso_compartido
+    raise ValueError(f"Backend de correo desconocido: {tipo}")
@@ -1,111 +1,198 @@
 import os
-import pandas as pd
-import win32com.client
-import mammoth
-import re
-from tkinter import messagebox
+import time
+from datetime import datetime
 from logger_utils import configurar_logger
+from plantillas import PlantillaCompilada
+from lector_excel import LectorExcel
+from validacion import PATRON_EMAIL, COLUMNAS_OBLIGATORIAS, validar_hoja
+from outlook_utils import SesionOutlook
+from backend_correo import crear_backend
+from reporte_errores import ReporteErrores
+from diario import DiarioEjecucion
+from indice_borradores import IndiceBorradores, clave_borrador, registrar_indice, liberar_indice
+from metricas import MetricasEjecucion, cerrar_metricas, iterar_midiendo
+from auditoria import RegistroAuditoria
 
 logger = configurar_logger("borradores")
 
 def es_email_valido(email: str) -> bool:
-    patron = r"^[\w\.-]+@[\w\.-]+\.\w+$"
-    return re.match(patron, email) is not None
+    return PATRON_EMAIL.match(email) is not None
 
 def cargar_cuerpo_desde_docx(archivo_docx: str, variables: dict) -> str:
-    if not os.path.exists(archivo_docx):
-        raise FileNotFoundError(f"El archivo '{archivo_docx}' no existe.")
-
-    with open(archivo_docx, "rb") as docx_file:
-        resultado = mammoth.convert_to_html(docx_file)
-        cuerpo = resultado.value
-
-    for clave, valor in variables.items():
-        cuerpo = cuerpo.replace(f"[{clave}]", str(valor))
-        cuerpo = cuerpo.replace(f"{{{{{clave}}}}}", str(valor))  # {{Nombre}}
-
-    etiquetas_no_reemplazadas = re.findall(r"\[\w+\]|\{\{\w+\}\}", cuerpo)
-    if etiquetas_no_reemplazadas:
-        etiquetas_unicas = list(set(etiquetas_no_reemplazadas))
-        logger.warning(f"Etiquetas no reemplazadas detectadas: {etiquetas_unicas}")
-
-    cuerpo = f'<div style="font-family: Calibri, sans-serif; font-size: 11pt;">{cuerpo}</div>'
-    return cuerpo
-
-def indice_a_letra_columna(indice):
-    letras = ""
-    while indice >= 0:
-        letras = chr(indice % 26 + 65) + letras
-        indice = indice // 26 - 1
-    return letras
-
-def crear_borrador(cuenta, destinatario, asunto, cuerpo_html, perfil_outlook=""):
-    outlook = win32com.client.Dispatch("Outlook.Application")
-    namespace = outlook.GetNamespace("MAPI")
-
-    if perfil_outlook:
-        namespace.Logon(Profile=perfil_outlook, ShowDialog=False, NewSession=True)
-
-    cuenta_encontrada = next(
-        (acc for acc in namespace.Accounts if acc.SmtpAddress.lower() == cuenta.lower()), None
-    )
-
-    if not cuenta_encontrada:
-        raise RuntimeError(f"No se encontró la cuenta de Outlook: {cuenta}")
-
-    mensaje = outlook.CreateItem(0)
-    mensaje._oleobj_.Invoke(*(64209, 0, 8, 0, cuenta_encontrada))
-    mensaje.Display()
-    firma = mensaje.HTMLBody or ""
-    mensaje.Subject = asunto
-    mensaje.To = destinatario
-    mensaje.BodyFormat = 2
-    mensaje.HTMLBody = cuerpo_html + firma
-    mensaje.Save()
-    mensaje.Close(1)
-
-def generar_borradores(cuenta: str, perfil: str, ruta_excel: str, ruta_docx: str, callback_progreso=None) -> int:
+    """
+    Convierte la plantilla y la completa para una sola fila.
+    Para lotes usar PlantillaCompilada, que convierte el .docx una sola vez.
+    """
+    return PlantillaCompilada.desde_docx(archivo_docx).renderizar(variables)
+
+def crear_borrador(cuenta, destinatario, asunto, cuerpo_html, perfil_outlook="", sesion=None, firma=None):
+    """
+    Crea y guarda un borrador en Outlook sin mostrarlo. Para lotes, pasar una SesionOutlook compartida
+    evita reconectar e iniciar sesión en cada fila.
+    Args: firma (str): HTML que se agrega al cuerpo; None usa la firma de la cuenta y "" no agrega firma.
+    Returns: MailItem: El borrador guardado.
+    """
+    if sesion is None:
+        sesion = SesionOutlook(perfil_outlook)
+    return sesion.crear_borrador(cuenta, destinatario, asunto, cuerpo_html, firma=firma)
+
+def generar_borradores(cuenta: str, perfil: str, ruta_excel: str, ruta_docx: str, callback_progreso=None,
+                       incluir_firma: bool = True, archivo_firma: str = None, backend=None,
+                       reporte_validacion=None, control=None, reporte_errores=None, reanudar: bool = True) -> int:
+    """
+    Genera un borrador por cada fila válida del Excel usando la plantilla Word.
+    Args:
+        backend (BackendCorreo): Backend ya abierto (opcional); si no se indica se abre uno para el lote.
+        reporte_validacion (ReporteValidacion): Resultado de validar_hoja (opcional); si no se indica, la hoja
+            se valida completa antes de crear el primer borrador. Las filas con errores se omiten.
+        control (ControlEjecucion): Pausa y cancelación desde otro hilo (opcional).
+        reporte_errores (ReporteErrores): Donde se acumulan los errores por fila (opcional). El lote no se
+            detiene por una fila con error; al final el reporte se guarda en CSV/JSON.
+        reanudar (bool): Omitir las filas que ya tienen borrador según el diario de esta hoja, plantilla y cuenta.
+            Con False el diario se reinicia y se genera todo de nuevo.
+    La duración de cada etapa y los contadores del lote se guardan al final en la carpeta "metricas", y cada fila
+    deja un registro en la carpeta "auditoria" (ver auditoria.py).
+    Returns: int: Cantidad de borradores creados.
+    """
     if not os.path.exists(ruta_excel):
         raise FileNotFoundError("No se encontró el archivo Excel.")
     if not os.path.exists(ruta_docx):
         raise FileNotFoundError("No se encontró el archivo Word.")
 
-    df = pd.read_excel(ruta_excel, sheet_name=0)
-    columnas_obligatorias = {"Correo", "Asunto", "Nombre"}
-    if not columnas_obligatorias.issubset(df.columns):
-        raise ValueError("El Excel debe contener las columnas: Correo, Asunto, Nombre")
-
-    enviados = 0
-
-    for index, fila in df.iterrows():
-        try:
-            fila_excel = index + 2
-
-            destinatario = str(fila["Correo"]).strip()
-            asunto = str(fila["Asunto"]).strip()
-            nombre = str(fila["Nombre"]).strip()
-
-            if not destinatario:
-                raise ValueError(f"Campo vacío en columna 'Correo', celda A{fila_excel}")
-            if not es_email_valido(destinatario):
-                raise ValueError(f"Correo inválido en columna 'Correo', celda A{fila_excel}: {destinatario}")
-            if not asunto:
-                raise ValueError(f"Asunto vacío en celda B{fila_excel}")
-            if not nombre:
-                raise ValueError(f"Nombre vacío en celda C{fila_excel}")
-
-            variables = {col: str(fila[col]).strip() for col in df.columns}
-            cuerpo_html = cargar_cuerpo_desde_docx(ruta_docx, variables)
-            crear_borrador(cuenta, destinatario, asunto, cuerpo_html, perfil_outlook=perfil)
-            enviados += 1
-
-        except Exception as e:
-            mensaje_error = f"Error en fila {fila_excel}: {e}"
-            logger.error(mensaje_error, exc_info=True)
-            messagebox.showerror("Error al generar borradores", mensaje_error)
-
-        if callback_progreso:
-            callback_progreso(index + 1, len(df))
-
-    logger.info(f"Se generaron {enviados} borradores.")
-    return enviados
\ No newline at end of file
+    metricas = MetricasEjecucion("borradores", cuenta)
+    auditoria = RegistroAuditoria("borradores", cuenta, metricas.id_ejecucion)
+    try:
+        with metricas.activar():
+            return _generar_borradores(cuenta, perfil, ruta_excel, ruta_docx, callback_progreso, incluir_firma,
+                                       archivo_firma, backend, reporte_validacion, control, reporte_errores,
+                                       reanudar, metricas, auditoria)
+    finally:
+        auditoria.cerrar()
+        cerrar_metricas(metricas)
+
+def _generar_borradores(cuenta, perfil, ruta_excel, ruta_docx, callback_progreso, incluir_firma, archivo_firma,
+                        backend, reporte_validacion, control, reporte_errores, reanudar, metricas, auditoria) -> int:
+    if reporte_validacion is None:
+        with metricas.medir("validacion"):
+            reporte_validacion = validar_hoja(ruta_excel)
+    filas_invalidas = reporte_validacion.filas_invalidas
+    if filas_invalidas:
+        logger.warning(f"Se omitirán {len(filas_invalidas)} filas con errores:\n{reporte_validacion.resumen()}")
+
+    if reporte_errores is None:
+        reporte_errores = ReporteErrores("borradores", cuenta)
+    for error in reporte_validacion.errores:
+        reporte_errores.registrar("validacion", f"{error.celda} ({error.columna}): {error.motivo}", fila=error.fila,
+                                  destinatario=error.valor if error.columna == "Correo" else "")
+
+    columnas_obligatorias = set(COLUMNAS_OBLIGATORIAS)
+    with metricas.medir("excel.abrir"):
+        lector = LectorExcel(ruta_excel)
+    diario = None
+    backend_propio = backend is None
+    indice = None
+    try:
+        if not columnas_obligatorias.issubset(lector.columnas):
+            raise ValueError("El Excel debe contener las columnas: Correo, Asunto, Nombre")
+
+        with metricas.medir("plantilla.docx_a_html"):
+            plantilla = PlantillaCompilada.desde_docx(ruta_docx, columnas=lector.columnas)
+
+        diario = DiarioEjecucion(ruta_excel, cuenta, plantilla.huella)
+        if reanudar:
+            filas_completadas = diario.completadas()
+            if filas_completadas:
+                logger.info(f"Reanudando lote: {len(filas_completadas)} filas ya tienen borrador y se omitirán.")
+        else:
+            diario.reiniciar()
+            filas_completadas = set()
+        campos = [col for col in lector.columnas if col in plantilla.campos]
+        nombre_plantilla = os.path.basename(ruta_docx)
+        with metricas.medir("excel.contar_filas"):
+            total_filas = lector.total
+
+        with metricas.medir("backend.abrir"):
+            if backend_propio:
+                backend = crear_backend(perfil=perfil).abrir()
+        with metricas.medir("backend.obtener_firma"):
+            firma = backend.obtener_firma(cuenta, archivo_firma) if incluir_firma else ""
+        # Borradores que ya existen para esta cuenta (una sola lectura de la carpeta)
+        with metricas.medir("indice.construir"):
+            indice = IndiceBorradores.construir(backend, cuenta)
+        registrar_indice(cuenta, indice)
+        enviados = 0
+        procesadas = 0
+        duplicadas = 0
+        inicio = time.perf_counter()
+
+        # Solo se leen las columnas obligatorias y las que usa la plantilla
+        for fila in iterar_midiendo(lector.filas(columnas_obligatorias.union(campos)), "excel.leer_fila"):
+            if control and not control.esperar_si_pausado():
+                logger.info(f"Creación de borradores cancelada tras {procesadas} filas.")
+                break
+            fila_excel = fila.numero
+            procesadas += 1
+            # Las filas con errores ya quedaron en el reporte de validación
+            if fila_excel in filas_invalidas:
+                auditoria.registrar("invalida", fila=fila_excel, destinatario=fila["Correo"])
+            elif fila_excel not in filas_completadas:
+                inicio_fila = time.perf_counter()
+                try:
+                    clave = clave_borrador(fila["Correo"], fila["Asunto"], plantilla.huella)
+                    if clave in indice:
+                        duplicadas += 1
+                        auditoria.registrar("duplicado", fila=fila_excel, destinatario=fila["Correo"], clave=clave)
+                    else:
+                        variables = {col: fila[col] for col in campos}
+                        with metricas.medir("plantilla.renderizar"):
+                            cuerpo_html = plantilla.renderizar(variables)
+                        with metricas.medir("backend.crear_borrador"):
+                            id_borrador = backend.crear_borrador(cuenta, fila["Correo"], fila["Asunto"],
+                                                                 cuerpo_html, firma=firma, clave=clave)
+                        indice.agregar(clave, id_borrador)
+                        with metricas.medir("diario.marcar"):
+                            diario.marcar(fila_excel, id_borrador)
+                        enviados += 1
+                        auditoria.registrar(
+                            "creado", fila=fila_excel, destinatario=fila["Correo"], plantilla=nombre_plantilla,
+                            huella_plantilla=plantilla.huella, clave=clave, id_borrador=id_borrador,
+                            creado=datetime.now().isoformat(timespec="milliseconds"),
+                            latencia_s=round(time.perf_counter() - inicio_fila, 4),
+                        )
+
+                except Exception as e:
+                    metricas.contar("errores")
+                    auditoria.registrar("error", fila=fila_excel, destinatario=fila["Correo"], plantilla=nombre_plantilla,
+                                        etapa="crear_borrador", error=str(e),
+                                        latencia_s=round(time.perf_counter() - inicio_fila, 4))
+                    logger.error(f"Error en fila {fila_excel}: {e}", exc_info=True)
+                    reporte_errores.registrar("crear_borrador", e, fila=fila_excel, destinatario=fila["Correo"])
+
+            if callback_progreso:
+                callback_progreso(procesadas, max(total_filas, procesadas))
+        if callback_progreso and procesadas < total_filas and not (control and control.cancelado):
+            callback_progreso(total_filas, total_filas)  # Filas vacías omitidas al final de la hoja
+
+        metricas.contar("filas", procesadas)
+        metricas.contar("creados", enviados)
+        metricas.contar("duplicados", duplicadas)
+        metricas.contar("invalidas", len(filas_invalidas))
+        if duplicadas:
+            logger.info(f"Se omitieron {duplicadas} filas que ya tenían un borrador igual en Outlook.")
+        duracion = time.perf_counter() - inicio
+        ritmo = enviados * 60 / duracion if duracion > 0 else 0
+        logger.info(f"Se generaron {enviados} borradores en {duracion:.1f} s ({ritmo:.1f} borradores/minuto).")
+        return enviados
+    finally:
+        if len(reporte_errores):
+            try:
+                reporte_errores.guardar()
+            except Exception:
+                logger.exception("No se pudo guardar el reporte de errores")
+        lector.cerrar()
+        if diario is not None:
+            diario.cerrar()
+        if indice is not None:
+            liberar_indice(cuenta, indice)
+        if backend_propio and backend is not None:
+            backend.cerrar()
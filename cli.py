@@ -0,0 +1,352 @@
+"""
+Modo de línea de comandos de DraftSender, sin ventanas, para ejecutar campañas desde el Programador de tareas
+o desde un script. No importa tkinter ni PIL.
+Uso:
+    python cli.py crear --excel lista.xlsx --docx plantilla.docx --cuenta ventas@empresa.com
+    python cli.py enviar --cuenta ventas@empresa.com --cuenta soporte@empresa.com --por-hora 30
+    python cli.py crear-y-enviar --excel lista.xlsx --docx plantilla.docx --cuenta ventas@empresa.com --intervalo 60
+    python cli.py simular --excel lista.xlsx --docx plantilla.docx [--cuenta ventas@empresa.com]
+    python cli.py auditoria [--por cuenta] [--cuenta ventas@empresa.com] [--desde 2024-05-01]
+
+El avance se escribe en la salida estándar, un objeto JSON por línea ({"evento": ..., ...});
+el log va a la salida de errores. Códigos de salida: ver EXITO, CON_ERRORES, USO, FALLO e INTERRUMPIDO.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+from logger_utils import configurar_logger
+
+logger = configurar_logger("cli")
+
+EXITO = 0  # Todo se procesó sin errores
+CON_ERRORES = 1  # Terminó, pero hubo filas inválidas o borradores con error (ver el reporte)
+USO = 2  # Argumentos incorrectos (lo devuelve argparse)
+FALLO = 3  # No se pudo ejecutar: archivo inexistente, Outlook no disponible, etc.
+INTERRUMPIDO = 130  # Detenido con Ctrl+C
+
+INTERVALO_POR_DEFECTO = 60.0  # Segundos entre envíos de una cuenta si no se indica ningún límite
+
+
+class SalidaJSON:
+    """
+    Escribe eventos como líneas JSON. Los de progreso se limitan a uno cada `intervalo` segundos por tipo y cuenta
+    (siempre se escribe el último).
+    """
+
+    def __init__(self, flujo=None, intervalo: float = 0.5):
+        self.flujo = flujo or sys.stdout
+        self.intervalo = intervalo
+        self._ultimo = {}  # (evento, cuenta) -> momento del último progreso escrito
+        self._lock = threading.Lock()
+
+    def emitir(self, evento: str, **datos):
+        linea = json.dumps({"evento": evento, "momento": datetime.now().isoformat(timespec="seconds"), **datos},
+                           ensure_ascii=False, default=str)
+        with self._lock:
+            self.flujo.write(linea + "\n")
+            self.flujo.flush()
+
+    def progreso(self, evento: str, actual: int, total: int, **datos):
+        clave = (evento, datos.get("cuenta"))
+        ahora = time.monotonic()
+        if actual < total and ahora - self._ultimo.get(clave, 0.0) < self.intervalo:
+            return
+        self._ultimo[clave] = ahora
+        self.emitir(evento, actual=actual, total=total, **datos)
+
+
+def resumen_reporte(reporte) -> dict:
+    return {"errores": len(reporte), "reporte": reporte.ruta_csv}
+
+
+def esperar_hilos(hilos, detener) -> bool:
+    """
+    Espera a que terminen los hilos entregando los eventos del bus; con Ctrl+C llama a detener() y sigue esperando.
+    Returns: bool: True si se interrumpió.
+    """
+    from eventos import bus_eventos
+
+    interrumpido = False
+    while any(h.is_alive() for h in hilos):
+        try:
+            bus_eventos.despachar_pendientes()
+            time.sleep(0.1)
+        except KeyboardInterrupt:
+            if not interrumpido:
+                logger.info("Interrupción recibida: deteniendo después del elemento en curso.")
+                interrumpido = True
+                detener()
+    bus_eventos.despachar_pendientes()
+    return interrumpido
+
+
+def comando_crear(args, salida: SalidaJSON) -> int:
+    from validacion import validar_hoja
+    from trabajadores import TrabajadorBorradores
+
+    reporte_validacion = validar_hoja(args.excel)
+    salida.emitir("validacion", total_filas=reporte_validacion.total_filas,
+                  filas_invalidas=len(reporte_validacion.filas_invalidas),
+                  errores=[str(e) for e in reporte_validacion.errores[:args.limite_errores]])
+    if not reporte_validacion.valido and args.estricto:
+        return CON_ERRORES
+
+    resultado = {}
+    trabajador = TrabajadorBorradores(
+        al_terminar=lambda cantidad, error: resultado.update(cantidad=cantidad, error=error),
+        cuenta=args.cuenta,
+        perfil=args.perfil,
+        ruta_excel=args.excel,
+        ruta_docx=args.docx,
+        callback_progreso=lambda actual, total: salida.progreso("progreso_borradores", actual, total,
+                                                                cuenta=args.cuenta),
+        incluir_firma=not args.sin_firma,
+        archivo_firma=args.archivo_firma,
+        reporte_validacion=reporte_validacion,
+        reanudar=not args.no_reanudar,
+    )
+    trabajador.start()
+    interrumpido = esperar_hilos([trabajador], trabajador.control.cancelar)
+
+    error = resultado.get("error")
+    salida.emitir("fin_borradores", cuenta=args.cuenta, creados=resultado.get("cantidad", 0),
+                  cancelado=interrumpido, fallo=str(error) if error else None,
+                  **resumen_reporte(trabajador.reporte_errores))
+    if interrumpido:
+        return INTERRUMPIDO
+    if error:
+        return FALLO
+    return CON_ERRORES if len(trabajador.reporte_errores) else EXITO
+
+
+def crear_planificador_cli(args):
+    from dataclasses import replace
+    from planificador import LimitesEnvio, cargar_limites, crear_planificador
+
+    limites = cargar_limites()
+    opciones = {
+        "por_minuto": args.por_minuto,
+        "por_hora": args.por_hora,
+        "por_dia": args.por_dia,
+        "rafaga": args.rafaga,
+        "jitter": args.jitter,
+    }
+    intervalo = args.intervalo
+    if any(valor is not None for valor in opciones.values()):
+        # Los límites indicados en la línea de comandos reemplazan a los configurados para estas cuentas
+        opciones = {clave: valor for clave, valor in opciones.items() if valor is not None}
+        for cuenta in args.cuenta:
+            limites[cuenta] = LimitesEnvio(**opciones)
+    planificador = crear_planificador(intervalo, limites)
+    # Sin un ritmo no se debe vaciar la bandeja de golpe (el servidor podría bloquear la cuenta),
+    # tampoco si solo hay ráfaga, jitter, cupo diario o límites para otras cuentas
+    for cuenta in args.cuenta:
+        limites_cuenta = planificador.limites_de(cuenta)
+        if limites_cuenta.tasa_ritmo() is None:
+            planificador.limites_por_cuenta[cuenta.lower()] = replace(
+                limites_cuenta, intervalo_minimo=INTERVALO_POR_DEFECTO)
+            logger.info(f"{cuenta}: sin ritmo de envío configurado, un envío cada {INTERVALO_POR_DEFECTO:g} s")
+    return planificador
+
+
+def comando_enviar(args, salida: SalidaJSON) -> int:
+    from coordinador_envios import CoordinadorEnvios
+    from cola_envio import PoliticaReintentos
+    from eventos import bus_eventos
+
+    cuentas = args.cuenta
+
+    def al_progresar(cuenta, restantes, enviados):
+        salida.emitir("progreso_envio", cuenta=cuenta, restantes=restantes, enviados=enviados)
+
+    def al_finalizar(cuenta, enviados, reporte):
+        salida.emitir("fin_envio", cuenta=cuenta, enviados=enviados, **resumen_reporte(reporte))
+
+    bus_eventos.suscribir("progreso_envio", al_progresar)
+    bus_eventos.suscribir("fin_envio", al_finalizar)
+    try:
+        coordinador = CoordinadorEnvios(
+            crear_planificador_cli(args),
+            PoliticaReintentos(max_intentos=args.reintentos + 1),
+        )
+        trabajadores = coordinador.iniciar_varias(cuentas)
+        interrumpido = esperar_hilos(trabajadores, coordinador.detener)
+    finally:
+        bus_eventos.desuscribir("progreso_envio", al_progresar)
+        bus_eventos.desuscribir("fin_envio", al_finalizar)
+
+    if interrumpido:
+        return INTERRUMPIDO
+    reportes = [t.reporte_errores for t in trabajadores]
+    if any(t.error for t in trabajadores) or any(e.etapa == "general" for r in reportes for e in r.errores):
+        return FALLO
+    return CON_ERRORES if any(len(r) for r in reportes) else EXITO
+
+
+def comando_crear_y_enviar(args, salida: SalidaJSON) -> int:
+    codigo = comando_crear(args, salida)
+    if codigo not in (EXITO, CON_ERRORES):
+        return codigo
+    args.cuenta = [args.cuenta]
+    return max(codigo, comando_enviar(args, salida))
+
+
+def comando_simular(args, salida: SalidaJSON) -> int:
+    """
+    Hace todo lo de "crear" salvo crear los borradores: valida la hoja, compila la plantilla y la aplica a cada fila.
+    Con --cuenta, además cuenta las filas que se omitirían por estar ya en el diario o en Outlook.
+    """
+    from validacion import validar_hoja, COLUMNAS_OBLIGATORIAS
+    from lector_excel import LectorExcel
+    from plantillas import PlantillaCompilada
+    from indice_borradores import clave_borrador
+
+    reporte_validacion = validar_hoja(args.excel)
+    filas_invalidas = reporte_validacion.filas_invalidas
+    salida.emitir("validacion", total_filas=reporte_validacion.total_filas, filas_invalidas=len(filas_invalidas),
+                  errores=[str(e) for e in reporte_validacion.errores[:args.limite_errores]])
+
+    with LectorExcel(args.excel) as lector:
+        if not set(COLUMNAS_OBLIGATORIAS).issubset(lector.columnas):
+            raise ValueError(f"El Excel debe contener las columnas: {', '.join(COLUMNAS_OBLIGATORIAS)}")
+        plantilla = PlantillaCompilada.desde_docx(args.docx, columnas=lector.columnas)
+        campos = [c for c in lector.columnas if c in plantilla.campos]
+
+        completadas, indice = set(), None
+        if args.cuenta:
+            from diario import DiarioEjecucion
+            from backend_correo import crear_backend
+            from indice_borradores import IndiceBorradores
+
+            diario = DiarioEjecucion(args.excel, args.cuenta, plantilla.huella)
+            try:
+                completadas = diario.completadas() if not args.no_reanudar else set()
+            finally:
+                diario.cerrar()
+            with crear_backend(perfil=args.perfil) as backend:
+                indice = IndiceBorradores.construir(backend, args.cuenta)
+
+        total = lector.total
+        conteo = {"crearia": 0, "invalidas": 0, "ya_en_diario": 0, "duplicadas": 0}
+        muestra = None
+        procesadas = 0
+
+        for procesadas, fila in enumerate(lector.filas(set(COLUMNAS_OBLIGATORIAS).union(campos)), start=1):
+            if fila.numero in filas_invalidas:
+                conteo["invalidas"] += 1
+            elif fila.numero in completadas:
+                conteo["ya_en_diario"] += 1
+            elif indice is not None and clave_borrador(fila["Correo"], fila["Asunto"], plantilla.huella) in indice:
+                conteo["duplicadas"] += 1
+            else:
+                cuerpo_html = plantilla.renderizar({c: fila[c] for c in campos})
+                conteo["crearia"] += 1
+                if muestra is None:
+                    muestra = {"fila": fila.numero, "destinatario": fila["Correo"], "asunto": fila["Asunto"],
+                               "caracteres_cuerpo": len(cuerpo_html)}
+            salida.progreso("progreso_simulacion", procesadas, max(total, procesadas))
+        if procesadas < total:
+            salida.progreso("progreso_simulacion", total, total)  # Filas vacías omitidas al final de la hoja
+
+    salida.emitir("fin_simulacion", campos_plantilla=sorted(plantilla.campos), muestra=muestra, **conteo)
+    return EXITO if reporte_validacion.valido else CON_ERRORES
+
+
+def comando_auditoria(args, salida: SalidaJSON) -> int:
+    """
+    Resume los registros de auditoría: un evento "resumen_auditoria" por ejecución (o por cuenta).
+    """
+    from auditoria import leer_registros, resumir
+
+    desde = datetime.fromisoformat(args.desde) if args.desde else None
+    resumenes = resumir(leer_registros(cuenta=args.cuenta, desde=desde), por=args.por)
+    for resumen in resumenes:
+        salida.emitir("resumen_auditoria", **resumen)
+    salida.emitir("fin_auditoria", grupos=len(resumenes), mensajes=sum(r["mensajes"] for r in resumenes))
+    return EXITO
+
+
+def crear_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="draftsender", description="DraftSender sin interfaz gráfica")
+    parser.add_argument("--backend", choices=("outlook", "falso"),
+                        help="Backend de correo (por defecto, DRAFTSENDER_BACKEND u Outlook)")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    def argumentos_lote(p, cuenta_obligatoria=True):
+        p.add_argument("--excel", required=True, help="Excel con los destinatarios")
+        p.add_argument("--docx", required=True, help="Plantilla Word")
+        p.add_argument("--cuenta", required=cuenta_obligatoria, help="Cuenta SMTP de Outlook")
+        p.add_argument("--perfil", default="", help="Perfil de Outlook (opcional)")
+        p.add_argument("--no-reanudar", action="store_true", help="Ignorar el diario y generar todo de nuevo")
+        p.add_argument("--limite-errores", type=int, default=20, help="Errores de validación a listar")
+
+    def argumentos_creacion(p):
+        p.add_argument("--sin-firma", action="store_true", help="No agregar la firma de la cuenta")
+        p.add_argument("--archivo-firma", help="Firma de Outlook a usar (nombre o ruta del .htm)")
+        p.add_argument("--estricto", action="store_true", help="No crear nada si hay filas con errores")
+
+    def argumentos_envio(p):
+        p.add_argument("--intervalo", type=float,
+                       help="Segundos mínimos entre envíos de una cuenta (si su límite no fija un ritmo, "
+                            f"{INTERVALO_POR_DEFECTO:g})")
+        p.add_argument("--por-minuto", type=float)
+        p.add_argument("--por-hora", type=float)
+        p.add_argument("--por-dia", type=float)
+        p.add_argument("--rafaga", type=int)
+        p.add_argument("--jitter", type=float, help="Segundos aleatorios (0..jitter) antes de cada envío")
+        p.add_argument("--reintentos", type=int, default=2, help="Reintentos de un borrador en cuarentena")
+
+    p_crear = subparsers.add_parser("crear", help="Crear los borradores del Excel")
+    argumentos_lote(p_crear)
+    argumentos_creacion(p_crear)
+
+    p_enviar = subparsers.add_parser("enviar", help="Enviar los borradores de una o varias cuentas")
+    p_enviar.add_argument("--cuenta", required=True, action="append", help="Cuenta SMTP (se puede repetir)")
+    argumentos_envio(p_enviar)
+
+    p_ambos = subparsers.add_parser("crear-y-enviar", help="Crear los borradores y luego enviarlos")
+    argumentos_lote(p_ambos)
+    argumentos_creacion(p_ambos)
+    argumentos_envio(p_ambos)
+
+    p_simular = subparsers.add_parser("simular", help="Validar y aplicar la plantilla sin crear borradores")
+    argumentos_lote(p_simular, cuenta_obligatoria=False)
+
+    p_auditoria = subparsers.add_parser("auditoria", help="Ritmo, errores y latencias de los registros de auditoría")
+    p_auditoria.add_argument("--por", choices=("ejecucion", "cuenta"), default="ejecucion", help="Agrupar por")
+    p_auditoria.add_argument("--cuenta", help="Solo los registros de esta cuenta")
+    p_auditoria.add_argument("--desde", help="Solo los registros desde esta fecha (AAAA-MM-DD)")
+    return parser
+
+
+COMANDOS = {
+    "crear": comando_crear,
+    "enviar": comando_enviar,
+    "crear-y-enviar": comando_crear_y_enviar,
+    "simular": comando_simular,
+    "auditoria": comando_auditoria,
+}
+
+
+def main(argv=None) -> int:
+    args = crear_parser().parse_args(argv)
+    if args.backend:
+        os.environ["DRAFTSENDER_BACKEND"] = args.backend
+    salida = SalidaJSON()
+    try:
+        return COMANDOS[args.comando](args, salida)
+    except KeyboardInterrupt:
+        return INTERRUMPIDO
+    except Exception as e:
+        logger.exception(f"Fallo al ejecutar {args.comando}")
+        salida.emitir("error", comando=args.comando, tipo_error=type(e).__name__, mensaje=str(e))
+        return FALLO
+
+
+if __name__ == "__main__":
+    sys.exit(main())
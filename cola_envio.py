@@ -0,0 +1,124 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+
+from logger_utils import configurar_logger
+
+logger = configurar_logger("cola_envio")
+
+
+@dataclass
+class PoliticaReintentos:
+    """
+    Reintentos de un borrador que falló al enviarse.
+    Args:
+        max_intentos (int): Intentos totales, contando el primero. Agotados, el borrador queda en cuarentena.
+        espera_inicial (float): Segundos antes del primer reintento.
+        factor (float): Multiplicador de la espera en cada reintento siguiente.
+    """
+    max_intentos: int = 3
+    espera_inicial: float = 300.0
+    factor: float = 2.0
+
+    def espera(self, intentos: int) -> float:
+        return self.espera_inicial * self.factor ** (intentos - 1)
+
+
+@dataclass
+class ElementoCola:
+    """
+    Borrador pendiente de envío. en_cuarentena indica que hay que devolverlo a Borradores antes de enviarlo.
+    """
+    borrador: object
+    intentos: int = 0
+    en_cuarentena: bool = False
+
+
+class ColaEnvio:
+    """
+    Cola de envío construida con la lista de borradores tomada al inicio, que se recorre en orden
+    sin volver a leer la carpeta. Los borradores que aparecen durante el envío se agregan al final con agregar();
+    los que fallan se reprograman según la política de reintentos.
+    Args:
+        borradores (list): Borradores de la carpeta al iniciar (lista de Borrador).
+        politica (PoliticaReintentos): Política de reintentos (opcional).
+    """
+
+    def __init__(self, borradores, politica: PoliticaReintentos = None):
+        self.politica = politica or PoliticaReintentos()
+        self._pendientes = deque(ElementoCola(b) for b in borradores)
+        self._vistos = {b.id for b in borradores}
+        self._reintentos = []  # heap de (momento, orden, ElementoCola)
+        self._orden = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pendientes) + len(self._reintentos)
+
+    def agregar(self, borrador):
+        """
+        Agrega al final un borrador creado durante el envío (se puede llamar desde otro hilo).
+        """
+        with self._lock:
+            if borrador.id not in self._vistos:
+                self._vistos.add(borrador.id)
+                self._pendientes.append(ElementoCola(borrador))
+
+    def reubicar(self, elemento: ElementoCola, nuevo_id: str):
+        """
+        Registra el nuevo id de un borrador que se devolvió a Borradores, para no tomarlo como borrador nuevo
+        si el aviso de la carpeta llega (o ya llegó) por agregar().
+        """
+        with self._lock:
+            elemento.borrador.id = nuevo_id
+            elemento.en_cuarentena = False
+            if nuevo_id in self._vistos:
+                self._pendientes = deque(e for e in self._pendientes if e.borrador.id != nuevo_id)
+            self._vistos.add(nuevo_id)
+
+    def siguiente(self):
+        """
+        Próximo elemento a enviar: primero los reintentos que ya cumplieron su espera, luego los pendientes en orden.
+        Returns: ElementoCola | None: None si por ahora no hay nada que enviar.
+        """
+        with self._lock:
+            if self._reintentos and self._reintentos[0][0] <= time.monotonic():
+                return heapq.heappop(self._reintentos)[2]
+            if self._pendientes:
+                return self._pendientes.popleft()
+            return None
+
+    def proximos(self, cantidad: int) -> list:
+        """
+        Borradores de los próximos elementos pendientes, sin sacarlos de la cola.
+        """
+        with self._lock:
+            return [e.borrador for e in itertools.islice(self._pendientes, cantidad)]
+
+    def espera_reintento(self):
+        """
+        Segundos hasta el próximo reintento, o None si no queda ninguno.
+        """
+        with self._lock:
+            if not self._reintentos:
+                return None
+            return max(self._reintentos[0][0] - time.monotonic(), 0.0)
+
+    def fallo(self, elemento: ElementoCola, id_cuarentena: str) -> bool:
+        """
+        Registra el fallo de un elemento que se movió a cuarentena con el id indicado.
+        Returns: bool: True si se reintentará; False si agotó sus intentos.
+        """
+        elemento.intentos += 1
+        elemento.borrador.id = id_cuarentena
+        elemento.en_cuarentena = True
+        if elemento.intentos >= self.politica.max_intentos:
+            return False
+        momento = time.monotonic() + self.politica.espera(elemento.intentos)
+        with self._lock:
+            heapq.heappush(self._reintentos, (momento, next(self._orden), elemento))
+        return True
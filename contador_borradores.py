@@ -0,0 +1,116 @@
+import threading
+import time
+
+from logger_utils import configurar_logger
+from backend_correo import crear_backend
+from eventos import bus_eventos
+
+logger = configurar_logger("contador_borradores")
+
+PERIODO_EVENTOS = 0.5  # Segundos entre lecturas de los avisos de la carpeta
+PERIODO_RECUENTO = 30.0  # Segundos entre recuentos completos, para corregir avisos perdidos
+
+
+class ContadorBorradores(threading.Thread):
+    """
+    Mantiene la cantidad de borradores de cada cuenta sin consultar Outlook en cada lectura:
+    cuenta una vez al observar la cuenta y luego suma o resta con los avisos de la carpeta (elemento agregado o
+    eliminado). Cada `periodo_recuento` segundos vuelve a contar para corregir desvíos; si el backend no ofrece
+    avisos, ese recuento periódico es la única fuente. Todo el acceso a Outlook ocurre en este hilo, con una sola
+    conexión; cantidad() solo lee un diccionario y se puede llamar desde el hilo de Tk.
+    Publica "conteo_borradores" (cuenta, cantidad, error) en bus_eventos cuando la cantidad cambia o falla el conteo.
+    Args:
+        cuentas (iterable): Cuentas a observar desde el inicio.
+        periodo_eventos (float): Segundos entre lecturas de avisos.
+        periodo_recuento (float): Segundos entre recuentos completos.
+    """
+
+    def __init__(self, cuentas=(), periodo_eventos: float = PERIODO_EVENTOS,
+                 periodo_recuento: float = PERIODO_RECUENTO):
+        super().__init__(name="ContadorBorradores", daemon=True)
+        self.periodo_eventos = periodo_eventos
+        self.periodo_recuento = periodo_recuento
+        self._cantidades = {}  # cuenta (minúsculas) -> cantidad conocida
+        self._cambios = {}  # cuenta (minúsculas) -> avisos aún no aplicados (+1 / -1)
+        self._por_observar = {c.lower(): c for c in cuentas}
+        self._observadas = {}  # cuenta (minúsculas) -> (cuenta, momento del último recuento)
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+
+    def observar(self, cuenta: str):
+        """
+        Agrega una cuenta (se puede llamar desde cualquier hilo). Su primera cantidad llega por el bus.
+        """
+        with self._lock:
+            if cuenta.lower() not in self._observadas:
+                self._por_observar[cuenta.lower()] = cuenta
+
+    def cantidad(self, cuenta: str):
+        """
+        Returns: int | None: Última cantidad conocida; None si la cuenta aún no se contó.
+        """
+        return self._cantidades.get(cuenta.lower())
+
+    def detener(self):
+        self._detener.set()
+
+    def _aviso(self, clave: str, cambio: int):
+        with self._lock:
+            self._cambios[clave] = self._cambios.get(clave, 0) + cambio
+
+    def _recontar(self, backend, clave: str, cuenta: str):
+        with self._lock:
+            self._cambios[clave] = 0  # Los avisos anteriores ya están incluidos en el recuento
+        self._publicar(cuenta, backend.contar_borradores(cuenta))
+        self._observadas[clave] = (cuenta, time.monotonic())
+
+    def _publicar(self, cuenta: str, cantidad: int):
+        clave = cuenta.lower()
+        if self._cantidades.get(clave) != cantidad:
+            self._cantidades[clave] = cantidad
+            bus_eventos.publicar("conteo_borradores", cuenta=cuenta, cantidad=cantidad, error=None)
+
+    def _agregar_cuentas(self, backend):
+        with self._lock:
+            nuevas, self._por_observar = self._por_observar, {}
+        for clave, cuenta in nuevas.items():
+            try:
+                try:
+                    backend.observar_borradores(
+                        cuenta,
+                        al_agregar=lambda _borrador, clave=clave: self._aviso(clave, 1),
+                        al_eliminar=lambda clave=clave: self._aviso(clave, -1),
+                    )
+                except NotImplementedError:
+                    logger.info(f"Sin avisos de carpeta para {cuenta}; se cuenta cada {self.periodo_recuento} s")
+                self._recontar(backend, clave, cuenta)
+            except Exception as e:
+                logger.exception(f"Error al contar borradores de {cuenta}")
+                bus_eventos.publicar("conteo_borradores", cuenta=cuenta, cantidad=None, error=str(e))
+
+    def _aplicar_cambios(self, backend):
+        ahora = time.monotonic()
+        for clave, (cuenta, ultimo_recuento) in list(self._observadas.items()):
+            if ahora - ultimo_recuento >= self.periodo_recuento:
+                try:
+                    self._recontar(backend, clave, cuenta)
+                except Exception:
+                    logger.warning(f"No se pudo recontar los borradores de {cuenta}", exc_info=True)
+                continue
+            with self._lock:
+                cambio = self._cambios.pop(clave, 0)
+            if cambio:
+                self._publicar(cuenta, max(self._cantidades.get(clave, 0) + cambio, 0))
+
+    def run(self):
+        try:
+            with crear_backend() as backend:
+                while not self._detener.is_set():
+                    self._agregar_cuentas(backend)
+                    backend.procesar_eventos()  # Entrega los avisos de Outlook en este hilo
+                    self._aplicar_cambios(backend)
+                    self._detener.wait(self.periodo_eventos)
+        except Exception as e:
+            logger.exception("El contador de borradores se detuvo por un error")
+            for clave, cuenta in list(self._por_observar.items()) + [(k, c) for k, (c, _) in self._observadas.items()]:
+                bus_eventos.publicar("conteo_borradores", cuenta=cuenta, cantidad=None, error=str(e))
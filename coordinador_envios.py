@@ -0,0 +1,74 @@
+import threading
+from logger_utils import configurar_logger
+from planificador import crear_planificador
+from trabajadores import TrabajadorEnvios
+
+logger = configurar_logger("coordinador_envios")
+
+
+class CoordinadorEnvios:
+    """
+    Envía desde varias cuentas a la vez: un TrabajadorEnvios por cuenta, cada uno con su apartamento COM,
+    su control de detención y los límites de su cuenta en el planificador compartido.
+    Como los cupos son por cuenta, el total enviado por minuto crece con el número de cuentas.
+    Args:
+        planificador (PlanificadorEnvios): Planificador compartido (por defecto, el de los límites configurados).
+        politica_reintentos (PoliticaReintentos): Política de reintentos de todas las cuentas (opcional).
+    """
+
+    def __init__(self, planificador=None, politica_reintentos=None):
+        self.planificador = planificador or crear_planificador()
+        self.politica_reintentos = politica_reintentos
+        self.trabajadores = {}  # cuenta (minúsculas) -> TrabajadorEnvios
+        self._lock = threading.Lock()
+
+    def iniciar(self, cuenta: str, al_terminar=None) -> TrabajadorEnvios:
+        """
+        Inicia el envío de la cuenta. Si ya está en marcha, devuelve el trabajador existente.
+        """
+        with self._lock:
+            trabajador = self.trabajadores.get(cuenta.lower())
+            if trabajador is not None and trabajador.is_alive():
+                return trabajador
+            trabajador = TrabajadorEnvios(
+                cuenta,
+                al_terminar=al_terminar,
+                planificador=self.planificador,
+                politica_reintentos=self.politica_reintentos,
+            )
+            self.trabajadores[cuenta.lower()] = trabajador
+        trabajador.start()
+        logger.info(f"Envío iniciado para {cuenta}")
+        return trabajador
+
+    def iniciar_varias(self, cuentas, al_terminar=None) -> list:
+        return [self.iniciar(cuenta, al_terminar) for cuenta in cuentas]
+
+    def detener(self, cuenta: str = None):
+        """
+        Detiene el envío de la cuenta indicada, o el de todas si no se indica ninguna.
+        """
+        with self._lock:
+            trabajadores = list(self.trabajadores.values()) if cuenta is None else \
+                [t for t in (self.trabajadores.get(cuenta.lower()),) if t is not None]
+        for trabajador in trabajadores:
+            trabajador.control.cancelar()
+            logger.info(f"Envío detenido para {trabajador.cuenta}")
+
+    def en_marcha(self) -> list:
+        """
+        Cuentas con un envío en curso.
+        """
+        with self._lock:
+            return [t.cuenta for t in self.trabajadores.values() if t.is_alive()]
+
+    def esperar(self, timeout: float = None) -> dict:
+        """
+        Espera a que terminen todos los envíos.
+        Returns: dict: Cuenta -> cantidad de borradores enviados.
+        """
+        with self._lock:
+            trabajadores = list(self.trabajadores.values())
+        for trabajador in trabajadores:
+            trabajador.join(timeout)
+        return {t.cuenta: t.enviados for t in trabajadores}
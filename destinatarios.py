@@ -0,0 +1,102 @@
+import threading
+import time
+from logger_utils import configurar_logger
+from backend_correo import BorradorNoEncontrado
+
+logger = configurar_logger("destinatarios")
+
+
+class CacheResolucion:
+    """
+    Resultado de resolver cada destinatario (dirección o lista de distribución): resuelto o no resuelto.
+    Cada entrada vence a los `ttl` segundos, para que un cambio en la libreta de direcciones se note en envíos largos.
+    Los no resueltos vencen a los `ttl_negativo` segundos: suelen ser fallos pasajeros (libreta sin sincronizar,
+    sin conexión con Exchange) y deben volver a consultarse antes del primer reintento de la cuarentena.
+    """
+
+    def __init__(self, ttl: float = 3600.0, ttl_negativo: float = 60.0):
+        self.ttl = ttl
+        self.ttl_negativo = ttl_negativo
+        self._entradas = {}  # destinatario (minúsculas) -> (resuelto, vencimiento)
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def consultar(self, destinatario: str):
+        """
+        Returns: bool | None: True/False si hay un resultado vigente; None si hay que resolverlo.
+        """
+        clave = destinatario.strip().lower()
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada[1] > time.monotonic():
+                self.aciertos += 1
+                return entrada[0]
+            self.fallos += 1
+            return None
+
+    def guardar(self, destinatario: str, resuelto: bool):
+        with self._lock:
+            vigencia = self.ttl if resuelto else self.ttl_negativo
+            self._entradas[destinatario.strip().lower()] = (bool(resuelto), time.monotonic() + vigencia)
+
+
+class ResolutorDestinatarios:
+    """
+    Resuelve los destinatarios de los borradores de una cuenta durante un envío, con caché por destinatario.
+    adelantar() resuelve los próximos borradores de la cola mientras el planificador espera el siguiente turno,
+    de modo que al llegar el turno el borrador ya está resuelto y el envío no espera a la libreta de direcciones.
+    Debe usarse desde el hilo que abrió el backend.
+    Args:
+        backend (BackendCorreo): Backend abierto.
+        cuenta (str): Cuenta SMTP.
+        cache (CacheResolucion): Caché a usar (por defecto, una nueva con TTL de una hora).
+    """
+
+    def __init__(self, backend, cuenta: str, cache: CacheResolucion = None):
+        self.backend = backend
+        self.cuenta = cuenta
+        self.cache = cache or CacheResolucion()
+        self._resultados = {}  # id del borrador -> destinatarios no resueltos
+        self._duracion_media = 0.0
+
+    def _resolver(self, id_borrador: str, usar_cache: bool = True) -> list:
+        inicio = time.monotonic()
+        cache = self.cache if usar_cache else None
+        sin_resolver = self.backend.resolver_destinatarios(self.cuenta, id_borrador, cache=cache)
+        duracion = time.monotonic() - inicio
+        self._duracion_media = duracion if not self._duracion_media else 0.8 * self._duracion_media + 0.2 * duracion
+        return sin_resolver
+
+    def resolver(self, id_borrador: str, reintento: bool = False) -> list:
+        """
+        Destinatarios no resueltos del borrador, usando el resultado adelantado si lo hay.
+        Con reintento=True (borrador que vuelve de la cuarentena) se consulta de nuevo la libreta de direcciones,
+        sin caché ni resultado adelantado.
+        """
+        if reintento:
+            self._resultados.pop(id_borrador, None)
+            return self._resolver(id_borrador, usar_cache=False)
+        if id_borrador in self._resultados:
+            return self._resultados.pop(id_borrador)
+        return self._resolver(id_borrador)
+
+    def adelantar(self, borradores, segundos: float):
+        """
+        Resuelve por adelantado los borradores indicados (en orden) sin pasarse del tiempo disponible.
+        Args: borradores (iterable): Próximos borradores de la cola. segundos (float): Tiempo hasta el próximo turno.
+        """
+        limite = time.monotonic() + segundos
+        for borrador in borradores:
+            if borrador.id in self._resultados:
+                continue
+            if time.monotonic() + self._duracion_media >= limite:
+                break
+            try:
+                self._resultados[borrador.id] = self._resolver(borrador.id)
+            except BorradorNoEncontrado:
+                continue  # Se informará al llegar su turno
+            except Exception:
+                logger.debug(f"No se pudo resolver por adelantado el borrador para {borrador.destinatario}",
+                             exc_info=True)
+                break
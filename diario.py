@@ -0,0 +1,109 @@
+import hashlib
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+from logger_utils import configurar_logger
+from rutas import directorio_datos
+
+logger = configurar_logger("diario")
+
+
+def huella_archivo(ruta: str) -> str:
+    """
+    SHA-256 del contenido del archivo, leído por bloques.
+    """
+    sha = hashlib.sha256()
+    with open(ruta, "rb") as archivo:
+        for bloque in iter(lambda: archivo.read(1024 * 1024), b""):
+            sha.update(bloque)
+    return sha.hexdigest()
+
+
+class DiarioEjecucion:
+    """
+    Diario de filas que ya se convirtieron en borrador, guardado en SQLite e identificado por
+    la huella del Excel, la de la plantilla y la cuenta. Permite reanudar un lote interrumpido sin duplicar
+    borradores; la misma lista con otra plantilla es otro lote.
+    Las escrituras se acumulan y se confirman por bloques (cada `lote` filas o cada `intervalo` segundos).
+    Args:
+        ruta_excel (str): Excel del lote.
+        cuenta (str): Cuenta de Outlook del lote.
+        huella_plantilla (str): Huella de la plantilla del lote (PlantillaCompilada.huella).
+        ruta_db (str): Base de datos SQLite (por defecto, diario.sqlite3 en la carpeta de datos del usuario).
+    """
+
+    def __init__(self, ruta_excel: str, cuenta: str, huella_plantilla: str, ruta_db: str = None, lote: int = 50,
+                 intervalo: float = 2.0):
+        self.huella = huella_archivo(ruta_excel)
+        self.huella_plantilla = huella_plantilla
+        self.cuenta = cuenta.lower()
+        self.lote = lote
+        self.intervalo = intervalo
+        self._pendientes = []
+        self._ultima_confirmacion = time.monotonic()
+
+        self._conexion = sqlite3.connect(ruta_db or os.path.join(directorio_datos(), "diario.sqlite3"))
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute("PRAGMA synchronous=NORMAL")
+        columnas = {c[1] for c in self._conexion.execute("PRAGMA table_info(filas_completadas)")}
+        if columnas and "huella_plantilla" not in columnas:
+            # Diario de una versión anterior, sin la plantilla en la clave: no sirve para reanudar
+            logger.info("Se reinicia el diario de lotes para incluir la plantilla en la clave.")
+            self._conexion.execute("DROP TABLE filas_completadas")
+        self._conexion.execute(
+            """CREATE TABLE IF NOT EXISTS filas_completadas (
+                   huella_hoja TEXT NOT NULL,
+                   huella_plantilla TEXT NOT NULL,
+                   cuenta TEXT NOT NULL,
+                   fila INTEGER NOT NULL,
+                   id_borrador TEXT,
+                   creado TEXT NOT NULL,
+                   PRIMARY KEY (huella_hoja, huella_plantilla, cuenta, fila)
+               )"""
+        )
+        self._conexion.commit()
+
+    def completadas(self) -> set:
+        """
+        Filas de esta hoja, plantilla y cuenta que ya tienen borrador.
+        """
+        cursor = self._conexion.execute(
+            "SELECT fila FROM filas_completadas WHERE huella_hoja = ? AND huella_plantilla = ? AND cuenta = ?",
+            (self.huella, self.huella_plantilla, self.cuenta),
+        )
+        return {fila for (fila,) in cursor}
+
+    def marcar(self, fila: int, id_borrador: str = None):
+        """
+        Registra que la fila ya tiene borrador. Se escribe en disco en el próximo bloque.
+        """
+        self._pendientes.append((self.huella, self.huella_plantilla, self.cuenta, fila, id_borrador,
+                                 datetime.now().isoformat(timespec="seconds")))
+        if len(self._pendientes) >= self.lote or time.monotonic() - self._ultima_confirmacion >= self.intervalo:
+            self.confirmar()
+
+    def confirmar(self):
+        if self._pendientes:
+            self._conexion.executemany("INSERT OR REPLACE INTO filas_completadas VALUES (?, ?, ?, ?, ?, ?)", self._pendientes)
+            self._conexion.commit()
+            self._pendientes.clear()
+        self._ultima_confirmacion = time.monotonic()
+
+    def reiniciar(self):
+        """
+        Olvida las filas registradas para esta hoja, plantilla y cuenta (para generar el lote desde cero).
+        """
+        self._pendientes.clear()
+        self._conexion.execute(
+            "DELETE FROM filas_completadas WHERE huella_hoja = ? AND huella_plantilla = ? AND cuenta = ?",
+            (self.huella, self.huella_plantilla, self.cuenta),
+        )
+        self._conexion.commit()
+
+    def cerrar(self):
+        if self._conexion is not None:
+            self.confirmar()
+            self._conexion.close()
+            self._conexion = None
@@ -1,7 +1,6 @@
 from tkinter import messagebox
 import os
-from borradores import generar_borradores
-from envios import enviar_borradores
+from trabajadores import TrabajadorBorradores, TrabajadorValidacion
 from logger_utils import configurar_logger
 
 logger = configurar_logger("ejecutores")
@@ -31,36 +30,57 @@ def validar_datos(perfil: str, requiere_archivos: bool = True, ruta_excel: str =
 
     return True
 
-def ejecutar_script(nombre_script_txt: str, perfil: str, ruta_excel: str = None, ruta_docx: str = None, callback_progreso=None):
-    solo_envio = "envios" in nombre_script_txt.lower() or "envios" in nombre_script_txt.lower()
+def iniciar_creacion_borradores(perfil: str, ruta_excel: str, ruta_docx: str, callback_progreso=None,
+                                al_terminar=None, incluir_firma: bool = True, reanudar: bool = True):
+    """
+    Comprueba los datos y valida el Excel en segundo plano. Al terminar la validación se publica
+    "fin_validacion" en bus_eventos; su manejador (en el hilo de Tk) llama a continuar_creacion_borradores.
+    Returns: TrabajadorValidacion: Validación en marcha, o None si los datos no son válidos.
+    """
+    if not validar_datos(perfil, requiere_archivos=True, ruta_excel=ruta_excel, ruta_docx=ruta_docx):
+        return None
 
-    if not validar_datos(perfil, requiere_archivos=not solo_envio, ruta_excel=ruta_excel, ruta_docx=ruta_docx):
-        return
+    validacion = TrabajadorValidacion(ruta_excel, parametros={
+        "perfil": perfil,
+        "ruta_excel": ruta_excel,
+        "ruta_docx": ruta_docx,
+        "callback_progreso": callback_progreso,
+        "al_terminar": al_terminar,
+        "incluir_firma": incluir_firma,
+        "reanudar": reanudar,
+    })
+    validacion.start()
+    return validacion
 
-    try:
-        if "crear_borradores" in nombre_script_txt.lower():
-            cantidad = generar_borradores(
-                cuenta=perfil,
-                perfil=perfil,
-                ruta_excel=ruta_excel,
-                ruta_docx=ruta_docx,
-                callback_progreso=callback_progreso
-            )
-            logger.info(f"{cantidad} borradores creados correctamente.")
-            return
+def continuar_creacion_borradores(reporte, error, parametros: dict):
+    """
+    Manejador de "fin_validacion" (en el hilo de Tk): informa un fallo de la validación o, si hay filas con
+    errores, pide confirmación; luego lanza la creación de borradores en segundo plano.
+    Args: reporte, error: Resultado de TrabajadorValidacion. parametros (dict): Los de iniciar_creacion_borradores.
+    Returns: TrabajadorBorradores: Trabajador en marcha (con su control de pausa/cancelación), o None si no se inició.
+    """
+    if error is not None:
+        messagebox.showerror("Error", f"No se pudo validar el Excel:\n{error}")
+        return None
 
-        if solo_envio:
-            cantidad = enviar_borradores(perfil)
-            messagebox.showinfo("Éxito", f"Se enviaron {cantidad} borradores correctamente.")
-            logger.info(f"{cantidad} borradores enviados correctamente.")
-            return
+    perfil = parametros["perfil"]
+    if not reporte.valido and not messagebox.askyesno(
+        "Filas con errores",
+        f"{reporte.resumen()}\n\n¿Crear los borradores omitiendo estas filas?"
+    ):
+        logger.info("Creación de borradores cancelada por errores de validación.")
+        return None
 
-        messagebox.showerror("Error", f"No se reconoce el script: {nombre_script_txt}")
-        logger.error(f"Script no reconocido: {nombre_script_txt}")
-
-    except Exception as e:
-        logger.exception(f"Fallo al ejecutar {nombre_script_txt}")
-        messagebox.showerror("Error", f"No se pudo ejecutar {nombre_script_txt}:\n{e}")
-
-def ejecutar_envios(perfil: str):
-    ejecutar_script("envios", perfil)
\ No newline at end of file
+    trabajador = TrabajadorBorradores(
+        al_terminar=parametros.get("al_terminar"),
+        cuenta=perfil,
+        perfil=perfil,
+        ruta_excel=parametros["ruta_excel"],
+        ruta_docx=parametros["ruta_docx"],
+        callback_progreso=parametros.get("callback_progreso"),
+        incluir_firma=parametros.get("incluir_firma", True),
+        reporte_validacion=reporte,
+        reanudar=parametros.get("reanudar", True)
+    )
+    trabajador.start()
+    return trabajador
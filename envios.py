@@ -1,226 +1,184 @@
-import win32com.client
-import pythoncom
 import time
-import tkinter as tk
-from tkinter import ttk, messagebox
-import threading
-import sys
-import os
+from datetime import datetime
 
 from logger_utils import configurar_logger
-logger = configurar_logger("envios")
+from backend_correo import crear_backend, BorradorNoEncontrado, NOMBRE_CUARENTENA
+from cola_envio import ColaEnvio
+from eventos import bus_eventos
+from reporte_errores import ReporteErrores
+from indice_borradores import notificar_enviado
+from planificador import crear_planificador
+from trabajadores import ControlEjecucion
+from destinatarios import ResolutorDestinatarios
+from metricas import MetricasEjecucion, cerrar_metricas, medir
+from auditoria import RegistroAuditoria, buscar_creaciones
 
-cuenta_seleccionada = ""
-enviar_event = threading.Event()
-
-def obtener_carpeta_borradores(namespace, cuenta_smtp):
-    def buscar_recursivo(folder):
-        for subfolder in folder.Folders:
-            if subfolder.Name in ["Borradores", "Drafts"]:
-                return subfolder
-            resultado = buscar_recursivo(subfolder)
-            if resultado:
-                return resultado
-        return None
-
-    for account in namespace.Accounts:
-        if account.SmtpAddress.lower() == cuenta_smtp.lower():
-            try:
-                root_folder = account.DeliveryStore.GetRootFolder()
-                carpeta = buscar_recursivo(root_folder)
-                if carpeta:
-                    return carpeta
-                raise LookupError(f"No se encontró la carpeta 'Borradores' en la cuenta {cuenta_smtp}")
-            except Exception as e:
-                logger.exception(f"No se pudo acceder a la carpeta raíz de la cuenta {cuenta_smtp}")
-                raise RuntimeError(f"No se pudo acceder a la carpeta raíz de la cuenta {cuenta_smtp}: {e}")
-    raise RuntimeError(f"No se encontró la cuenta en Outlook: {cuenta_smtp}")
+logger = configurar_logger("envios")
 
-def contar_borradores(cuenta):
-    pythoncom.CoInitialize()
-    try:
-        outlook = win32com.client.Dispatch("Outlook.Application")
-        namespace = outlook.GetNamespace("MAPI")
-        drafts_folder = obtener_carpeta_borradores(namespace, cuenta)
-        if drafts_folder:
-            return drafts_folder.Items.Count
-        else:
-            messagebox.showerror("Error", "No se encontró la carpeta de borradores.")
-            return 0
-    except Exception as e:
-        logger.exception("Error al contar borradores")
-        messagebox.showerror("Error al contar borradores", str(e))
-        return 0
-    finally:
-        pythoncom.CoUninitialize()
-
-def validar_intervalo():
-    intervalo_str = combo_intervalo.get()
-    if intervalo_str == "Seleccione intervalo." or not intervalo_str.isdigit():
-        start_button.config(state="disabled")
-    else:
-        start_button.config(state="normal")
-
-def actualizar_contador(event=None):
-    intervalo_str = combo_intervalo.get()
-    if intervalo_str == "Seleccione intervalo." or not intervalo_str.isdigit():
-        intervalo = 15
-    else:
-        intervalo = int(intervalo_str)
-
-    combo_intervalo.set(str(intervalo))
-    validar_intervalo()
-
-    total_borradores = contar_borradores(cuenta_seleccionada)
-    status_label.config(text=f"Borradores restantes: {total_borradores} | Enviados: 0")
-
-    if total_borradores > 0:
-        tiempo_total = intervalo * total_borradores
-        horas, resto = divmod(tiempo_total, 3600)
-        minutos, segundos = divmod(resto, 60)
-        estimado_label.config(text=f"Tiempo total estimado: {horas:02}:{minutos:02}:{segundos:02}")
-    else:
-        estimado_label.config(text="Tiempo restante: 00:00:00")
-
-def iniciar_temporizador_dinamico(tiempo_total):
-    def actualizar_reloj():
-        nonlocal tiempo_total
-        global after_id
-
-        try:
-            if tiempo_total <= 0 or not enviar_event.is_set():
-                if estimado_label.winfo_exists():
-                    estimado_label.config(text="Tiempo restante: 00:00:00")
-                return
-
-            horas, resto = divmod(tiempo_total, 3600)
-            minutos, segundos = divmod(resto, 60)
-
-            if estimado_label.winfo_exists():
-                estimado_label.config(text=f"Tiempo restante: {horas:02}:{minutos:02}:{segundos:02}")
-
-            tiempo_total -= 1
-
-            if root.winfo_exists():
-                after_id = root.after(1000, actualizar_reloj)
-
-        except tk.TclError:
-            logger.warning("after() cancelado tras cierre de ventana")
-
-    actualizar_reloj()
-
-def enviar_borradores(cuenta, status_label):
-    enviar_event.set()
-    intervalo = int(combo_intervalo.get())
-    pythoncom.CoInitialize()
-    try:
-        outlook = win32com.client.Dispatch("Outlook.Application")
-        namespace = outlook.GetNamespace("MAPI")
-        drafts_folder = obtener_carpeta_borradores(namespace, cuenta)
+ADELANTO_RESOLUCION = 10  # Borradores de la cola que se resuelven por adelantado mientras se espera turno
 
-        if not drafts_folder:
-            logger.error("No se encontró la carpeta de borradores.")
-            messagebox.showerror("Error", "No se encontró la carpeta de borradores.")
-            return
 
-        total_borradores = drafts_folder.Items.Count
-        enviados = 0
+def contar_borradores(cuenta, backend=None):
+    """
+    Cantidad de borradores de la cuenta.
+    """
+    if backend is not None:
+        return backend.contar_borradores(cuenta)
+    with crear_backend() as backend:
+        return backend.contar_borradores(cuenta)
 
-        time.sleep(intervalo)
 
-        while enviados < total_borradores and enviar_event.is_set():
-            item = drafts_folder.Items.GetFirst()
-            if not item:
+def poner_en_cuarentena(backend, cuenta, cola, elemento):
+    """
+    Mueve a cuarentena un borrador que falló y lo reprograma según la política de reintentos de la cola.
+    """
+    try:
+        id_cuarentena = backend.mover_a_cuarentena(cuenta, elemento.borrador.id)
+    except BorradorNoEncontrado:
+        return  # Ya estaba en cuarentena (falló al restaurarlo) o el usuario lo quitó
+    except Exception:
+        logger.exception(f"No se pudo mover a cuarentena el borrador para {elemento.borrador.destinatario}")
+        return
+    if not cola.fallo(elemento, id_cuarentena):
+        logger.warning(f"El borrador para {elemento.borrador.destinatario} agotó sus reintentos; queda en "
+                       f"'{NOMBRE_CUARENTENA}'.")
+
+
+def _datos_de_creacion(cuenta, borradores) -> dict:
+    """
+    Fila, plantilla y momento de creación de cada borrador (por su clave) según la auditoría de la creación,
+    para completar los registros de envío. No interrumpe el envío si falla.
+    """
+    try:
+        with medir("auditoria.buscar_creaciones"):
+            return buscar_creaciones((b.clave for b in borradores), cuenta)
+    except Exception:
+        logger.warning("No se pudieron leer los registros de creación de la auditoría", exc_info=True)
+        return {}
+
+
+def enviar_borradores(cuenta, intervalo: int = 60, backend=None, reporte_errores=None, planificador=None,
+                      politica_reintentos=None, control=None):
+    """
+    Envía los borradores de la cuenta al ritmo máximo que permiten sus límites (ver planificador.py).
+    Si no se indica planificador, se usan los límites configurados más el intervalo mínimo indicado.
+    Los borradores que fallan se mueven a la carpeta de cuarentena y se reintentan según politica_reintentos.
+    Un borrador que falla se registra en reporte_errores y el envío continúa; el reporte se guarda al final.
+    El avance se publica en bus_eventos ("progreso_envio" y "fin_envio"); no toca widgets.
+    Args: control (ControlEjecucion): Permite detener el envío desde otro hilo (opcional).
+    La duración de cada etapa y los contadores del envío se guardan al final en la carpeta "metricas", y cada
+    intento de envío deja un registro en la carpeta "auditoria" (ver auditoria.py).
+    Returns: int: Cantidad de borradores enviados.
+    """
+    metricas = MetricasEjecucion("envios", cuenta)
+    auditoria = RegistroAuditoria("envios", cuenta, metricas.id_ejecucion)
+    try:
+        with metricas.activar():
+            return _enviar_borradores(cuenta, intervalo, backend, reporte_errores, planificador,
+                                      politica_reintentos, control, metricas, auditoria)
+    finally:
+        auditoria.cerrar()
+        cerrar_metricas(metricas)
+
+
+def _enviar_borradores(cuenta, intervalo, backend, reporte_errores, planificador, politica_reintentos, control,
+                       metricas, auditoria) -> int:
+    if reporte_errores is None:
+        reporte_errores = ReporteErrores("envios", cuenta)
+    if planificador is None:
+        planificador = crear_planificador(intervalo)
+    if control is None:
+        control = ControlEjecucion()
+    backend_propio = backend is None
+    enviados = 0
+    try:
+        with metricas.medir("backend.abrir"):
+            if backend_propio:
+                backend = crear_backend().abrir()
+
+        # Cola tomada al inicio y recorrida en orden, sin volver a leer la carpeta: un borrador que falla
+        # va a cuarentena y no bloquea a los siguientes; los que se crean durante el envío se agregan al final
+        with metricas.medir("backend.listar_borradores"):
+            borradores = backend.listar_borradores(cuenta)
+        cola = ColaEnvio(borradores, politica_reintentos)
+        backend.observar_borradores(cuenta, cola.agregar)
+        total_borradores = len(cola)
+        creaciones = _datos_de_creacion(cuenta, borradores)
+
+        resolutor = ResolutorDestinatarios(backend, cuenta)
+
+        def activo():
+            backend.procesar_eventos()
+            return not control.cancelado
+
+        def al_esperar(segundos):
+            # Mientras llega el turno, se resuelven los destinatarios de los próximos borradores
+            with metricas.medir("resolver_por_adelantado"):
+                resolutor.adelantar(cola.proximos(ADELANTO_RESOLUCION), segundos)
+
+        while activo():
+            elemento = cola.siguiente()
+            if elemento is None:
+                espera = cola.espera_reintento()
+                if espera is None:
+                    break
+                time.sleep(min(espera, 0.5))  # Solo quedan reintentos pendientes
+                continue
+            with metricas.medir("esperar_turno"):
+                turno = planificador.esperar_turno(cuenta, activo=activo, al_esperar=al_esperar)
+            if not turno:
                 break
 
+            borrador = elemento.borrador
+            datos_auditoria = {"destinatario": borrador.destinatario, "clave": borrador.clave,
+                               "intento": elemento.intentos + 1, **creaciones.get(borrador.clave, {})}
+            inicio_envio = time.perf_counter()
+            etapa = "restaurar_de_cuarentena" if elemento.en_cuarentena else "resolver_destinatarios"
             try:
-                sin_resolver = [r.Name for r in item.Recipients if not r.Resolve()]
+                if elemento.en_cuarentena:
+                    with metricas.medir("backend.restaurar_de_cuarentena"):
+                        cola.reubicar(elemento, backend.restaurar_de_cuarentena(cuenta, borrador.id))
+                    etapa = "resolver_destinatarios"
+                with metricas.medir("backend.resolver_destinatarios"):
+                    sin_resolver = resolutor.resolver(borrador.id, reintento=elemento.intentos > 0)
                 if sin_resolver:
-                    raise Exception(f"Destinatarios no resueltos: {', '.join(sin_resolver)}")
-                item.Send()
+                    raise LookupError(f"Destinatarios no resueltos: {', '.join(sin_resolver)}")
+                etapa = "enviar"
+                with metricas.medir("backend.enviar"):
+                    backend.enviar(cuenta, borrador.id)
+                notificar_enviado(cuenta, borrador.id)
                 enviados += 1
+                metricas.contar("enviados")
+                auditoria.registrar("enviado", id_borrador=borrador.id,
+                                    enviado=datetime.now().isoformat(timespec="milliseconds"),
+                                    latencia_s=round(time.perf_counter() - inicio_envio, 4), **datos_auditoria)
+            except BorradorNoEncontrado:
+                metricas.contar("omitidos")
+                auditoria.registrar("omitido", id_borrador=borrador.id, **datos_auditoria)
+                logger.info(f"El borrador para {borrador.destinatario} ya no está en Borradores; se omite.")
             except Exception as e:
-                logger.error(f"Error en el borrador #{enviados + 1}: {e}")
-                messagebox.showerror("Error en borrador", f"Error en el borrador #{enviados + 1}: {e}")
-
-            restantes = total_borradores - enviados
-            status_label.config(text=f"Borradores restantes: {restantes} | Enviados: {enviados}")
-            time.sleep(intervalo)
-
-        logger.info(f"Se enviaron {enviados} de {total_borradores} borradores.")
+                metricas.contar("errores")
+                auditoria.registrar("error", id_borrador=borrador.id, etapa=etapa, error=str(e),
+                                    latencia_s=round(time.perf_counter() - inicio_envio, 4), **datos_auditoria)
+                logger.error(f"Error al enviar el borrador para {borrador.destinatario}: {e}")
+                reporte_errores.registrar(etapa, e, destinatario=borrador.destinatario)
+                with metricas.medir("backend.mover_a_cuarentena"):
+                    poner_en_cuarentena(backend, cuenta, cola, elemento)
+
+            bus_eventos.publicar("progreso_envio", cuenta=cuenta, restantes=len(cola), enviados=enviados)
+
+        logger.info(f"Se enviaron {enviados} de {total_borradores} borradores. Caché de destinatarios: "
+                    f"{resolutor.cache.aciertos} aciertos, {resolutor.cache.fallos} consultas.")
     except Exception as e:
         logger.exception("Error general durante el envío de borradores")
-        messagebox.showerror("Error general", f"{e}")
+        reporte_errores.registrar("general", e)
     finally:
-        status_label.config(text="Proceso finalizado")
-        estimado_label.config(text="Tiempo restante: 00:00:00")
-        enviar_event.clear()
-        pythoncom.CoUninitialize()
-
-def iniciar_envio():
-    total_borradores = contar_borradores(cuenta_seleccionada)
-    intervalo = int(combo_intervalo.get())
-    if total_borradores > 0:
-        enviar_event.set()
-        tiempo_total = intervalo * total_borradores
-        threading.Thread(target=lambda: iniciar_temporizador_dinamico(tiempo_total), daemon=True).start()
-        threading.Thread(target=enviar_borradores, args=(cuenta_seleccionada, status_label), daemon=True).start()
-
-def detener_envio():
-    global after_id
-    enviar_event.clear()
-
-    if root.winfo_exists() and after_id:
-        try:
-            root.after_cancel(after_id)
-        except Exception:
-            pass
-
-    status_label.config(text="Envío detenido")
-    estimado_label.config(text="Tiempo restante: --")
-    logger.info("Envío detenido manualmente.")
-
-# Función principal para ser llamada desde gui.py
-def lanzar_envio_desde_gui(cuenta):
-    global root, combo_intervalo, start_button, status_label, estimado_label, cuenta_seleccionada
-    cuenta_seleccionada = cuenta
-
-    root = tk.Tk()
-    root.title("Enviar Borradores Outlook")
-    root.geometry("400x280")
-
-    try:
-        base_path = getattr(sys, '_MEIPASS', os.path.abspath("."))
-        icon_path = os.path.join(base_path, "config", "icono.ico")
-        root.iconbitmap(icon_path)
-    except Exception as e:
-        logger.warning(f"No se pudo cargar el ícono: {e}")
-
-    tk.Label(root, text=f"Correo seleccionado: {cuenta}", font=("Arial", 12), fg="green").pack(pady=5)
-
-    tk.Label(root, text="Intervalo de envío (segundos):", font=("Arial", 12)).pack(pady=5)
-    combo_intervalo = ttk.Combobox(root, values=["Seleccione intervalo.", "60", "120", "180"], state="readonly",
-                                   font=("Arial", 10), width=20)
-    combo_intervalo.bind("<<ComboboxSelected>>", actualizar_contador)
-    combo_intervalo.pack(pady=5)
-    combo_intervalo.current(0)
-
-    start_button = tk.Button(root, text="Iniciar Envío", command=iniciar_envio, font=("Arial", 12), bg="lightgreen",
-                             state="disabled")
-    start_button.pack(pady=5)
-
-    tk.Button(root, text="Detener Envío", command=detener_envio, font=("Arial", 10), bg="red").pack(pady=5)
-
-    status_label = tk.Label(root, text="", font=("Arial", 14))
-    status_label.pack(pady=5)
-
-    estimado_label = tk.Label(root, text="Tiempo restante: --", font=("Arial", 12), fg="blue")
-    estimado_label.pack(pady=5)
-
-    validar_intervalo()
-    root.mainloop()
-
-# Soporte para ejecución directa en desarrollo
-if __name__ == "__main__":
-    cuenta = sys.argv[1] if len(sys.argv) > 1 else ""
-    lanzar_envio_desde_gui(cuenta)
\ No newline at end of file
+        if backend_propio and backend is not None:
+            backend.cerrar()
+        if len(reporte_errores):
+            try:
+                reporte_errores.guardar()
+            except Exception:
+                logger.exception("No se pudo guardar el reporte de errores")
+        bus_eventos.publicar("fin_envio", cuenta=cuenta, enviados=enviados, reporte=reporte_errores)
+    return enviados
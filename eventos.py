@@ -0,0 +1,102 @@
+import queue
+import sys
+import threading
+from logger_utils import configurar_logger
+
+logger = configurar_logger("eventos")
+
+
+class BusEventos:
+    """
+    Cola de eventos entre los hilos de trabajo y la interfaz.
+    Cualquier hilo puede publicar; solo el hilo de Tk despacha, drenando la cola con un temporizador.
+    Los eventos cuyo tipo empieza por "progreso" se fusionan: de cada ráfaga solo se entrega el último
+    por tipo y cuenta, de modo que la interfaz se actualiza como máximo max_por_segundo veces por segundo.
+    """
+
+    def __init__(self, max_por_segundo: int = 10):
+        self.max_por_segundo = max_por_segundo
+        self._cola = queue.SimpleQueue()
+        self._manejadores = {}  # tipo -> lista de funciones(**datos)
+        self._lock = threading.Lock()
+        self._root = None
+
+    def publicar(self, tipo: str, **datos):
+        """
+        Publica un evento desde cualquier hilo. Si nadie está suscrito al tipo, el evento se descarta.
+        """
+        if tipo in self._manejadores:
+            self._cola.put((tipo, datos))
+
+    def suscribir(self, tipo: str, manejador):
+        with self._lock:
+            self._manejadores.setdefault(tipo, []).append(manejador)
+
+    def desuscribir(self, tipo: str, manejador):
+        with self._lock:
+            manejadores = self._manejadores.get(tipo, [])
+            if manejador in manejadores:
+                manejadores.remove(manejador)
+            if not manejadores:
+                self._manejadores.pop(tipo, None)
+
+    def conectar(self, root):
+        """
+        Empieza a drenar la cola desde el bucle de Tk de root. Si ya hay una ventana conectada, no hace nada.
+        """
+        if self._root is not None:
+            return
+        self._root = root
+        self._programar()
+
+    def _programar(self):
+        from tkinter import TclError  # Solo la interfaz drena la cola; publicar no requiere tkinter
+        try:
+            self._root.after(max(1, 1000 // self.max_por_segundo), self._drenar)
+        except TclError:
+            self._root = None  # La ventana se cerró
+
+    def _drenar(self):
+        self.despachar_pendientes()
+        self._programar()
+
+    def despachar_pendientes(self):
+        """
+        Entrega los eventos acumulados (en el hilo de Tk), fusionando los de progreso.
+        Sin interfaz (p. ej. desde cli.py) puede llamarse periódicamente desde el hilo principal.
+        """
+        # Una ventana ya cerrada lanza TclError; sin tkinter cargado no hay ventanas que cerrar
+        tkinter = sys.modules.get("tkinter")
+        errores_ventana = (tkinter.TclError,) if tkinter is not None else ()
+
+        pendientes = []
+        ultimo_progreso = {}  # (tipo, cuenta) -> posición en pendientes
+        while True:
+            try:
+                tipo, datos = self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if tipo.startswith("progreso"):
+                clave = (tipo, datos.get("cuenta"))
+                if clave in ultimo_progreso:
+                    pendientes[ultimo_progreso[clave]] = None
+                ultimo_progreso[clave] = len(pendientes)
+            pendientes.append((tipo, datos))
+
+        for evento in pendientes:
+            if evento is None:
+                continue
+            tipo, datos = evento
+            with self._lock:
+                manejadores = list(self._manejadores.get(tipo, ()))
+            for manejador in manejadores:
+                try:
+                    manejador(**datos)
+                except errores_ventana:
+                    logger.debug(f"Evento {tipo} para una ventana ya cerrada")
+                except Exception:
+                    logger.exception(f"Error al procesar el evento {tipo}")
+
+
+# Bus único de la aplicación
+bus_eventos = BusEventos()
@@ -1,25 +1,24 @@
 import os
 import sys
-import time
 import subprocess
-import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
-from PIL import Image, ImageTk
-import psutil
+# PIL se importa después de mostrar la ventana (ver cargar_portada)
 
 from logger_utils import configurar_logger
-from outlook_utils import obtener_cuentas_activas
-from ejecutores import ejecutar_script
+from outlook_utils import descubrir_cuentas_en_segundo_plano, leer_cuentas_guardadas
+from ejecutores import iniciar_creacion_borradores, continuar_creacion_borradores
 from archivos import cargar_excel, cargar_docx
 from actualizacion import verificar_actualizacion
 from progreso_utils import callback_progreso_gui
-from envios import lanzar_envio_desde_gui
+from eventos import bus_eventos
+from monitor_outlook import MonitorOutlook, PERIODO_POR_DEFECTO
+from ventana_envios import lanzar_envio_desde_gui
 
 logger = configurar_logger("gui")
 
 class DraftSenderApp:
-    def __init__(self, root: tk.Tk):
+    def __init__(self, root: tk.Tk, periodo_monitor: float = PERIODO_POR_DEFECTO):
         self.root = root
         self.root.title("DraftSender - Automatización de Borradores y Envíos")
         self.root.geometry("480x450")
@@ -32,6 +31,8 @@ class DraftSenderApp:
         self.label_cuenta_var = tk.StringVar()
         self.porcentaje_var = tk.StringVar(value="0%")
         self.status_var = tk.StringVar()
+        self.incluir_firma_var = tk.BooleanVar(value=True)
+        self.reanudar_var = tk.BooleanVar(value=True)
         self.cuenta_seleccionada = None
 
         self.combo_cuentas = None
@@ -39,13 +40,25 @@ class DraftSenderApp:
         self.barra_progreso = None
         self.status_label = None
         self.boton_crear_borradores = None
+        self.boton_pausar = None
+        self.boton_cancelar = None
+        self.trabajador_borradores = None
+        self.validacion_en_curso = None
         self.boton_cargar_excel = None
         self.boton_cargar_docx = None
 
         self.construir_gui()
 
-        # Inicia monitoreo de Outlook
-        self.monitor_outlook = threading.Thread(target=self.verificar_outlook_activo, daemon=True)
+        # Los hilos de trabajo informan por el bus; Tk lo drena con un temporizador
+        bus_eventos.suscribir("progreso_borradores", self.mostrar_progreso)
+        bus_eventos.suscribir("fin_borradores", self.finalizar_creacion)
+        bus_eventos.suscribir("fin_validacion", self.finalizar_validacion)
+        bus_eventos.suscribir("estado_outlook", self.actualizar_estado_outlook)
+        bus_eventos.suscribir("cuentas_outlook", self.mostrar_cuentas)
+        bus_eventos.conectar(self.root)
+
+        # Inicia monitoreo de Outlook: avisa por el bus solo cuando se abre o se cierra
+        self.monitor_outlook = MonitorOutlook(periodo=periodo_monitor)
         self.monitor_outlook.start()
 
     def construir_gui(self):
@@ -70,22 +83,32 @@ class DraftSenderApp:
         self.root.config(menu=menu_bar)
 
     def crear_encabezado(self):
+        # Se reserva el espacio de la portada y la imagen se carga cuando la ventana ya está dibujada
+        frame_portada = tk.Frame(self.root, width=480, height=85)
+        frame_portada.pack_propagate(False)
+        frame_portada.pack(pady=10)
+        self.root.after_idle(lambda: self.root.after(0, self.cargar_portada, frame_portada))
+
+    def cargar_portada(self, frame_portada):
         try:
+            from PIL import Image, ImageTk  # Pillow tarda en cargarse: no se importa al iniciar
+
             base_path = getattr(sys, '_MEIPASS', os.path.abspath("."))
             img_path = os.path.join(base_path, "config", "cover_1.jpg")
             img = Image.open(img_path).resize((480, 85))
             img_tk = ImageTk.PhotoImage(img)
-            label_img = tk.Label(self.root, image=img_tk)
+            label_img = tk.Label(frame_portada, image=img_tk)
             label_img.image = img_tk
-            label_img.pack(pady=10)
+            label_img.pack()
         except Exception as e:
             logger.error("No se pudo cargar la imagen de portada", exc_info=True)
 
     def crear_selector_cuenta(self):
         tk.Label(self.root, text="Selecciona una cuenta de Outlook:", font=("Arial", 10, "bold")).pack(anchor="w", padx=10)
-        opciones = ["Selecciona una cuenta..."]
-        estado_inicial = "readonly" if self.outlook_esta_abierto() else "disabled"
-        self.combo_cuentas = ttk.Combobox(self.root, values=opciones, state=estado_inicial, font=("Arial", 10), width=40)
+        # Las cuentas de la última ejecución se muestran al instante; se actualizan cuando Outlook responde
+        opciones = ["Selecciona una cuenta..."] + leer_cuentas_guardadas()
+        # Se habilita cuando el monitor informa que Outlook está abierto
+        self.combo_cuentas = ttk.Combobox(self.root, values=opciones, state="disabled", font=("Arial", 10), width=40)
         self.combo_cuentas.pack(padx=10, pady=5, anchor="w")
         self.combo_cuentas.bind("<<ComboboxSelected>>", self.seleccionar_cuenta)
 
@@ -133,17 +156,21 @@ class DraftSenderApp:
         frame_boton.pack(anchor="w", padx=10, pady=5)
 
         def ejecutar_si_outlook_abierto():
-            if not self.outlook_esta_abierto():
+            if not self.monitor_outlook.abierto:  # Último estado informado por el monitor
                 messagebox.showwarning("Outlook cerrado", "Abre Outlook antes de generar los borradores.")
                 return
 
-            ejecutar_script(
-                "crear_borradores",
+            # La validación del Excel corre en segundo plano; sigue en finalizar_validacion
+            self.validacion_en_curso = iniciar_creacion_borradores(
                 perfil=self.cuenta_seleccionada,
                 ruta_excel=self.ruta_excel_path.get(),
                 ruta_docx=self.ruta_docx_path.get(),
-                callback_progreso=self.wrapper_callback
+                incluir_firma=self.incluir_firma_var.get(),
+                reanudar=self.reanudar_var.get()
             )
+            if self.validacion_en_curso:
+                self.boton_crear_borradores.config(state="disabled")
+                self.status_var.set("Validando Excel...")
 
         self.boton_crear_borradores = tk.Button(
             frame_boton,
@@ -153,11 +180,63 @@ class DraftSenderApp:
             state="disabled"
         )
         self.boton_crear_borradores.pack(side="left")
+        self.boton_pausar = tk.Button(frame_boton, text="Pausar", command=self.alternar_pausa, font=("Arial", 10), state="disabled")
+        self.boton_pausar.pack(side="left", padx=(5, 0))
+        self.boton_cancelar = tk.Button(frame_boton, text="Cancelar", command=self.cancelar_creacion, font=("Arial", 10), state="disabled")
+        self.boton_cancelar.pack(side="left", padx=(5, 0))
+        tk.Checkbutton(frame_boton, text="Incluir firma", variable=self.incluir_firma_var, font=("Arial", 10)).pack(side="left", padx=10)
+        tk.Checkbutton(frame_boton, text="Reanudar", variable=self.reanudar_var, font=("Arial", 10)).pack(side="left")
 
         frame_enviar = tk.Frame(self.root)
         frame_enviar.pack(anchor="center", pady=5)
         tk.Button(frame_enviar, text="Enviar Borradores", command=self.lanzar_envio_gui, font=("Arial", 12), bg="purple", fg="white").pack()
 
+    def finalizar_validacion(self, reporte, error, parametros):
+        self.validacion_en_curso = None
+        self.status_var.set("")
+        self.trabajador_borradores = continuar_creacion_borradores(reporte, error, parametros)
+        if self.trabajador_borradores:
+            self.boton_pausar.config(state="normal", text="Pausar")
+            self.boton_cancelar.config(state="normal")
+        else:
+            self.validar_estado_para_boton_borradores()
+
+    def alternar_pausa(self):
+        if not self.trabajador_borradores:
+            return
+        control = self.trabajador_borradores.control
+        if control.pausado:
+            control.reanudar()
+            self.boton_pausar.config(text="Pausar")
+            logger.info("Creación de borradores reanudada.")
+        else:
+            control.pausar()
+            self.boton_pausar.config(text="Reanudar")
+            self.status_var.set("En pausa")
+            logger.info("Creación de borradores en pausa.")
+
+    def cancelar_creacion(self):
+        if self.trabajador_borradores:
+            self.trabajador_borradores.control.cancelar()
+            self.boton_pausar.config(state="disabled")
+            self.boton_cancelar.config(state="disabled")
+            self.status_var.set("Cancelando...")
+            logger.info("Creación de borradores cancelada por el usuario.")
+
+    def finalizar_creacion(self, cantidad, error, cancelado, reporte):
+        self.trabajador_borradores = None
+        self.boton_pausar.config(state="disabled", text="Pausar")
+        self.boton_cancelar.config(state="disabled")
+        self.validar_estado_para_boton_borradores()
+        if error:
+            messagebox.showerror("Error", f"No se pudo ejecutar crear_borradores:\n{error}")
+        elif cancelado:
+            self.status_var.set(f"Cancelado: {cantidad} borradores creados")
+        else:
+            self.status_var.set(f"{cantidad} borradores creados")
+        if len(reporte):
+            messagebox.showwarning("Borradores con errores", reporte.resumen())
+
     def crear_barra_progreso(self):
         self.frame_progreso = tk.Frame(self.root)
         self.barra_progreso = ttk.Progressbar(self.frame_progreso, length=300, mode='determinate', maximum=100)
@@ -170,43 +249,38 @@ class DraftSenderApp:
         self.status_label.pack(side="bottom", pady=(0, 5))
         self.status_label.pack_forget()
 
-    def outlook_esta_abierto(self) -> bool:
-        for proc in psutil.process_iter(['name']):
-            if proc.info['name'] and "outlook.exe" in proc.info['name'].lower():
-                return True
-        return False
-
     def cargar_cuentas_outlook(self):
-        try:
-            cuentas = obtener_cuentas_activas()
-            if cuentas:
-                opciones = ["Selecciona una cuenta..."] + cuentas
-                self.combo_cuentas["values"] = opciones
-                self.combo_cuentas.current(0)
-        except Exception as e:
-            logger.error(f"No se pudieron cargar las cuentas de Outlook: {e}")
-
-    def verificar_outlook_activo(self):
-        was_open = False
-        while True:
-            outlook_abierto = self.outlook_esta_abierto()
-
-            if outlook_abierto and not was_open:
-                self.root.after(0, self.cargar_cuentas_outlook)
-                was_open = True
-            elif not outlook_abierto and was_open:
-                was_open = False
-
-            if self.combo_cuentas:
-                nuevo_estado = "readonly" if outlook_abierto else "disabled"
-                self.root.after(0, lambda: self.combo_cuentas.config(state=nuevo_estado))
-
-            if self.cuenta_seleccionada and outlook_abierto:
-                self.root.after(0, self.habilitar_carga_archivos)
-            else:
-                self.root.after(0, self.deshabilitar_carga_archivos)
-
-            time.sleep(5)
+        """
+        Consulta las cuentas en segundo plano; el resultado llega por el bus a mostrar_cuentas.
+        """
+        descubrir_cuentas_en_segundo_plano()
+
+    def mostrar_cuentas(self, cuentas):
+        if not cuentas:
+            logger.error("No se pudieron cargar las cuentas de Outlook.")
+            return
+        opciones = ["Selecciona una cuenta..."] + list(cuentas)
+        if list(self.combo_cuentas["values"]) == opciones:
+            return  # La lista guardada ya estaba al día
+        self.combo_cuentas["values"] = opciones
+        if self.cuenta_seleccionada in cuentas:
+            self.combo_cuentas.set(self.cuenta_seleccionada)
+        else:
+            self.combo_cuentas.current(0)
+            if self.cuenta_seleccionada:
+                self.seleccionar_cuenta()  # La cuenta elegida ya no existe en Outlook
+
+    def actualizar_estado_outlook(self, abierto: bool):
+        """
+        Se llama (en el hilo de Tk) solo cuando Outlook se abre o se cierra.
+        """
+        if abierto:
+            self.cargar_cuentas_outlook()
+        self.combo_cuentas.config(state="readonly" if abierto else "disabled")
+        if self.cuenta_seleccionada and abierto:
+            self.habilitar_carga_archivos()
+        else:
+            self.deshabilitar_carga_archivos()
 
     def deshabilitar_carga_archivos(self):
         for widget in [self.boton_cargar_excel, self.boton_cargar_docx]:
@@ -227,9 +301,12 @@ class DraftSenderApp:
             messagebox.showerror("Error", "Debe seleccionar una cuenta antes de enviar borradores.")
             logger.error("No se ha seleccionado una cuenta para envío.")
             return
-        lanzar_envio_desde_gui(self.cuenta_seleccionada)
+        cuentas = [c for c in self.combo_cuentas["values"] if c != "Selecciona una cuenta..."]
+        lanzar_envio_desde_gui(self.cuenta_seleccionada, cuentas, master=self.root)
 
     def validar_estado_para_boton_borradores(self):
+        if self.trabajador_borradores or self.validacion_en_curso:
+            return  # No se habilita mientras haya un lote o una validación en curso
         archivos_cargados = self.ruta_excel_path.get() and self.ruta_docx_path.get()
         cuenta_valida = self.cuenta_seleccionada and self.cuenta_seleccionada != ""
         if archivos_cargados and cuenta_valida:
@@ -237,7 +314,7 @@ class DraftSenderApp:
         else:
             self.boton_crear_borradores.config(state="disabled")
 
-    def wrapper_callback(self, fila_actual, total_filas):
+    def mostrar_progreso(self, fila_actual, total_filas):
         callback_progreso_gui(
             fila_actual,
             total_filas,
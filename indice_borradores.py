@@ -0,0 +1,80 @@
+import hashlib
+import threading
+from logger_utils import configurar_logger
+
+logger = configurar_logger("indice_borradores")
+
+_indices = {}  # cuenta (minúsculas) -> IndiceBorradores del lote en curso
+_lock_indices = threading.Lock()
+
+
+def clave_borrador(destinatario: str, asunto: str, huella_plantilla: str) -> str:
+    """
+    Clave de un borrador: hash de destinatario (sin mayúsculas ni espacios extremos), asunto y plantilla.
+    Se guarda en el propio borrador para reconocerlo al volver a ejecutar la campaña.
+    """
+    texto = "\x1f".join((destinatario.strip().lower(), asunto.strip(), huella_plantilla))
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()
+
+
+class IndiceBorradores:
+    """
+    Índice en memoria de los borradores existentes de una cuenta, por clave_borrador.
+    Se construye con una sola lectura de la carpeta de borradores y se mantiene al día al crear y enviar,
+    de modo que comprobar una fila es O(1) y nunca hace falta volver a recorrer la carpeta.
+    """
+
+    def __init__(self):
+        self._por_clave = {}  # clave -> id del borrador
+        self._por_id = {}  # id del borrador -> clave
+        self._lock = threading.Lock()
+
+    @classmethod
+    def construir(cls, backend, cuenta: str) -> "IndiceBorradores":
+        indice = cls()
+        for borrador in backend.listar_borradores(cuenta):
+            if borrador.clave:
+                indice.agregar(borrador.clave, borrador.id)
+        logger.info(f"Índice de borradores de {cuenta}: {len(indice)} borradores de DraftSender.")
+        return indice
+
+    def __len__(self):
+        return len(self._por_clave)
+
+    def __contains__(self, clave: str) -> bool:
+        return clave in self._por_clave
+
+    def agregar(self, clave: str, id_borrador: str):
+        with self._lock:
+            self._por_clave[clave] = id_borrador
+            self._por_id[id_borrador] = clave
+
+    def quitar(self, id_borrador: str):
+        with self._lock:
+            clave = self._por_id.pop(id_borrador, None)
+            if clave is not None:
+                self._por_clave.pop(clave, None)
+
+
+def registrar_indice(cuenta: str, indice: IndiceBorradores):
+    """
+    Registra el índice del lote en curso para que los envíos lo mantengan al día.
+    """
+    with _lock_indices:
+        _indices[cuenta.lower()] = indice
+
+
+def liberar_indice(cuenta: str, indice: IndiceBorradores):
+    with _lock_indices:
+        if _indices.get(cuenta.lower()) is indice:
+            del _indices[cuenta.lower()]
+
+
+def notificar_enviado(cuenta: str, id_borrador: str):
+    """
+    Quita del índice registrado (si lo hay) un borrador que ya se envió.
+    """
+    with _lock_indices:
+        indice = _indices.get(cuenta.lower())
+    if indice is not None:
+        indice.quitar(id_borrador)
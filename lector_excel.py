@@ -0,0 +1,112 @@
+import os
+from logger_utils import configurar_logger
+
+logger = configurar_logger("lector_excel")
+
+
+class FilaExcel:
+    """
+    Fila leída del Excel: número de fila en la hoja y valores (texto sin espacios extremos) por columna.
+    """
+    __slots__ = ("numero", "valores")
+
+    def __init__(self, numero: int, valores: dict):
+        self.numero = numero
+        self.valores = valores
+
+    def __getitem__(self, columna):
+        return self.valores[columna]
+
+
+def indice_a_letra_columna(indice):
+    """
+    Convierte un índice de columna (0 = A) en su letra de Excel (A, B, ..., Z, AA, ...).
+    """
+    letras = ""
+    while indice >= 0:
+        letras = chr(indice % 26 + 65) + letras
+        indice = indice // 26 - 1
+    return letras
+
+
+def _a_texto(valor) -> str:
+    if valor is None or valor != valor:  # Celda vacía (None en openpyxl, NaN en pandas)
+        return ""
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))  # Teléfonos, RUT, etc. guardados como número
+    return str(valor).strip()
+
+
+class LectorExcel:
+    """
+    Lee la primera hoja de un Excel fila a fila sin cargarla completa en memoria.
+    Para .xlsx/.xlsm usa openpyxl en modo de solo lectura; los .xls antiguos se leen con pandas.
+    Args: ruta_excel (str): Ruta del archivo.
+    """
+
+    def __init__(self, ruta_excel: str):
+        if not os.path.exists(ruta_excel):
+            raise FileNotFoundError("No se encontró el archivo Excel.")
+        self.ruta_excel = ruta_excel
+        self._libro = None
+        self._hoja = None
+        self._df = None
+
+        if ruta_excel.lower().endswith(".xls"):
+            import pandas as pd
+            self._df = pd.read_excel(ruta_excel, sheet_name=0, dtype=str)
+            encabezado = list(self._df.columns)
+        else:
+            from openpyxl import load_workbook
+            self._libro = load_workbook(ruta_excel, read_only=True, data_only=True)
+            self._hoja = self._libro.worksheets[0]
+            encabezado = next(self._hoja.iter_rows(min_row=1, max_row=1, values_only=True), ())
+
+        # Nombre de columna -> índice (0 = columna A)
+        self.indices = {str(nombre).strip(): i for i, nombre in enumerate(encabezado) if nombre is not None}
+        self.columnas = list(self.indices)
+        self._total = None
+
+    @property
+    def total(self) -> int:
+        """
+        Número de filas de datos (sin encabezado). Si el archivo no declara sus dimensiones, se cuenta en una pasada.
+        """
+        if self._total is None:
+            if self._df is not None:
+                self._total = len(self._df)
+            elif self._hoja.max_row is not None:
+                self._total = max(self._hoja.max_row - 1, 0)
+            else:
+                self._total = sum(1 for _ in self._hoja.iter_rows(min_row=2, values_only=True))
+        return self._total
+
+    def filas(self, columnas=None):
+        """
+        Genera una FilaExcel por cada fila de datos. Las filas vacías se omiten.
+        Args: columnas (iterable, opcional): Columnas a incluir en cada fila; por defecto todas.
+        """
+        seleccion = [(c, self.indices[c]) for c in (self.columnas if columnas is None else columnas) if c in self.indices]
+        if self._df is not None:
+            valores_filas = self._df.itertuples(index=False, name=None)
+        else:
+            valores_filas = self._hoja.iter_rows(min_row=2, values_only=True)
+
+        for numero, valores in enumerate(valores_filas, start=2):
+            if not any(_a_texto(v) for v in valores):
+                continue
+            yield FilaExcel(numero, {
+                columna: _a_texto(valores[i]) if i < len(valores) else ""
+                for columna, i in seleccion
+            })
+
+    def cerrar(self):
+        if self._libro is not None:
+            self._libro.close()
+            self._libro = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.cerrar()
@@ -1,31 +1,115 @@
-import os  # Para interactuar con el sistema de archivos y crear directorios
+import atexit  # Para vaciar la cola de logs al cerrar la aplicación
+import gzip  # Para comprimir los archivos de log rotados
 import logging  # Para trabajar con el sistema de logging en Python
+import logging.handlers
+import os  # Para interactuar con el sistema de archivos
+import queue
+import shutil
 
-# Crear el directorio 'logs' si no existe
-os.makedirs("logs", exist_ok=True)
-_log_file_path = "logs/app.log"  # Ruta del archivo de log
+from rutas import directorio_datos
 
-# Evitar duplicar handlers si ya se configuró
-if not logging.getLogger().hasHandlers():
-    # Formato común para los logs
-    log_format = logging.Formatter(
-        fmt="%(asctime)s - %(name)s - %(levelname)s - %(funcName)s [Línea %(lineno)d] - %(message)s",
-        datefmt="%Y-%m-%d %H:%M"
-    )
+TAMANO_MAXIMO_LOG = 5 * 1024 * 1024  # Bytes de app.log antes de rotarlo
+COPIAS_LOG = 5  # Archivos rotados que se conservan
 
-    # Handler para archivo de log
-    file_handler = logging.FileHandler(_log_file_path, mode="a")  # Crea un archivo de log en modo append
-    file_handler.setFormatter(log_format)  # Aplica el formato al archivo de log
+# Formato común para los logs
+_formato = logging.Formatter(
+    fmt="%(asctime)s - %(name)s - %(levelname)s - %(funcName)s [Línea %(lineno)d] - %(message)s",
+    datefmt="%Y-%m-%d %H:%M"
+)
+_listener = None
+
+
+class _QueueHandlerDiferido(logging.handlers.QueueHandler):
+    """
+    Encola el registro sin formatearlo: el mensaje se completa aquí (los argumentos pueden cambiar después),
+    pero el traceback y el formato los arma el hilo del listener, fuera del bucle que registró el error.
+    """
+
+    def prepare(self, record):
+        # Sin copiar el registro: este es el único handler del logger raíz
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def _nombre_comprimido(nombre: str) -> str:
+    return nombre + ".gz"
 
-    # Handler para la consola
-    console_handler = logging.StreamHandler()  # Crea un handler para mostrar logs en consola
-    console_handler.setFormatter(log_format)  # Aplica el formato a la salida en consola
 
-    # Configurar logger raíz
+def _rotar_comprimiendo(origen: str, destino: str):
+    with open(origen, "rb") as entrada, gzip.open(destino, "wb") as salida:
+        shutil.copyfileobj(entrada, salida)
+    os.remove(origen)
+
+
+def crear_manejador_archivo(ruta: str, max_bytes: int = TAMANO_MAXIMO_LOG, copias: int = COPIAS_LOG,
+                            cuando: str = None, comprimir: bool = True) -> logging.Handler:
+    """
+    Handler de archivo que rota por tamaño o, si se indica `cuando` ("midnight", "H", ...), por tiempo.
+    Args: comprimir (bool): Guardar los archivos rotados con gzip (app.log.1.gz, ...).
+    Returns: logging.Handler: Handler con el formato común.
+    """
+    if cuando:
+        handler = logging.handlers.TimedRotatingFileHandler(ruta, when=cuando, backupCount=copias, encoding="utf-8")
+    else:
+        handler = logging.handlers.RotatingFileHandler(ruta, maxBytes=max_bytes, backupCount=copias, encoding="utf-8")
+    if comprimir:
+        handler.namer = _nombre_comprimido
+        handler.rotator = _rotar_comprimiendo
+    handler.setFormatter(_formato)
+    return handler
+
+
+def crear_canal_asincrono(*handlers: logging.Handler):
+    """
+    Cola entre quien registra y los handlers: el hilo que llama a logger.info() solo encola el registro;
+    un QueueListener lo escribe en los handlers desde su propio hilo.
+    Returns: tuple: (QueueHandler para agregar al logger, QueueListener ya iniciado).
+    """
+    cola = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(cola, *handlers, respect_handler_level=True)
+    listener.start()
+    return _QueueHandlerDiferido(cola), listener
+
+
+def ruta_log() -> str:
+    return os.path.join(directorio_datos("logs"), "app.log")
+
+
+def detener_registro():
+    """
+    Escribe los registros que queden en la cola y detiene el listener (se llama al salir).
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def iniciar_registro(ruta: str = None, max_bytes: int = TAMANO_MAXIMO_LOG, copias: int = COPIAS_LOG,
+                     cuando: str = None, comprimir: bool = True):
+    """
+    Configura el logger raíz: app.log en la carpeta de datos del usuario (rotado y comprimido) y la consola,
+    ambos escritos por un hilo en segundo plano. No hace nada si el logger raíz ya tiene handlers.
+    """
+    global _listener
     root_logger = logging.getLogger()  # Obtiene el logger raíz
+    if root_logger.hasHandlers():
+        return
+
+    # Handler para la consola
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(_formato)
+    archivo_handler = crear_manejador_archivo(ruta or ruta_log(), max_bytes, copias, cuando, comprimir)
+
+    cola_handler, _listener = crear_canal_asincrono(archivo_handler, console_handler)
     root_logger.setLevel(logging.INFO)  # Establece el nivel de log (INFO en este caso)
-    root_logger.addHandler(file_handler)  # Añade el handler del archivo al logger
-    root_logger.addHandler(console_handler)  # Añade el handler de la consola al logger
+    root_logger.addHandler(cola_handler)
+    atexit.register(detener_registro)
+
+
+# Evitar duplicar handlers si ya se configuró
+iniciar_registro()
 
 def configurar_logger(nombre_modulo: str) -> logging.Logger:
     """
@@ -35,4 +119,4 @@ def configurar_logger(nombre_modulo: str) -> logging.Logger:
     Returns:
         logging.Logger: El logger configurado para el módulo.
     """
-    return logging.getLogger(nombre_modulo)  # Devuelve el logger configurado para el módulo
\ No newline at end of file
+    return logging.getLogger(nombre_modulo)  # Devuelve el logger configurado para el módulo
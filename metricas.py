@@ -0,0 +1,270 @@
+import bisect
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+from logger_utils import configurar_logger
+from rutas import directorio_datos
+
+logger = configurar_logger("metricas")
+
+# Límites superiores (segundos) de los intervalos de los histogramas de latencia
+LIMITES_HISTOGRAMA = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_activas = threading.local()  # Métricas de la ejecución que corre en cada hilo
+
+
+class Histograma:
+    """
+    Duraciones de una etapa agrupadas en intervalos fijos: registrar una duración cuesta una búsqueda binaria,
+    sin guardar cada valor. Los percentiles se estiman con el límite superior del intervalo.
+    """
+
+    def __init__(self, limites=LIMITES_HISTOGRAMA):
+        self.limites = limites
+        self.conteos = [0] * (len(limites) + 1)  # El último intervalo no tiene límite (+Inf)
+        self.cantidad = 0
+        self.suma = 0.0
+        self.maximo = 0.0
+
+    def observar(self, segundos: float):
+        self.conteos[bisect.bisect_left(self.limites, segundos)] += 1
+        self.cantidad += 1
+        self.suma += segundos
+        if segundos > self.maximo:
+            self.maximo = segundos
+
+    def percentil(self, p: float) -> float:
+        if not self.cantidad:
+            return 0.0
+        objetivo = p / 100 * self.cantidad
+        acumulado = 0
+        for limite, conteo in zip(self.limites, self.conteos):
+            acumulado += conteo
+            if acumulado >= objetivo:
+                return min(limite, self.maximo)
+        return self.maximo
+
+    def resumen(self) -> dict:
+        return {
+            "cantidad": self.cantidad,
+            "total_s": round(self.suma, 4),
+            "media_ms": round(self.suma * 1000 / self.cantidad, 3) if self.cantidad else 0.0,
+            "p50_ms": round(self.percentil(50) * 1000, 3),
+            "p95_ms": round(self.percentil(95) * 1000, 3),
+            "max_ms": round(self.maximo * 1000, 3),
+        }
+
+
+class _Medicion:
+    """
+    Context manager de medir(); una clase en lugar de @contextmanager para que medir cueste lo mínimo.
+    """
+    __slots__ = ("metricas", "etapa", "inicio")
+
+    def __init__(self, metricas, etapa: str):
+        self.metricas = metricas
+        self.etapa = etapa
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metricas.observar(self.etapa, time.perf_counter() - self.inicio)
+
+
+class _SinMetricas:
+    """
+    Sustituto cuando el hilo no tiene métricas activas: medir() y contar() no hacen nada.
+    """
+    _nulo = nullcontext()
+
+    def medir(self, etapa: str):
+        return self._nulo
+
+    def observar(self, etapa: str, segundos: float):
+        pass
+
+    def contar(self, contador: str, cantidad: int = 1):
+        pass
+
+
+_SIN_METRICAS = _SinMetricas()
+
+
+class MetricasEjecucion:
+    """
+    Duración por etapa (histogramas) y contadores de una ejecución de creación o envío.
+    Con activar(), las funciones medir() y contar() de este módulo registran en ella desde cualquier punto del
+    código que corre en el mismo hilo (p. ej. outlook_utils), sin pasarla como argumento. Al terminar,
+    guardar() escribe un resumen JSON y un archivo en formato de texto de Prometheus.
+    Args: proceso (str): "borradores" o "envios". cuenta (str): Cuenta de Outlook de la ejecución.
+    """
+
+    def __init__(self, proceso: str, cuenta: str = ""):
+        self.proceso = proceso
+        self.cuenta = cuenta
+        self.inicio = datetime.now()
+        sufijo = "_" + re.sub(r"[^\w.@-]", "_", cuenta) if cuenta else ""
+        self.id_ejecucion = f"{proceso}_{self.inicio:%Y%m%d_%H%M%S_%f}{sufijo}"
+        self.etapas = {}  # etapa -> Histograma
+        self.contadores = {}  # contador -> cantidad
+        self.ruta_json = None
+        self.ruta_prometheus = None
+        self._inicio = time.perf_counter()
+        self._fin = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def activar(self):
+        """
+        Registra en estas métricas lo que se mida en el hilo actual mientras dure el bloque.
+        """
+        anterior = getattr(_activas, "metricas", None)
+        _activas.metricas = self
+        try:
+            yield self
+        finally:
+            _activas.metricas = anterior
+            self._fin = time.perf_counter()
+
+    def medir(self, etapa: str):
+        return _Medicion(self, etapa)
+
+    def observar(self, etapa: str, segundos: float):
+        with self._lock:
+            histograma = self.etapas.get(etapa)
+            if histograma is None:
+                histograma = self.etapas[etapa] = Histograma()
+            histograma.observar(segundos)
+
+    def contar(self, contador: str, cantidad: int = 1):
+        with self._lock:
+            self.contadores[contador] = self.contadores.get(contador, 0) + cantidad
+
+    def duracion(self) -> float:
+        return (self._fin or time.perf_counter()) - self._inicio
+
+    def resumen(self) -> dict:
+        duracion = self.duracion()
+        with self._lock:
+            return {
+                "id_ejecucion": self.id_ejecucion,
+                "proceso": self.proceso,
+                "cuenta": self.cuenta,
+                "inicio": self.inicio.isoformat(timespec="seconds"),
+                "duracion_s": round(duracion, 3),
+                "contadores": dict(self.contadores),
+                # Ritmo de cada contador en la ejecución completa (p. ej. borradores creados por minuto)
+                "por_minuto": {c: round(n * 60 / duracion, 2) for c, n in self.contadores.items()} if duracion else {},
+                "etapas": {etapa: h.resumen() for etapa, h in sorted(self.etapas.items())},
+            }
+
+    def a_prometheus(self) -> str:
+        """
+        Métricas en formato de texto de Prometheus (para node_exporter textfile o para importarlas).
+        """
+        etiquetas = f'proceso="{self.proceso}",cuenta="{self.cuenta}"'
+        lineas = [
+            "# HELP draftsender_duracion_segundos Duración de la ejecución.",
+            "# TYPE draftsender_duracion_segundos gauge",
+            f"draftsender_duracion_segundos{{{etiquetas}}} {self.duracion():.6f}",
+            "# HELP draftsender_total Contadores de la ejecución.",
+            "# TYPE draftsender_total counter",
+        ]
+        with self._lock:
+            for contador, cantidad in sorted(self.contadores.items()):
+                lineas.append(f'draftsender_total{{{etiquetas},contador="{contador}"}} {cantidad}')
+            lineas += [
+                "# HELP draftsender_etapa_segundos Duración de cada etapa.",
+                "# TYPE draftsender_etapa_segundos histogram",
+            ]
+            for etapa, histograma in sorted(self.etapas.items()):
+                base = f'{etiquetas},etapa="{etapa}"'
+                acumulado = 0
+                for limite, conteo in zip(histograma.limites, histograma.conteos):
+                    acumulado += conteo
+                    lineas.append(f'draftsender_etapa_segundos_bucket{{{base},le="{limite}"}} {acumulado}')
+                lineas.append(f'draftsender_etapa_segundos_bucket{{{base},le="+Inf"}} {histograma.cantidad}')
+                lineas.append(f"draftsender_etapa_segundos_sum{{{base}}} {histograma.suma:.6f}")
+                lineas.append(f"draftsender_etapa_segundos_count{{{base}}} {histograma.cantidad}")
+        return "\n".join(lineas) + "\n"
+
+    def guardar(self, directorio: str = None):
+        """
+        Escribe <id_ejecucion>.json y <id_ejecucion>.prom.
+        Args: directorio (str): Carpeta destino; por defecto la carpeta "metricas" de los datos del usuario.
+        Returns: tuple: Rutas (json, prom).
+        """
+        directorio = directorio or directorio_datos("metricas")
+        base = os.path.join(directorio, self.id_ejecucion)
+        self.ruta_json, self.ruta_prometheus = f"{base}.json", f"{base}.prom"
+        with open(self.ruta_json, "w", encoding="utf-8") as archivo:
+            json.dump(self.resumen(), archivo, ensure_ascii=False, indent=2)
+        with open(self.ruta_prometheus, "w", encoding="utf-8") as archivo:
+            archivo.write(self.a_prometheus())
+        logger.info(f"Métricas guardadas: {self.ruta_json}")
+        return self.ruta_json, self.ruta_prometheus
+
+    def texto_resumen(self) -> str:
+        """
+        Una línea por etapa, ordenadas por tiempo total, para el log al terminar.
+        """
+        resumen = self.resumen()
+        lineas = [f"Métricas de {self.id_ejecucion} ({resumen['duracion_s']} s): {resumen['contadores']}"]
+        for etapa, datos in sorted(resumen["etapas"].items(), key=lambda e: -e[1]["total_s"]):
+            lineas.append(f"  {etapa}: {datos['cantidad']} x {datos['media_ms']} ms (p95 {datos['p95_ms']} ms, "
+                          f"total {datos['total_s']} s)")
+        return "\n".join(lineas)
+
+
+def actuales():
+    """
+    Métricas activas en el hilo actual, o un sustituto que no registra nada.
+    """
+    return getattr(_activas, "metricas", None) or _SIN_METRICAS
+
+
+def medir(etapa: str):
+    """
+    Mide la duración del bloque en las métricas activas del hilo:
+
+        with medir("outlook.save"):
+            mensaje.Save()
+    """
+    return actuales().medir(etapa)
+
+
+def contar(contador: str, cantidad: int = 1):
+    actuales().contar(contador, cantidad)
+
+
+def iterar_midiendo(iterable, etapa: str):
+    """
+    Recorre el iterable midiendo cuánto tarda en entregar cada elemento (p. ej. leer cada fila del Excel).
+    """
+    metricas = actuales()
+    iterador = iter(iterable)
+    while True:
+        inicio = time.perf_counter()
+        try:
+            elemento = next(iterador)
+        except StopIteration:
+            return
+        metricas.observar(etapa, time.perf_counter() - inicio)
+        yield elemento
+
+
+def cerrar_metricas(metricas: MetricasEjecucion):
+    """
+    Guarda las métricas de una ejecución y deja el resumen en el log, sin interrumpir el proceso si falla.
+    """
+    try:
+        metricas.guardar()
+        logger.info(metricas.texto_resumen())
+    except Exception:
+        logger.exception("No se pudieron guardar las métricas")
@@ -0,0 +1,75 @@
+import threading
+from logger_utils import configurar_logger
+from eventos import bus_eventos
+
+logger = configurar_logger("monitor_outlook")
+
+PERIODO_POR_DEFECTO = 5.0  # Segundos entre comprobaciones
+
+
+class MonitorOutlook(threading.Thread):
+    """
+    Vigila si Outlook está abierto sin recorrer todos los procesos en cada comprobación:
+    recuerda el proceso de Outlook y solo comprueba que siga vivo. Sin proceso conocido (al iniciar o después de
+    que Outlook se cierre) se recorren los procesos con psutil.process_iter, que conserva los procesos ya vistos
+    entre recorridos y detecta por su hora de creación cuando un PID se reutiliza.
+    Publica "estado_outlook" (abierto=bool) en bus_eventos solo cuando el estado cambia (y una vez al iniciar).
+    Args:
+        periodo (float): Segundos entre comprobaciones.
+        nombre_proceso (str): Ejecutable a vigilar.
+    """
+
+    def __init__(self, periodo: float = PERIODO_POR_DEFECTO, nombre_proceso: str = "outlook.exe"):
+        super().__init__(name="MonitorOutlook", daemon=True)
+        self.periodo = periodo
+        self.nombre_proceso = nombre_proceso.lower()
+        self.abierto = None  # Desconocido hasta la primera comprobación
+        self.pid = None
+        self.recorridos = 0  # Veces que se buscó Outlook entre los procesos
+        self._proceso = None  # psutil.Process de Outlook mientras está abierto
+        self._detener = threading.Event()
+
+    def _es_outlook(self, proceso) -> bool:
+        nombre = proceso.name()
+        return bool(nombre) and self.nombre_proceso in nombre.lower()
+
+    def comprobar(self) -> bool:
+        """
+        True si Outlook está abierto. Con un PID conocido cuesta una consulta a ese proceso.
+        """
+        import psutil
+
+        if self._proceso is not None:
+            try:
+                # is_running() compara la hora de creación: un PID reutilizado por otro proceso no cuenta
+                if self._proceso.is_running():
+                    return True
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+            self._proceso = self.pid = None
+
+        self.recorridos += 1
+        for proceso in psutil.process_iter():
+            try:
+                if self._es_outlook(proceso):
+                    self._proceso, self.pid = proceso, proceso.pid
+                    return True
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                pass
+        return False
+
+    def run(self):
+        while not self._detener.is_set():
+            try:
+                abierto = self.comprobar()
+            except Exception:
+                logger.exception("No se pudo comprobar si Outlook está abierto")
+                abierto = self.abierto
+            if abierto != self.abierto:
+                self.abierto = abierto
+                logger.info(f"Outlook {'abierto' if abierto else 'cerrado'} (PID {self.pid})")
+                bus_eventos.publicar("estado_outlook", abierto=abierto)
+            self._detener.wait(self.periodo)
+
+    def detener(self):
+        self._detener.set()
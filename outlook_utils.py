@@ -1,13 +1,227 @@
-import winreg  # Para interactuar con el registro de Windows y obtener información de los perfiles de Outlook
 import subprocess  # Para ejecutar comandos del sistema
 import os  # Para interactuar con el sistema de archivos
 import time  # Para introducir tiempos de espera entre operaciones
-import win32com.client  # Para interactuar con Outlook mediante COM
-import pythoncom  # Para inicializar el modelo de objetos COM
+import json  # Para la caché de ubicaciones de las carpetas de borradores
+import threading
+# winreg, win32com y pythoncom solo existen en Windows: se importan dentro de las funciones que los usan
+# para que el resto del módulo (y el backend falso) funcione en cualquier sistema.
 
 from logger_utils import configurar_logger  # Función para configurar el logger
+from rutas import directorio_datos
+from metricas import medir
 logger = configurar_logger("outlook_utils")  # Instancia del logger para este módulo
 
+# Propiedad MAPI con nombre (PS_PUBLIC_STRINGS) donde se guarda la clave de cada borrador generado
+PROPIEDAD_CLAVE = "http://schemas.microsoft.com/mapi/string/{00020329-0000-0000-C000-000000000046}/DraftSenderClave"
+
+class SesionOutlook:
+    """
+    Sesión de Outlook reutilizable durante todo un lote.
+    Conecta con Outlook e inicia sesión en el perfil una sola vez, y resuelve cada cuenta
+    una sola vez en lugar de recorrer namespace.Accounts en cada borrador.
+    Args: perfil (str): Perfil de Outlook con el que iniciar sesión (opcional).
+    """
+
+    def __init__(self, perfil: str = ""):
+        import win32com.client  # Para interactuar con Outlook mediante COM
+        self.outlook = win32com.client.Dispatch("Outlook.Application")  # Conecta con la aplicación Outlook
+        self.namespace = self.outlook.GetNamespace("MAPI")
+        if perfil:
+            self.namespace.Logon(Profile=perfil, ShowDialog=False, NewSession=True)
+        self._cuentas = {}  # SMTP en minúsculas -> objeto Account
+        self._firmas = {}  # (SMTP en minúsculas, archivo de firma) -> HTML de la firma
+
+    def obtener_cuenta(self, cuenta_smtp: str):
+        """
+        Devuelve el objeto Account de Outlook para la dirección indicada.
+        La lista de cuentas se lee en una sola pasada y queda en caché para el resto del lote.
+        Args: cuenta_smtp (str): Dirección SMTP de la cuenta.
+        Returns: Account: Cuenta de Outlook.
+        """
+        clave = cuenta_smtp.lower()
+        if clave not in self._cuentas:
+            self._cuentas = {acc.SmtpAddress.lower(): acc for acc in self.namespace.Accounts}
+        cuenta = self._cuentas.get(clave)
+        if not cuenta:
+            raise RuntimeError(f"No se encontró la cuenta de Outlook: {cuenta_smtp}")
+        return cuenta
+
+    def obtener_firma(self, cuenta_smtp: str, archivo_firma: str = None) -> str:
+        """
+        Devuelve la firma HTML de la cuenta, obtenida una sola vez por lote.
+        Si se indica archivo_firma se lee de los archivos de firma del usuario; si no, se abre un único
+        inspector para capturar la firma predeterminada que Outlook inserta y se descarta el mensaje.
+        Args: cuenta_smtp (str): Dirección SMTP de la cuenta. archivo_firma (str): Nombre o ruta de la firma (opcional).
+        Returns: str: HTML de la firma ("" si no hay).
+        """
+        clave = (cuenta_smtp.lower(), archivo_firma)
+        if clave not in self._firmas:
+            if archivo_firma:
+                self._firmas[clave] = cargar_firma_desde_archivo(archivo_firma)
+            else:
+                mensaje = self.outlook.CreateItem(0)
+                mensaje._oleobj_.Invoke(*(64209, 0, 8, 0, self.obtener_cuenta(cuenta_smtp)))
+                with medir("outlook.display"):
+                    mensaje.Display()
+                self._firmas[clave] = mensaje.HTMLBody or ""
+                mensaje.Close(1)  # olDiscard: el mensaje de captura no se guarda
+            logger.info(f"Firma cargada para {cuenta_smtp} ({len(self._firmas[clave])} caracteres)")
+        return self._firmas[clave]
+
+    def crear_borrador(self, cuenta_smtp: str, destinatario: str, asunto: str, cuerpo_html: str, firma: str = None,
+                       clave: str = ""):
+        """
+        Crea y guarda un borrador sin mostrarlo.
+        Args:
+            firma (str): HTML que se agrega al cuerpo; None usa la firma de la cuenta y "" no agrega firma.
+            clave (str): Clave del borrador (ver indice_borradores); se guarda en PROPIEDAD_CLAVE.
+        Returns: MailItem: El borrador guardado.
+        """
+        cuenta = self.obtener_cuenta(cuenta_smtp)
+        if firma is None:
+            firma = self.obtener_firma(cuenta_smtp)
+
+        with medir("outlook.create_item"):
+            mensaje = self.outlook.CreateItem(0)
+        with medir("outlook.propiedades"):
+            mensaje._oleobj_.Invoke(*(64209, 0, 8, 0, cuenta))  # PR_SENT_REPRESENTING / SendUsingAccount
+            mensaje.Subject = asunto
+            mensaje.To = destinatario
+            mensaje.BodyFormat = 2
+            mensaje.HTMLBody = cuerpo_html + firma
+            if clave:
+                mensaje.PropertyAccessor.SetProperty(PROPIEDAD_CLAVE, clave)
+        with medir("outlook.save"):
+            mensaje.Save()
+        return mensaje
+
+    def obtener_item(self, entry_id: str):
+        """
+        Devuelve el elemento de Outlook con el EntryID indicado.
+        """
+        with medir("outlook.get_item"):
+            return self.namespace.GetItemFromID(entry_id)
+
+OL_FOLDER_DRAFTS = 16  # OlDefaultFolders.olFolderDrafts
+
+_ubicaciones_borradores = None  # cuenta SMTP en minúsculas -> {"store_id": ..., "entry_id": ...}
+_lock_ubicaciones = threading.Lock()
+
+
+def _ruta_ubicaciones() -> str:
+    return os.path.join(directorio_datos(), "carpetas_borradores.json")
+
+
+def _ubicaciones() -> dict:
+    """
+    Ubicaciones de las carpetas de borradores ya resueltas, leídas del disco la primera vez.
+    """
+    global _ubicaciones_borradores
+    if _ubicaciones_borradores is None:
+        try:
+            with open(_ruta_ubicaciones(), encoding="utf-8") as archivo:
+                _ubicaciones_borradores = json.load(archivo)
+        except (OSError, ValueError):
+            _ubicaciones_borradores = {}
+    return _ubicaciones_borradores
+
+
+def _guardar_ubicacion(cuenta_smtp: str, carpeta):
+    with _lock_ubicaciones:
+        ubicaciones = _ubicaciones()
+        if carpeta is None:
+            if ubicaciones.pop(cuenta_smtp.lower(), None) is None:
+                return
+        else:
+            ubicaciones[cuenta_smtp.lower()] = {"store_id": carpeta.StoreID, "entry_id": carpeta.EntryID}
+        try:
+            with open(_ruta_ubicaciones(), "w", encoding="utf-8") as archivo:
+                json.dump(ubicaciones, archivo, indent=2)
+        except OSError:
+            logger.warning("No se pudo guardar la caché de carpetas de borradores", exc_info=True)
+
+
+def obtener_carpeta_borradores(namespace, cuenta_smtp, cuenta=None):
+    """
+    Devuelve la carpeta de borradores de la cuenta indicada.
+    Primero usa la ubicación guardada (StoreID/EntryID); si no hay, pide al almacén de la cuenta su carpeta
+    Borradores predeterminada y, solo si eso falla, recorre sus carpetas buscando "Borradores" o "Drafts".
+    La ubicación encontrada se guarda en disco y solo se descarta si deja de ser válida.
+    Args: namespace: Namespace MAPI de Outlook. cuenta_smtp (str): Dirección SMTP de la cuenta.
+        cuenta: Objeto Account de Outlook, si ya se tiene (opcional).
+    Returns: Folder: Carpeta de borradores.
+    """
+    ubicacion = _ubicaciones().get(cuenta_smtp.lower())
+    if ubicacion:
+        try:
+            return namespace.GetFolderFromID(ubicacion["entry_id"], ubicacion["store_id"])
+        except Exception:
+            logger.info(f"La carpeta de borradores guardada para {cuenta_smtp} ya no es válida; se busca de nuevo.")
+            _guardar_ubicacion(cuenta_smtp, None)
+
+    if cuenta is None:
+        cuenta = next((acc for acc in namespace.Accounts if acc.SmtpAddress.lower() == cuenta_smtp.lower()), None)
+        if cuenta is None:
+            raise RuntimeError(f"No se encontró la cuenta en Outlook: {cuenta_smtp}")
+
+    try:
+        almacen = cuenta.DeliveryStore
+    except Exception as e:
+        logger.exception(f"No se pudo acceder al almacén de la cuenta {cuenta_smtp}")
+        raise RuntimeError(f"No se pudo acceder a la carpeta raíz de la cuenta {cuenta_smtp}: {e}")
+
+    try:
+        carpeta = almacen.GetDefaultFolder(OL_FOLDER_DRAFTS)
+    except Exception:
+        logger.info(f"El almacén de {cuenta_smtp} no expone su carpeta Borradores; se recorren sus carpetas.")
+        carpeta = _buscar_carpeta_borradores(almacen, cuenta_smtp)
+
+    _guardar_ubicacion(cuenta_smtp, carpeta)
+    return carpeta
+
+
+def _buscar_carpeta_borradores(almacen, cuenta_smtp):
+    def buscar_recursivo(folder):
+        for subfolder in folder.Folders:
+            if subfolder.Name in ["Borradores", "Drafts"]:
+                return subfolder
+            resultado = buscar_recursivo(subfolder)
+            if resultado:
+                return resultado
+        return None
+
+    try:
+        carpeta = buscar_recursivo(almacen.GetRootFolder())
+    except Exception as e:
+        logger.exception(f"No se pudo acceder a la carpeta raíz de la cuenta {cuenta_smtp}")
+        raise RuntimeError(f"No se pudo acceder a la carpeta raíz de la cuenta {cuenta_smtp}: {e}")
+    if not carpeta:
+        raise LookupError(f"No se encontró la carpeta 'Borradores' en la cuenta {cuenta_smtp}")
+    return carpeta
+
+def cargar_firma_desde_archivo(archivo_firma: str) -> str:
+    """
+    Lee una firma HTML guardada por Outlook.
+    Acepta una ruta a un archivo .htm o el nombre de la firma, que se busca en %APPDATA%\\Microsoft\\Signatures.
+    Las imágenes enlazadas desde la firma no se incrustan.
+    Args: archivo_firma (str): Ruta o nombre de la firma.
+    Returns: str: HTML de la firma.
+    """
+    ruta = archivo_firma
+    if not os.path.exists(ruta):
+        carpeta_firmas = os.path.join(os.environ.get("APPDATA", ""), "Microsoft", "Signatures")
+        nombre = archivo_firma if archivo_firma.lower().endswith(".htm") else f"{archivo_firma}.htm"
+        ruta = os.path.join(carpeta_firmas, nombre)
+    if not os.path.exists(ruta):
+        raise FileNotFoundError(f"No se encontró la firma: {archivo_firma}")
+
+    with open(ruta, "rb") as archivo:
+        contenido = archivo.read()
+    try:
+        return contenido.decode("utf-8")
+    except UnicodeDecodeError:
+        return contenido.decode("cp1252", errors="replace")  # Codificación habitual de las firmas de Outlook
+
 def obtener_perfiles_outlook():
     """
     Obtiene los perfiles de Outlook configurados en el sistema desde el registro de Windows.
@@ -16,6 +230,7 @@ def obtener_perfiles_outlook():
     Returns:
         list: Lista de perfiles encontrados (incluye la opción "Seleccione perfil..." al principio).
     """
+    import winreg  # Para interactuar con el registro de Windows y obtener información de los perfiles de Outlook
     perfiles = ["Seleccione perfil..."]
     try:
         office_versions = ["16.0", "15.0", "14.0"]  # Versiones de Outlook que se van a revisar
@@ -90,24 +305,75 @@ def iniciar_outlook_con_perfil(perfil: str):
 def obtener_cuentas_activas(max_intentos: int = 10, intervalo: int = 1):
     """
     Obtiene las cuentas activas de Outlook.
-    Utiliza la interfaz COM de Outlook para acceder a las cuentas configuradas en el perfil activo.
+    Utiliza el backend de correo configurado para acceder a las cuentas del perfil activo.
     Args: max_intentos (int): Número máximo de intentos para obtener las cuentas. intervalo (int): Intervalo de tiempo (en segundos) entre intentos.
     Returns: list: Lista de direcciones SMTP de las cuentas activas en Outlook.
     """
-    pythoncom.CoInitialize()  # Inicializa el modelo COM
+    from backend_correo import crear_backend
+
+    for intento in range(max_intentos):
+        try:
+            with crear_backend() as backend:  # Inicializa COM en este hilo y conecta con Outlook
+                cuentas = backend.listar_cuentas()  # Obtiene las cuentas configuradas
+            if cuentas:
+                logger.info(f"Se encontraron cuentas activas: {cuentas}")
+                return cuentas
+        except Exception:
+            logger.warning("Intento fallido al acceder a las cuentas de Outlook", exc_info=True)  # Registra advertencias por fallos
+            time.sleep(intervalo)
+    logger.warning("No se encontraron cuentas activas tras múltiples intentos.")  # Si no se encuentran cuentas, lo registra
+    return []
+
+
+def _ruta_cuentas_guardadas() -> str:
+    return os.path.join(directorio_datos(), "cuentas.json")
+
+
+def leer_cuentas_guardadas() -> list:
+    """
+    Cuentas encontradas en la última ejecución, para mostrarlas al instante mientras se vuelven a consultar.
+    Returns: list: Direcciones SMTP (vacía si no hay caché).
+    """
     try:
-        for intento in range(max_intentos):
-            try:
-                outlook = win32com.client.Dispatch("Outlook.Application")  # Conecta con la aplicación Outlook
-                namespace = outlook.GetNamespace("MAPI")
-                cuentas = [account.SmtpAddress for account in namespace.Accounts]  # Obtiene las cuentas configuradas
-                if cuentas:
-                    logger.info(f"Se encontraron cuentas activas: {cuentas}")
-                    return cuentas
-            except Exception:
-                logger.warning("Intento fallido al acceder a las cuentas de Outlook", exc_info=True)  # Registra advertencias por fallos
-                time.sleep(intervalo)
-        logger.warning("No se encontraron cuentas activas tras múltiples intentos.")  # Si no se encuentran cuentas, lo registra
+        with open(_ruta_cuentas_guardadas(), encoding="utf-8") as archivo:
+            return list(json.load(archivo).get("cuentas", []))
+    except (OSError, ValueError, AttributeError):
         return []
-    finally:
-        pythoncom.CoUninitialize()  # Libera los recursos de COM
\ No newline at end of file
+
+
+def guardar_cuentas(cuentas: list):
+    try:
+        with open(_ruta_cuentas_guardadas(), "w", encoding="utf-8") as archivo:
+            json.dump({"cuentas": list(cuentas)}, archivo, ensure_ascii=False, indent=2)
+    except OSError:
+        logger.warning("No se pudo guardar la lista de cuentas", exc_info=True)
+
+
+_descubrimiento_en_curso = threading.Lock()
+
+
+def descubrir_cuentas_en_segundo_plano() -> bool:
+    """
+    Consulta las cuentas de Outlook en un hilo propio (con sus reintentos) y publica "cuentas_outlook"
+    (cuentas=list) en bus_eventos al terminar. Si la consulta da resultado, se guarda para el próximo inicio.
+    Returns: bool: False si ya había una consulta en curso.
+    """
+    from eventos import bus_eventos
+
+    if not _descubrimiento_en_curso.acquire(blocking=False):
+        return False
+
+    def descubrir():
+        try:
+            cuentas = obtener_cuentas_activas()
+            if cuentas:
+                guardar_cuentas(cuentas)
+            bus_eventos.publicar("cuentas_outlook", cuentas=cuentas)
+        except Exception:
+            logger.exception("Error al consultar las cuentas de Outlook")
+            bus_eventos.publicar("cuentas_outlook", cuentas=[])
+        finally:
+            _descubrimiento_en_curso.release()
+
+    threading.Thread(target=descubrir, name="DescubrimientoCuentas", daemon=True).start()
+    return True
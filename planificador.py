@@ -0,0 +1,324 @@
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, time as hora
+
+from logger_utils import configurar_logger
+from rutas import directorio_datos
+
+logger = configurar_logger("planificador")
+
+
+@dataclass
+class VentanaEnvio:
+    """
+    Horario en que se permite enviar, p. ej. de 09:00 a 18:00 de lunes (0) a viernes (4).
+    Si fin es anterior a inicio (p. ej. de 22:00 a 06:00), la ventana cruza la medianoche: abre los días
+    indicados y cierra a la mañana siguiente.
+    """
+    inicio: hora = hora(0, 0)
+    fin: hora = hora(23, 59, 59)
+    dias: tuple = (0, 1, 2, 3, 4, 5, 6)
+
+    @property
+    def cruza_medianoche(self) -> bool:
+        return self.fin < self.inicio
+
+    def abierta(self, momento: datetime) -> bool:
+        actual = momento.time()
+        if not self.cruza_medianoche:
+            return momento.weekday() in self.dias and self.inicio <= actual < self.fin
+        if actual >= self.inicio:
+            return momento.weekday() in self.dias
+        # Madrugada: sigue abierta la ventana que abrió el día anterior
+        return actual < self.fin and (momento - timedelta(days=1)).weekday() in self.dias
+
+    def segundos_hasta_abrir(self, momento: datetime) -> float:
+        """
+        0 si la ventana está abierta; si no, segundos hasta la próxima apertura.
+        """
+        if self.abierta(momento):
+            return 0.0
+        for dias_adelante in range(8):
+            fecha = (momento + timedelta(days=dias_adelante)).date()
+            apertura = datetime.combine(fecha, self.inicio)
+            if fecha.weekday() in self.dias and apertura > momento:
+                return (apertura - momento).total_seconds()
+        raise ValueError("La ventana de envío no tiene ningún día habilitado.")
+
+
+@dataclass
+class LimitesEnvio:
+    """
+    Límites de envío de una cuenta. Los valores None no limitan.
+    Cada cupo (por minuto, hora y día) cuenta los envíos de los últimos 60 s, 3600 s o 24 h. Además, los envíos
+    se espacian al ritmo del límite de corto plazo más estricto (intervalo mínimo, por minuto o por hora);
+    el cupo diario solo cuenta, no espacia.
+    Args:
+        por_minuto, por_hora, por_dia (float): Máximo de envíos en cada período.
+        intervalo_minimo (float): Segundos mínimos entre envíos.
+        rafaga (int): Envíos que se permiten seguidos antes de aplicar el ritmo (siempre dentro de los cupos).
+        jitter (float): Segundos aleatorios (0..jitter) que se agregan antes de cada envío.
+        ventana (VentanaEnvio): Horario permitido.
+    """
+    por_minuto: float = None
+    por_hora: float = None
+    por_dia: float = None
+    intervalo_minimo: float = None
+    rafaga: int = 1
+    jitter: float = 0.0
+    ventana: VentanaEnvio = None
+
+    @classmethod
+    def desde_dict(cls, datos: dict) -> "LimitesEnvio":
+        datos = dict(datos)
+        ventana = datos.pop("ventana", None)
+        if ventana:
+            datos["ventana"] = VentanaEnvio(
+                inicio=hora.fromisoformat(ventana.get("inicio", "00:00")),
+                fin=hora.fromisoformat(ventana.get("fin", "23:59:59")),
+                dias=tuple(ventana.get("dias", range(7))),
+            )
+            if datos["ventana"].inicio == datos["ventana"].fin:
+                raise ValueError(f"La ventana de envío no puede empezar y terminar a la misma hora: {ventana}")
+        return cls(**datos)
+
+    def cupos(self) -> list:
+        """
+        (máximo de envíos, período en segundos) de cada cupo configurado.
+        """
+        return [(max(1, int(limite)), periodo)
+                for limite, periodo in ((self.por_minuto, 60), (self.por_hora, 3600), (self.por_dia, 86400))
+                if limite]
+
+    def tasa_ritmo(self) -> float:
+        """
+        Envíos por segundo del límite de corto plazo más estricto; None si no hay ninguno.
+        """
+        tasas = [limite / periodo for limite, periodo in ((self.por_minuto, 60), (self.por_hora, 3600)) if limite]
+        if self.intervalo_minimo:
+            tasas.append(1 / self.intervalo_minimo)
+        return min(tasas, default=None)
+
+
+class CubetaTokens:
+    """
+    Cubeta de tokens: se recarga a `tasa` tokens por segundo hasta `capacidad`; cada envío consume uno.
+    """
+
+    def __init__(self, tasa: float, capacidad: float):
+        self.tasa = tasa
+        self.capacidad = capacidad
+        self.tokens = capacidad
+        self._actualizado = time.monotonic()
+
+    def _recargar(self, ahora: float):
+        self.tokens = min(self.capacidad, self.tokens + (ahora - self._actualizado) * self.tasa)
+        self._actualizado = ahora
+
+    def espera(self, ahora: float) -> float:
+        """
+        Segundos hasta que haya un token disponible (0 si ya lo hay).
+        """
+        self._recargar(ahora)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.tasa
+
+    def consumir(self, ahora: float):
+        self._recargar(ahora)
+        self.tokens -= 1
+
+
+class CupoPeriodo:
+    """
+    Cupo de `limite` envíos en cualquier intervalo de `periodo` segundos (ventana deslizante): guarda el momento
+    de los últimos envíos y espera a que el más antiguo salga del período.
+    """
+
+    def __init__(self, limite: int, periodo: float):
+        self.limite = limite
+        self.periodo = periodo
+        self._envios = deque()
+
+    def espera(self, ahora: float) -> float:
+        while self._envios and self._envios[0] <= ahora - self.periodo:
+            self._envios.popleft()
+        if len(self._envios) < self.limite:
+            return 0.0
+        return self._envios[0] + self.periodo - ahora
+
+    def consumir(self, ahora: float):
+        self._envios.append(ahora)
+
+
+class PlanificadorEnvios:
+    """
+    Decide cuándo puede enviar cada cuenta según sus límites: un CupoPeriodo por cupo (minuto, hora, día),
+    una cubeta de tokens con el ritmo de corto plazo y capacidad `rafaga`, y la ventana horaria.
+    El envío ocurre en cuanto todos lo permiten, sin esperas fijas adicionales.
+    Args:
+        limites (LimitesEnvio): Límites por defecto.
+        limites_por_cuenta (dict): Límites específicos por cuenta SMTP (opcional).
+        intervalo_minimo (float): Intervalo mínimo para todas las cuentas; no relaja uno configurado más estricto.
+    """
+
+    def __init__(self, limites: LimitesEnvio = None, limites_por_cuenta: dict = None, intervalo_minimo: float = None):
+        self.limites = limites or LimitesEnvio()
+        self.limites_por_cuenta = {c.lower(): l for c, l in (limites_por_cuenta or {}).items()}
+        self.intervalo_minimo = intervalo_minimo
+        self._cubetas = {}  # cuenta -> lista de CubetaTokens y CupoPeriodo
+        self._lock = threading.Lock()
+
+    def limites_de(self, cuenta: str) -> LimitesEnvio:
+        """
+        Límites que rigen para la cuenta: los configurados con, además, el intervalo mínimo del planificador.
+        """
+        limites = self.limites_por_cuenta.get(cuenta.lower(), self.limites)
+        if not self.intervalo_minimo or (limites.intervalo_minimo or 0) >= self.intervalo_minimo:
+            return limites
+        return replace(limites, intervalo_minimo=self.intervalo_minimo)
+
+    def fijar_intervalo_minimo(self, intervalo_minimo: float = None):
+        """
+        Cambia el intervalo mínimo de todas las cuentas, también con envíos en curso: se ajusta el ritmo de las
+        cubetas ya creadas sin perder los cupos consumidos.
+        """
+        with self._lock:
+            self.intervalo_minimo = intervalo_minimo
+            ahora = time.monotonic()
+            for clave, controles in self._cubetas.items():
+                limites = self.limites_de(clave)
+                tasa = limites.tasa_ritmo()
+                cubeta = next((c for c in controles if isinstance(c, CubetaTokens)), None)
+                if cubeta is not None:
+                    controles.remove(cubeta)
+                    cubeta._recargar(ahora)  # Los tokens acumulados hasta ahora se cuentan con la tasa anterior
+                    cubeta.tasa = tasa
+                elif tasa:
+                    cubeta = CubetaTokens(tasa, capacidad=max(1, limites.rafaga))
+                if tasa:
+                    controles.append(cubeta)
+
+    def _cubetas_de(self, cuenta: str) -> list:
+        clave = cuenta.lower()
+        if clave not in self._cubetas:
+            limites = self.limites_de(cuenta)
+            controles = [CupoPeriodo(limite, periodo) for limite, periodo in limites.cupos()]
+            tasa = limites.tasa_ritmo()
+            if tasa:
+                controles.append(CubetaTokens(tasa, capacidad=max(1, limites.rafaga)))
+            self._cubetas[clave] = controles
+        return self._cubetas[clave]
+
+    def espera(self, cuenta: str) -> float:
+        """
+        Segundos que faltan para que la cuenta pueda enviar (0 si puede ahora).
+        """
+        limites = self.limites_de(cuenta)
+        ahora = time.monotonic()
+        with self._lock:
+            espera = max([c.espera(ahora) for c in self._cubetas_de(cuenta)], default=0.0)
+        if limites.ventana:
+            espera = max(espera, limites.ventana.segundos_hasta_abrir(datetime.now()))
+        return espera
+
+    def esperar_turno(self, cuenta: str, activo=None, al_esperar=None) -> bool:
+        """
+        Bloquea hasta que la cuenta pueda enviar y consume el turno.
+        Args:
+            activo (callable): Si devuelve False durante la espera, se abandona (envío detenido).
+            al_esperar (callable): Se llama con los segundos que faltan para aprovechar la espera (opcional).
+        Returns: bool: True si se puede enviar; False si se detuvo.
+        """
+        while True:
+            espera = self.espera(cuenta)
+            if espera <= 0:
+                break
+            if activo is not None and not activo():
+                return False
+            if al_esperar is not None:
+                al_esperar(espera)
+                espera = self.espera(cuenta)
+            time.sleep(min(max(espera, 0.0), 0.5))  # Tramos cortos para reaccionar rápido a una detención
+
+        with self._lock:
+            ahora = time.monotonic()
+            for cubeta in self._cubetas_de(cuenta):
+                cubeta.consumir(ahora)
+
+        jitter = self.limites_de(cuenta).jitter
+        if jitter:
+            time.sleep(random.uniform(0, jitter))
+        return activo is None or activo()
+
+    def estimar_duracion(self, cuenta: str, cantidad: int) -> float:
+        """
+        Segundos estimados para enviar `cantidad` borradores al ritmo máximo permitido (sin contar ventanas cerradas):
+        lo que tarde el más lento entre el ritmo de corto plazo y los cupos ya agotados.
+        """
+        limites = self.limites_de(cuenta)
+        if cantidad <= 0:
+            return 0.0
+        duracion = 0.0
+        tasa = limites.tasa_ritmo()
+        if tasa:
+            duracion = max(cantidad - max(1, limites.rafaga), 0) / tasa
+        for limite, periodo in limites.cupos():
+            duracion = max(duracion, (cantidad - 1) // limite * periodo)
+        return duracion + cantidad * limites.jitter / 2
+
+
+def cargar_limites(ruta: str = None, errores: list = None) -> dict:
+    """
+    Lee los límites por cuenta de limites_envio.json en la carpeta de datos del usuario, p. ej.:
+        {"*": {"por_hora": 30, "por_dia": 300},
+         "ventas@empresa.com": {"por_minuto": 2, "rafaga": 3, "jitter": 5,
+                                "ventana": {"inicio": "09:00", "fin": "18:00", "dias": [0, 1, 2, 3, 4]}}}
+    La clave "*" se aplica a las cuentas sin configuración propia. Una entrada inválida se omite sin afectar
+    a las demás.
+    Args:
+        ruta (str): Archivo a leer (por defecto, el de la carpeta de datos del usuario).
+        errores (list): Si se indica, se le agrega un mensaje por cada entrada omitida o si el archivo no se pudo leer.
+    Returns: dict: Cuenta (o "*") -> LimitesEnvio. Vacío si no hay archivo.
+    """
+    ruta = ruta or os.path.join(directorio_datos(), "limites_envio.json")
+    if not os.path.exists(ruta):
+        return {}
+
+    def registrar(mensaje):
+        logger.error(mensaje)
+        if errores is not None:
+            errores.append(mensaje)
+
+    try:
+        with open(ruta, encoding="utf-8") as archivo:
+            configuracion = json.load(archivo)
+    except (OSError, ValueError) as e:
+        registrar(f"No se pudieron leer los límites de envío de {ruta}: {e}")
+        return {}
+    if not isinstance(configuracion, dict):
+        registrar(f"{ruta} debe contener un objeto con los límites de cada cuenta")
+        return {}
+
+    limites = {}
+    for cuenta, datos in configuracion.items():
+        try:
+            limites[cuenta] = LimitesEnvio.desde_dict(datos)
+        except (TypeError, ValueError, AttributeError) as e:
+            registrar(f"Límites de envío inválidos para {cuenta} en {ruta}; se omiten: {e}")
+    return limites
+
+
+def crear_planificador(intervalo_minimo: float = None, limites_por_cuenta: dict = None) -> PlanificadorEnvios:
+    """
+    Planificador con los límites configurados por el usuario y, además, el intervalo mínimo indicado
+    (se respeta el configurado si es más estricto).
+    """
+    if limites_por_cuenta is None:
+        limites_por_cuenta = cargar_limites()
+    limites_por_cuenta = dict(limites_por_cuenta)
+    por_defecto = limites_por_cuenta.pop("*", None) or LimitesEnvio()
+    return PlanificadorEnvios(por_defecto, limites_por_cuenta, intervalo_minimo)
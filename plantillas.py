@@ -0,0 +1,88 @@
+import hashlib
+import os
+import re
+from logger_utils import configurar_logger
+
+logger = configurar_logger("plantillas")
+
+# Etiquetas admitidas en la plantilla: [Campo] y {{Campo}}
+PATRON_ETIQUETA = re.compile(r"\[([^\[\]<>]+)\]|\{\{([^{}<>]+)\}\}")
+ENVOLTURA_HTML = '<div style="font-family: Calibri, sans-serif; font-size: 11pt;">{}</div>'
+
+
+class PlantillaCompilada:
+    """
+    Plantilla de correo convertida desde .docx una sola vez por lote.
+    El HTML se separa en segmentos literales y etiquetas ([Campo] o {{Campo}}); cada fila se renderiza
+    con un único join, sin volver a recorrer el HTML.
+    """
+
+    def __init__(self, html: str, origen: str = ""):
+        self.html = html
+        self.origen = origen
+        self.huella = hashlib.sha1(html.encode("utf-8")).hexdigest()[:16]  # Identifica la plantilla en los borradores
+
+        # Segmentos listos para el join; las etiquetas conservan su texto original por defecto
+        self._segmentos = [ENVOLTURA_HTML.split("{}")[0]]
+        # (índice del segmento, campo) de cada etiqueta
+        self._huecos = []
+        cursor = 0
+        for m in PATRON_ETIQUETA.finditer(html):
+            if m.start() > cursor:
+                self._segmentos.append(html[cursor:m.start()])
+            self._huecos.append((len(self._segmentos), m.group(1) or m.group(2)))
+            self._segmentos.append(m.group(0))
+            cursor = m.end()
+        if cursor < len(html):
+            self._segmentos.append(html[cursor:])
+        self._segmentos.append(ENVOLTURA_HTML.split("{}")[1])
+
+        self.campos = {campo for _, campo in self._huecos}
+
+    @classmethod
+    def desde_docx(cls, archivo_docx: str, columnas=None) -> "PlantillaCompilada":
+        """
+        Convierte el archivo .docx a HTML con mammoth y lo separa en segmentos.
+        Args:
+            archivo_docx (str): Ruta del archivo Word.
+            columnas (iterable, opcional): Columnas del Excel; si se indican, las etiquetas sin columna
+                se informan una sola vez aquí.
+        Returns: PlantillaCompilada: Plantilla lista para renderizar filas.
+        """
+        if not os.path.exists(archivo_docx):
+            raise FileNotFoundError(f"El archivo '{archivo_docx}' no existe.")
+
+        import mammoth  # Se carga al compilar la primera plantilla, no al abrir la aplicación
+
+        with open(archivo_docx, "rb") as docx_file:
+            resultado = mammoth.convert_to_html(docx_file)
+
+        plantilla = cls(resultado.value, origen=archivo_docx)
+        logger.debug(f"Plantilla compilada: {archivo_docx} ({len(plantilla._huecos)} etiquetas)")
+        if columnas is not None:
+            plantilla.validar_campos(columnas)
+        return plantilla
+
+    def validar_campos(self, columnas) -> list:
+        """
+        Informa las etiquetas de la plantilla que no tienen columna en el Excel.
+        Args: columnas (iterable): Nombres de columna disponibles.
+        Returns: list: Campos desconocidos, ordenados.
+        """
+        desconocidos = sorted(self.campos - {str(c) for c in columnas})
+        if desconocidos:
+            logger.warning(f"Etiquetas sin columna en el Excel (no se reemplazarán): {desconocidos}")
+        return desconocidos
+
+    def renderizar(self, variables: dict) -> str:
+        """
+        Completa las etiquetas con los valores de la fila. Las etiquetas sin valor se dejan tal cual.
+        Args: variables (dict): Valores de la fila indexados por nombre de columna.
+        Returns: str: Cuerpo HTML del correo.
+        """
+        partes = self._segmentos.copy()
+        for indice, campo in self._huecos:
+            valor = variables.get(campo)
+            if valor is not None:
+                partes[indice] = str(valor)
+        return "".join(partes)
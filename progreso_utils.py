@@ -3,6 +3,8 @@ def callback_progreso_gui(fila_actual, total_filas, barra_progreso, porcentaje_v
     barra_progreso["value"] = porcentaje
     porcentaje_var.set(f"{porcentaje}%")
     status_var.set(f"Procesando fila {fila_actual} de {total_filas}")
-    status_label.pack(side="bottom", pady=(0, 5))
-    frame_progreso.pack(side="bottom", fill="x", padx=10, pady=5)
-    status_label.update_idletasks()
+    # Solo se empaquetan la primera vez: volver a hacerlo en cada fila obliga a recalcular el layout
+    if not status_label.winfo_manager():
+        status_label.pack(side="bottom", pady=(0, 5))
+    if not frame_progreso.winfo_manager():
+        frame_progreso.pack(side="bottom", fill="x", padx=10, pady=5)
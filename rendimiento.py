@@ -0,0 +1,324 @@
+"""
+Mediciones de rendimiento para desarrollo.
+Uso:
+    python rendimiento.py plantilla <archivo.docx> [--filas N]
+    python rendimiento.py sesion <cuenta> [--borradores N]
+    python rendimiento.py lote <archivo.xlsx> <archivo.docx> [--latencia S] [--perfilar]
+    python rendimiento.py arranque [--repeticiones N] [--presupuesto-importacion S] [--presupuesto-ventana S] [--sin-ventana]
+    python rendimiento.py registro [--mensajes N] [--errores-cada N]
+"""
+import argparse
+import cProfile
+import io
+import json
+import os
+import pstats
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from plantillas import PlantillaCompilada
+
+
+def variables_de_ejemplo(indice: int) -> dict:
+    """
+    Genera los valores de una fila con las columnas de resources/formato.xlsm.
+    """
+    return {
+        "Correo": f"contacto{indice}@ejemplo.com",
+        "Empresa": f"Empresa {indice}",
+        "Asunto": f"Propuesta #{indice}",
+        "Nombre": f"Nombre {indice}",
+    }
+
+
+def comparar_plantilla(ruta_docx: str, filas: int = 500) -> dict:
+    """
+    Compara convertir el .docx en cada fila (camino anterior) contra compilarlo una vez por lote.
+    Args: ruta_docx (str): Plantilla Word. filas (int): Número de filas simuladas.
+    Returns: dict: Tiempos totales, por fila y aceleración obtenida.
+    """
+    inicio = time.perf_counter()
+    for i in range(filas):
+        PlantillaCompilada.desde_docx(ruta_docx).renderizar(variables_de_ejemplo(i))
+    tiempo_por_fila = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    plantilla = PlantillaCompilada.desde_docx(ruta_docx)
+    for i in range(filas):
+        plantilla.renderizar(variables_de_ejemplo(i))
+    tiempo_compilada = time.perf_counter() - inicio
+
+    return {
+        "filas": filas,
+        "conversion_por_fila_s": round(tiempo_por_fila, 4),
+        "plantilla_compilada_s": round(tiempo_compilada, 4),
+        "ms_por_fila_antes": round(tiempo_por_fila * 1000 / filas, 4),
+        "ms_por_fila_despues": round(tiempo_compilada * 1000 / filas, 4),
+        "aceleracion": round(tiempo_por_fila / tiempo_compilada, 1) if tiempo_compilada else None,
+    }
+
+
+def medir_sesion_outlook(cuenta: str, borradores: int = 20) -> dict:
+    """
+    Mide borradores por minuto creando borradores de prueba (dirigidos a la propia cuenta)
+    con una sesión de Outlook por borrador y con una sesión compartida. Los borradores se eliminan al terminar.
+    Requiere Outlook abierto.
+    Args: cuenta (str): Cuenta SMTP de Outlook. borradores (int): Borradores por modo.
+    Returns: dict: Borradores por minuto en cada modo.
+    """
+    from borradores import crear_borrador
+    from outlook_utils import SesionOutlook
+
+    cuerpo = PlantillaCompilada("<p>Prueba de rendimiento DraftSender</p>").renderizar({})
+    creados = []
+
+    def ritmo(funcion):
+        inicio = time.perf_counter()
+        for i in range(borradores):
+            creados.append(funcion(i))
+        duracion = time.perf_counter() - inicio
+        return round(borradores * 60 / duracion, 1) if duracion > 0 else None
+
+    try:
+        antes = ritmo(lambda i: crear_borrador(cuenta, cuenta, f"[DraftSender rendimiento] {i}", cuerpo,
+                                               perfil_outlook=cuenta))
+        sesion = SesionOutlook(cuenta)
+        despues = ritmo(lambda i: crear_borrador(cuenta, cuenta, f"[DraftSender rendimiento] {i}", cuerpo,
+                                                 sesion=sesion))
+    finally:
+        for mensaje in creados:
+            try:
+                mensaje.Delete()
+            except Exception:
+                pass
+
+    return {
+        "borradores": borradores,
+        "borradores_por_minuto_antes": antes,
+        "borradores_por_minuto_despues": despues,
+    }
+
+
+def medir_lote(ruta_excel: str, ruta_docx: str, latencia: float = 0.0, perfilar: bool = False) -> dict:
+    """
+    Ejecuta generar_borradores contra el backend falso (sin Outlook) para medir y perfilar el lado Python.
+    Args: latencia (float): Segundos simulados por llamada al backend. perfilar (bool): Incluir las funciones más costosas.
+    Returns: dict: Borradores creados, duración, ritmo y, opcionalmente, el perfil de cProfile.
+    """
+    from backend_correo import BackendFalso
+    from borradores import generar_borradores
+
+    backend = BackendFalso(latencia=latencia)
+    perfil = cProfile.Profile() if perfilar else None
+    inicio = time.perf_counter()
+    if perfil:
+        perfil.enable()
+    creados = generar_borradores(backend.cuentas[0], "", ruta_excel, ruta_docx, backend=backend, reanudar=False)
+    if perfil:
+        perfil.disable()
+    duracion = time.perf_counter() - inicio
+
+    resultado = {
+        "borradores": creados,
+        "duracion_s": round(duracion, 3),
+        "borradores_por_minuto": round(creados * 60 / duracion, 1) if duracion > 0 else None,
+        "llamadas_backend": backend.llamadas,
+    }
+    if perfil:
+        salida = io.StringIO()
+        pstats.Stats(perfil, stream=salida).sort_stats("cumulative").print_stats(15)
+        resultado["perfil"] = salida.getvalue().splitlines()
+    return resultado
+
+
+# Módulos que no deben cargarse al abrir la ventana principal (se importan al usar su función)
+MODULOS_PESADOS = ("pandas", "numpy", "openpyxl", "mammoth", "docx", "PIL", "psutil", "win32com", "pythoncom",
+                   "certifi", "ssl")
+
+_SCRIPT_IMPORTACION = """
+import json, sys, time
+inicio = time.perf_counter()
+import gui
+print(json.dumps({"segundos": time.perf_counter() - inicio,
+                  "modulos_pesados": [m for m in %r if m in sys.modules]}))
+""" % (MODULOS_PESADOS,)
+
+_SCRIPT_VENTANA = """
+import json, time
+inicio = time.perf_counter()
+import tkinter as tk
+from gui import DraftSenderApp
+root = tk.Tk()
+DraftSenderApp(root)
+root.update()  # Primer dibujado de la ventana
+print(json.dumps({"segundos": time.perf_counter() - inicio}))
+root.destroy()
+"""
+
+
+def _ejecutar_en_interprete_nuevo(script: str) -> dict:
+    # Un intérprete nuevo por medición: nada queda importado de la anterior
+    proceso = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=120,
+                             cwd=os.path.dirname(os.path.abspath(__file__)))
+    if proceso.returncode != 0:
+        raise RuntimeError(proceso.stderr.strip().splitlines()[-1] if proceso.stderr.strip() else "sin salida")
+    return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+
+def medir_arranque(repeticiones: int = 3, presupuesto_importacion: float = 1.0, presupuesto_ventana: float = 2.0,
+                   ventana: bool = True) -> dict:
+    """
+    Mide el tiempo de importar gui y el tiempo hasta dibujar la ventana principal, cada uno en un intérprete nuevo,
+    y comprueba que no se carguen módulos pesados al iniciar.
+    Args: repeticiones (int): Mediciones por caso (se informa la mediana). presupuesto_* (float): Segundos máximos.
+        ventana (bool): Medir también la ventana (requiere entorno gráfico).
+    Returns: dict: Tiempos, módulos pesados cargados y si se cumple el presupuesto ("dentro_del_presupuesto").
+    """
+    importaciones = [_ejecutar_en_interprete_nuevo(_SCRIPT_IMPORTACION) for _ in range(repeticiones)]
+    importacion_s = statistics.median(m["segundos"] for m in importaciones)
+    resultado = {
+        "importacion_s": round(importacion_s, 3),
+        "presupuesto_importacion_s": presupuesto_importacion,
+        "modulos_pesados": importaciones[0]["modulos_pesados"],
+    }
+    dentro = importacion_s <= presupuesto_importacion and not resultado["modulos_pesados"]
+
+    if ventana:
+        try:
+            ventana_s = statistics.median(
+                _ejecutar_en_interprete_nuevo(_SCRIPT_VENTANA)["segundos"] for _ in range(repeticiones)
+            )
+            resultado["primera_ventana_s"] = round(ventana_s, 3)
+            dentro = dentro and ventana_s <= presupuesto_ventana
+        except Exception as e:
+            resultado["primera_ventana_error"] = str(e)
+            dentro = False
+        resultado["presupuesto_ventana_s"] = presupuesto_ventana
+
+    resultado["dentro_del_presupuesto"] = dentro
+    return resultado
+
+
+def _medir_llamadas(logger, mensajes: int, errores_cada: int) -> list:
+    # Como en los bucles de creación y envío: una línea por fila y, cada tanto, un error con traceback
+    duraciones = []
+    for i in range(mensajes):
+        inicio = time.perf_counter()
+        if errores_cada and i % errores_cada == 0:
+            try:
+                raise LookupError(f"Destinatarios no resueltos: contacto{i}@ejemplo.com")
+            except LookupError as e:
+                logger.error(f"Error en fila {i}: {e}", exc_info=True)
+        else:
+            logger.info(f"Borrador {i} creado para contacto{i}@ejemplo.com")
+        duraciones.append(time.perf_counter() - inicio)
+    return duraciones
+
+
+def _resumen_llamadas(duraciones: list) -> dict:
+    duraciones = sorted(duraciones)
+    return {
+        "us_por_llamada": round(statistics.mean(duraciones) * 1e6, 2),
+        "p99_us": round(duraciones[int(len(duraciones) * 0.99)] * 1e6, 2),
+        "max_us": round(duraciones[-1] * 1e6, 2),
+    }
+
+
+def medir_registro(mensajes: int = 5000, errores_cada: int = 10) -> dict:
+    """
+    Compara cuánto bloquea cada llamada al logger en el hilo que registra: handlers de archivo y consola
+    escritos en el mismo hilo (configuración anterior) contra la cola con listener de logger_utils.
+    La consola se envía a os.devnull para no mezclarla con el resultado.
+    Args: mensajes (int): Llamadas al logger. errores_cada (int): Cada cuántas llamadas se registra un error con traceback.
+    Returns: dict: Microsegundos por llamada en cada modo y tiempo que tardó el listener en vaciar la cola.
+    """
+    import logging
+    from logger_utils import crear_canal_asincrono, crear_manejador_archivo, _formato
+
+    with tempfile.TemporaryDirectory() as carpeta, open(os.devnull, "w") as consola_nula:
+        def consola():
+            handler = logging.StreamHandler(consola_nula)
+            handler.setFormatter(_formato)
+            return handler
+
+        sincrono = logging.getLogger("rendimiento.registro.sincrono")
+        archivo = logging.FileHandler(os.path.join(carpeta, "sincrono.log"), encoding="utf-8")
+        archivo.setFormatter(_formato)
+        for handler in (archivo, consola()):
+            sincrono.addHandler(handler)
+        sincrono.propagate = False
+        antes = _resumen_llamadas(_medir_llamadas(sincrono, mensajes, errores_cada))
+        archivo.close()
+
+        asincrono = logging.getLogger("rendimiento.registro.asincrono")
+        archivo = crear_manejador_archivo(os.path.join(carpeta, "asincrono.log"), max_bytes=1024 * 1024)
+        cola_handler, listener = crear_canal_asincrono(archivo, consola())
+        asincrono.addHandler(cola_handler)
+        asincrono.propagate = False
+        despues = _resumen_llamadas(_medir_llamadas(asincrono, mensajes, errores_cada))
+        inicio = time.perf_counter()
+        listener.stop()  # Espera a que el listener escriba todo lo encolado
+        despues["vaciado_cola_s"] = round(time.perf_counter() - inicio, 3)
+        archivo.close()
+        rotados = sorted(f for f in os.listdir(carpeta) if f.startswith("asincrono.log."))
+
+    return {
+        "mensajes": mensajes,
+        "errores_con_traceback": len(range(0, mensajes, errores_cada)) if errores_cada else 0,
+        "sincrono": antes,
+        "cola": despues,
+        "archivos_rotados": rotados,
+        "aceleracion": round(antes["us_por_llamada"] / despues["us_por_llamada"], 1) if despues["us_por_llamada"] else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mediciones de rendimiento de DraftSender")
+    subparsers = parser.add_subparsers(dest="medicion", required=True)
+
+    p_plantilla = subparsers.add_parser("plantilla", help="Conversión por fila vs plantilla compilada")
+    p_plantilla.add_argument("ruta_docx")
+    p_plantilla.add_argument("--filas", type=int, default=500)
+
+    p_sesion = subparsers.add_parser("sesion", help="Borradores por minuto: sesión por borrador vs compartida")
+    p_sesion.add_argument("cuenta")
+    p_sesion.add_argument("--borradores", type=int, default=20)
+
+    p_lote = subparsers.add_parser("lote", help="generar_borradores con el backend falso (sin Outlook)")
+    p_lote.add_argument("ruta_excel")
+    p_lote.add_argument("ruta_docx")
+    p_lote.add_argument("--latencia", type=float, default=0.0, help="Segundos simulados por llamada a Outlook")
+    p_lote.add_argument("--perfilar", action="store_true")
+
+    p_arranque = subparsers.add_parser("arranque", help="Importación y primera ventana contra un presupuesto")
+    p_arranque.add_argument("--repeticiones", type=int, default=3)
+    p_arranque.add_argument("--presupuesto-importacion", type=float, default=1.0, help="Segundos")
+    p_arranque.add_argument("--presupuesto-ventana", type=float, default=2.0, help="Segundos")
+    p_arranque.add_argument("--sin-ventana", action="store_true", help="Solo medir la importación")
+
+    p_registro = subparsers.add_parser("registro", help="Bloqueo por llamada al logger: síncrono vs cola")
+    p_registro.add_argument("--mensajes", type=int, default=5000)
+    p_registro.add_argument("--errores-cada", type=int, default=10, help="0 para no registrar tracebacks")
+
+    args = parser.parse_args(argv)
+    if args.medicion == "plantilla":
+        resultado = comparar_plantilla(args.ruta_docx, args.filas)
+    elif args.medicion == "sesion":
+        resultado = medir_sesion_outlook(args.cuenta, args.borradores)
+    elif args.medicion == "lote":
+        resultado = medir_lote(args.ruta_excel, args.ruta_docx, args.latencia, args.perfilar)
+    elif args.medicion == "arranque":
+        resultado = medir_arranque(args.repeticiones, args.presupuesto_importacion, args.presupuesto_ventana,
+                                   ventana=not args.sin_ventana)
+    elif args.medicion == "registro":
+        resultado = medir_registro(args.mensajes, args.errores_cada)
+    print(json.dumps(resultado, ensure_ascii=False, indent=2))
+    if resultado.get("dentro_del_presupuesto") is False:
+        sys.exit(1)  # Para usarlo como control en la integración continua
+
+
+if __name__ == "__main__":
+    main()
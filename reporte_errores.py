@@ -0,0 +1,105 @@
+import csv
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass, asdict, fields
+from datetime import datetime
+
+from logger_utils import configurar_logger
+from rutas import directorio_datos
+
+logger = configurar_logger("reporte_errores")
+
+
+@dataclass
+class ErrorEjecucion:
+    momento: str
+    etapa: str
+    fila: int
+    destinatario: str
+    tipo_error: str
+    mensaje: str
+
+
+class ReporteErrores:
+    """
+    Errores de una ejecución (creación o envío), acumulados sin detener el proceso.
+    Al terminar se guardan en CSV y JSON y se muestran una sola vez.
+    Args: proceso (str): "borradores" o "envios". cuenta (str): Cuenta de Outlook de la ejecución.
+    """
+
+    def __init__(self, proceso: str, cuenta: str = ""):
+        self.proceso = proceso
+        self.cuenta = cuenta
+        self.inicio = datetime.now()
+        # La cuenta evita que los reportes de envíos simultáneos desde varias cuentas se pisen
+        sufijo = "_" + re.sub(r"[^\w.@-]", "_", cuenta) if cuenta else ""
+        self.id_ejecucion = f"{proceso}_{self.inicio:%Y%m%d_%H%M%S_%f}{sufijo}"
+        self.errores = []
+        self.ruta_csv = None
+        self.ruta_json = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.errores)
+
+    def registrar(self, etapa: str, error, fila: int = None, destinatario: str = ""):
+        """
+        Agrega un error al reporte.
+        Args: etapa (str): Paso que falló (p. ej. "validacion", "crear_borrador", "enviar"). error (Exception | str): Error ocurrido.
+        """
+        registro = ErrorEjecucion(
+            momento=datetime.now().isoformat(timespec="seconds"),
+            etapa=etapa,
+            fila=fila,
+            destinatario=destinatario,
+            tipo_error=type(error).__name__ if isinstance(error, BaseException) else "",
+            mensaje=str(error),
+        )
+        with self._lock:
+            self.errores.append(registro)
+
+    def guardar(self, directorio: str = None):
+        """
+        Escribe el reporte en <id_ejecucion>.csv y <id_ejecucion>.json.
+        Args: directorio (str): Carpeta destino; por defecto la carpeta "reportes" de los datos del usuario.
+        Returns: tuple: Rutas (csv, json).
+        """
+        directorio = directorio or directorio_datos("reportes")
+        base = os.path.join(directorio, self.id_ejecucion)
+        self.ruta_csv, self.ruta_json = f"{base}.csv", f"{base}.json"
+
+        with open(self.ruta_csv, "w", newline="", encoding="utf-8-sig") as archivo:  # utf-8-sig: Excel abre bien los acentos
+            escritor = csv.DictWriter(archivo, fieldnames=[f.name for f in fields(ErrorEjecucion)])
+            escritor.writeheader()
+            escritor.writerows(asdict(e) for e in self.errores)
+
+        with open(self.ruta_json, "w", encoding="utf-8") as archivo:
+            json.dump({
+                "id_ejecucion": self.id_ejecucion,
+                "proceso": self.proceso,
+                "cuenta": self.cuenta,
+                "inicio": self.inicio.isoformat(timespec="seconds"),
+                "total_errores": len(self.errores),
+                "errores": [asdict(e) for e in self.errores],
+            }, archivo, ensure_ascii=False, indent=2)
+
+        logger.info(f"Reporte de errores guardado: {self.ruta_csv}")
+        return self.ruta_csv, self.ruta_json
+
+    def resumen(self, limite: int = 10) -> str:
+        """
+        Texto para mostrar al final de la ejecución: total, primeros errores y ubicación del reporte.
+        """
+        if not self.errores:
+            return "Sin errores."
+        lineas = [f"{len(self.errores)} errores:"]
+        for e in self.errores[:limite]:
+            origen = f"Fila {e.fila}" if e.fila else e.destinatario or e.etapa
+            lineas.append(f"{origen}: {e.mensaje}")
+        if len(self.errores) > limite:
+            lineas.append(f"... y {len(self.errores) - limite} más.")
+        if self.ruta_csv:
+            lineas.append(f"\nReporte completo: {self.ruta_csv}")
+        return "\n".join(lineas)
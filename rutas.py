@@ -0,0 +1,18 @@
+import os
+import sys
+
+
+def directorio_datos(*subcarpetas: str) -> str:
+    """
+    Devuelve (y crea si no existe) una carpeta de datos de la aplicación para el usuario actual.
+    En Windows es %LOCALAPPDATA%\\DraftSender; en otros sistemas, ~/.draftsender.
+    Args: *subcarpetas (str): Subcarpetas dentro del directorio de datos (p. ej. "reportes").
+    Returns: str: Ruta absoluta de la carpeta.
+    """
+    if sys.platform == "win32":
+        base = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.expanduser("~"), "DraftSender")
+    else:
+        base = os.path.join(os.path.expanduser("~"), ".draftsender")
+    ruta = os.path.abspath(os.path.join(base, *subcarpetas))
+    os.makedirs(ruta, exist_ok=True)
+    return ruta
@@ -0,0 +1,45 @@
+import os
+import sys
+
+import pytest
+
+# Los módulos de la aplicación están en la raíz del repositorio, no en un paquete instalable
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+@pytest.fixture(autouse=True)
+def datos_usuario(tmp_path, monkeypatch):
+    """
+    Carpeta de datos del usuario temporal (reportes, diario, auditoría) y backend falso nuevo en cada prueba.
+    """
+    import backend_correo
+
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path))
+    monkeypatch.setenv("DRAFTSENDER_BACKEND", "falso")
+    monkeypatch.setattr(backend_correo, "_backend_falso_compartido", None)
+    return tmp_path
+
+
+def crear_excel(ruta, filas):
+    """
+    Excel con las columnas obligatorias y una fila por tupla (Correo, Asunto, Nombre).
+    """
+    from openpyxl import Workbook
+
+    libro = Workbook()
+    hoja = libro.active
+    hoja.append(["Correo", "Asunto", "Nombre"])
+    for fila in filas:
+        hoja.append(list(fila))
+    libro.save(ruta)
+    return str(ruta)
+
+
+def crear_docx(ruta, texto="Hola [Nombre]"):
+    from docx import Document
+
+    documento = Document()
+    documento.add_paragraph(texto)
+    documento.save(ruta)
+    return str(ruta)
@@ -0,0 +1,84 @@
+import json
+import os
+
+import pytest
+
+import cli
+from conftest import crear_docx, crear_excel
+from rutas import directorio_datos
+
+CUENTA = "usuario@ejemplo.com"  # Única cuenta del backend falso por defecto
+SIN_ESPERA = ["--por-minuto", "100000", "--rafaga", "100"]
+
+
+def eventos(capsys) -> list:
+    return [json.loads(linea) for linea in capsys.readouterr().out.splitlines()]
+
+
+@pytest.fixture
+def archivos(tmp_path):
+    excel = crear_excel(tmp_path / "lista.xlsx", [(f"d{i}@x.com", f"Asunto {i}", f"Nombre {i}") for i in range(3)])
+    docx = crear_docx(tmp_path / "plantilla.docx")
+    return excel, docx
+
+
+def test_crear_y_enviar_sin_errores(archivos, capsys):
+    excel, docx = archivos
+    codigo = cli.main(["--backend", "falso", "crear-y-enviar", "--excel", excel, "--docx", docx,
+                       "--cuenta", CUENTA, *SIN_ESPERA])
+    assert codigo == cli.EXITO
+    finales = {e["evento"]: e for e in eventos(capsys) if e["evento"].startswith("fin_")}
+    assert finales["fin_borradores"]["creados"] == 3
+    assert finales["fin_envio"]["enviados"] == 3
+
+
+def test_filas_con_errores(tmp_path, archivos, capsys):
+    _, docx = archivos
+    excel = crear_excel(tmp_path / "errores.xlsx", [("d1@x.com", "Asunto", "Nombre"), ("malo@", "Asunto", "")])
+    assert cli.main(["crear", "--excel", excel, "--docx", docx, "--cuenta", CUENTA]) == cli.CON_ERRORES
+    validacion = next(e for e in eventos(capsys) if e["evento"] == "validacion")
+    assert validacion["filas_invalidas"] == 1
+
+    assert cli.main(["crear", "--excel", excel, "--docx", docx, "--cuenta", CUENTA, "--estricto"]) == cli.CON_ERRORES
+
+
+def test_argumentos_incorrectos():
+    with pytest.raises(SystemExit) as salida:
+        cli.main(["enviar"])
+    assert salida.value.code == cli.USO
+
+
+def test_fallo(tmp_path, archivos, capsys):
+    _, docx = archivos
+    codigo = cli.main(["crear", "--excel", str(tmp_path / "no_existe.xlsx"), "--docx", docx, "--cuenta", CUENTA])
+    assert codigo == cli.FALLO
+    assert eventos(capsys)[-1]["evento"] == "error"
+
+    assert cli.main(["enviar", "--cuenta", "desconocida@x.com", *SIN_ESPERA]) == cli.FALLO
+
+
+def test_interrumpido(archivos, monkeypatch):
+    excel, docx = archivos
+
+    def interrumpir(hilos, detener):
+        detener()
+        for hilo in hilos:
+            hilo.join()
+        return True
+
+    monkeypatch.setattr(cli, "esperar_hilos", interrumpir)
+    assert cli.main(["crear", "--excel", excel, "--docx", docx, "--cuenta", CUENTA]) == cli.INTERRUMPIDO
+
+
+def test_intervalo_por_defecto_para_cuentas_sin_ritmo():
+    with open(os.path.join(directorio_datos(), "limites_envio.json"), "w", encoding="utf-8") as archivo:
+        archivo.write('{"otra@x.com": {"por_hora": 30}}')
+    args = cli.crear_parser().parse_args(["enviar", "--cuenta", CUENTA, "--cuenta", "otra@x.com",
+                                          "--rafaga", "3"])
+    planificador = cli.crear_planificador_cli(args)
+    assert planificador.limites_de(CUENTA).intervalo_minimo == cli.INTERVALO_POR_DEFECTO
+    assert planificador.limites_de(CUENTA).rafaga == 3
+    args = cli.crear_parser().parse_args(["enviar", "--cuenta", CUENTA, "--cuenta", "otra@x.com"])
+    planificador = cli.crear_planificador_cli(args)
+    assert planificador.limites_de(CUENTA).intervalo_minimo == cli.INTERVALO_POR_DEFECTO
+    assert planificador.limites_de("otra@x.com").intervalo_minimo is None
@@ -0,0 +1,53 @@
+from backend_correo import BackendFalso, Borrador
+from cola_envio import ColaEnvio, PoliticaReintentos
+from envios import enviar_borradores
+from planificador import LimitesEnvio, PlanificadorEnvios
+
+SIN_ESPERA = PlanificadorEnvios(LimitesEnvio(intervalo_minimo=0.001, rafaga=100))
+
+
+def test_cola_en_orden_sin_duplicados():
+    cola = ColaEnvio([Borrador("1", "a@x.com", "A"), Borrador("2", "b@x.com", "B")])
+    cola.agregar(Borrador("2", "b@x.com", "B"))
+    cola.agregar(Borrador("3", "c@x.com", "C"))
+    assert len(cola) == 3
+    assert [b.id for b in cola.proximos(5)] == ["1", "2", "3"]
+    assert [cola.siguiente().borrador.id for _ in range(3)] == ["1", "2", "3"]
+    assert cola.siguiente() is None
+    assert cola.espera_reintento() is None
+
+
+def test_fallo_pone_en_cuarentena_y_reintenta():
+    cola = ColaEnvio([Borrador("1", "a@x.com", "A")], PoliticaReintentos(max_intentos=2, espera_inicial=0))
+    elemento = cola.siguiente()
+    assert cola.fallo(elemento, "Q1")
+    assert elemento.en_cuarentena and elemento.borrador.id == "Q1"
+    assert cola.espera_reintento() == 0
+
+    reintento = cola.siguiente()
+    assert reintento is elemento
+    cola.reubicar(reintento, "2")
+    cola.agregar(Borrador("2", "a@x.com", "A"))  # Aviso de la carpeta al devolverlo a Borradores
+    assert not reintento.en_cuarentena and len(cola) == 0
+
+    assert not cola.fallo(reintento, "Q2")  # Agotó sus intentos: queda en cuarentena
+    assert cola.siguiente() is None and cola.espera_reintento() is None
+
+
+def test_politica_reintentos_espera_exponencial():
+    politica = PoliticaReintentos(espera_inicial=10, factor=3)
+    assert [politica.espera(n) for n in (1, 2, 3)] == [10, 30, 90]
+
+
+def test_envio_deja_en_cuarentena_el_destinatario_no_resoluble():
+    backend = BackendFalso(no_resolubles=["malo@x.com"])
+    cuenta = backend.cuentas[0]
+    for destinatario in ("uno@x.com", "malo@x.com", "dos@x.com"):
+        backend.crear_borrador(cuenta, destinatario, "Asunto", "<p>Hola</p>")
+
+    enviados = enviar_borradores(cuenta, backend=backend, planificador=SIN_ESPERA,
+                                 politica_reintentos=PoliticaReintentos(max_intentos=2, espera_inicial=0))
+    assert enviados == 2
+    assert [b.destinatario for b in backend.enviados] == ["uno@x.com", "dos@x.com"]
+    assert [b.destinatario for b in backend.cuarentena[cuenta.lower()].values()] == ["malo@x.com"]
+    assert not backend.borradores[cuenta.lower()]
@@ -0,0 +1,62 @@
+from diario import DiarioEjecucion, huella_archivo
+
+
+def abrir(ruta_excel, cuenta="Ventas@x.com", huella_plantilla="plantilla1", ruta_db=None):
+    return DiarioEjecucion(str(ruta_excel), cuenta, huella_plantilla, ruta_db=str(ruta_db))
+
+
+def test_reanuda_con_la_misma_hoja_plantilla_y_cuenta(tmp_path):
+    excel = tmp_path / "lista.xlsx"
+    excel.write_bytes(b"contenido")
+    db = tmp_path / "diario.sqlite3"
+
+    diario = abrir(excel, ruta_db=db)
+    diario.marcar(2, "ID2")
+    diario.marcar(3, "ID3")
+    diario.cerrar()
+
+    diario = abrir(excel, cuenta="ventas@x.com", ruta_db=db)  # La cuenta no distingue mayúsculas
+    assert diario.completadas() == {2, 3}
+    diario.cerrar()
+
+
+def test_la_clave_incluye_plantilla_cuenta_y_contenido(tmp_path):
+    excel = tmp_path / "lista.xlsx"
+    excel.write_bytes(b"contenido")
+    db = tmp_path / "diario.sqlite3"
+    diario = abrir(excel, ruta_db=db)
+    diario.marcar(2)
+    diario.cerrar()
+
+    for otro in (abrir(excel, huella_plantilla="plantilla2", ruta_db=db),
+                 abrir(excel, cuenta="otra@x.com", ruta_db=db)):
+        assert otro.completadas() == set()
+        otro.cerrar()
+
+    # Con otro contenido es otra hoja, aunque el archivo se llame igual
+    excel.write_bytes(b"contenido editado")
+    diario = abrir(excel, ruta_db=db)
+    assert diario.completadas() == set()
+    diario.cerrar()
+
+    # La misma hoja con otro nombre sí se reanuda
+    copia = tmp_path / "copia.xlsx"
+    copia.write_bytes(b"contenido")
+    assert huella_archivo(str(copia)) != huella_archivo(str(excel))  # El original ya se editó
+    diario = abrir(copia, ruta_db=db)
+    assert diario.completadas() == {2}
+    diario.cerrar()
+
+
+def test_confirma_por_bloques_y_reinicia(tmp_path):
+    excel = tmp_path / "lista.xlsx"
+    excel.write_bytes(b"contenido")
+    db = tmp_path / "diario.sqlite3"
+    diario = DiarioEjecucion(str(excel), "a@x.com", "p", ruta_db=str(db), lote=2, intervalo=3600)
+    diario.marcar(2)
+    assert abrir(excel, cuenta="a@x.com", huella_plantilla="p", ruta_db=db).completadas() == set()
+    diario.marcar(3)
+    assert abrir(excel, cuenta="a@x.com", huella_plantilla="p", ruta_db=db).completadas() == {2, 3}
+    diario.reiniciar()
+    assert diario.completadas() == set()
+    diario.cerrar()
@@ -0,0 +1,45 @@
+from eventos import BusEventos
+
+
+def test_fusiona_el_progreso_por_tipo_y_cuenta():
+    bus = BusEventos()
+    recibidos = []
+    bus.suscribir("progreso_envio", lambda cuenta, enviados: recibidos.append(("progreso", cuenta, enviados)))
+    bus.suscribir("fin_envio", lambda cuenta, enviados: recibidos.append(("fin", cuenta, enviados)))
+
+    for enviados in range(1, 4):
+        bus.publicar("progreso_envio", cuenta="a@x.com", enviados=enviados)
+        bus.publicar("progreso_envio", cuenta="b@x.com", enviados=enviados * 10)
+    bus.publicar("fin_envio", cuenta="a@x.com", enviados=3)
+    bus.despachar_pendientes()
+
+    # Solo el último progreso de cada cuenta; los demás eventos se entregan todos y en orden
+    assert recibidos == [("progreso", "a@x.com", 3), ("progreso", "b@x.com", 30), ("fin", "a@x.com", 3)]
+
+
+def test_publicar_sin_suscriptores_descarta_el_evento():
+    bus = BusEventos()
+    bus.publicar("fin_envio", cuenta="a@x.com")
+    recibidos = []
+    bus.suscribir("fin_envio", lambda **datos: recibidos.append(datos))
+    bus.despachar_pendientes()
+    assert recibidos == []
+
+
+def test_un_manejador_con_error_no_detiene_a_los_demas():
+    bus = BusEventos()
+    recibidos = []
+
+    def fallar(**datos):
+        raise RuntimeError("falla")
+
+    bus.suscribir("fin_envio", fallar)
+    bus.suscribir("fin_envio", lambda **datos: recibidos.append(datos))
+    bus.publicar("fin_envio", cuenta="a@x.com")
+    bus.despachar_pendientes()
+    assert recibidos == [{"cuenta": "a@x.com"}]
+
+    bus.desuscribir("fin_envio", fallar)
+    bus.publicar("fin_envio", cuenta="b@x.com")
+    bus.despachar_pendientes()
+    assert recibidos[-1] == {"cuenta": "b@x.com"}
@@ -0,0 +1,155 @@
+from datetime import datetime, time as hora
+
+import pytest
+
+import planificador
+from planificador import CubetaTokens, CupoPeriodo, LimitesEnvio, PlanificadorEnvios, VentanaEnvio, cargar_limites
+
+LUNES = datetime(2024, 5, 6)  # weekday() == 0
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 0.0
+
+    def __call__(self):
+        return self.ahora
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(planificador.time, "monotonic", reloj)
+    return reloj
+
+
+def enviar(planificador_envios, reloj, cuenta, cantidad):
+    """
+    Simula `cantidad` envíos avanzando el reloj lo que pide el planificador. Returns: momentos de cada envío.
+    """
+    momentos = []
+    for _ in range(cantidad):
+        reloj.ahora += planificador_envios.espera(cuenta)
+        assert planificador_envios.esperar_turno(cuenta)
+        momentos.append(reloj.ahora)
+    return momentos
+
+
+def test_ventana_abierta_en_horario():
+    ventana = VentanaEnvio(hora(9), hora(18), dias=(0, 1, 2, 3, 4))
+    assert ventana.abierta(LUNES.replace(hour=9))
+    assert not ventana.abierta(LUNES.replace(hour=18))
+    assert not ventana.abierta(LUNES.replace(day=11, hour=10))  # Sábado
+    assert ventana.segundos_hasta_abrir(LUNES.replace(hour=12)) == 0
+    assert ventana.segundos_hasta_abrir(LUNES.replace(hour=8)) == 3600
+    # Viernes por la tarde: abre el lunes siguiente
+    assert ventana.segundos_hasta_abrir(LUNES.replace(day=10, hour=18)) == (2 * 24 + 15) * 3600
+
+
+def test_ventana_que_cruza_medianoche():
+    ventana = VentanaEnvio(hora(22), hora(6), dias=(0,))
+    assert ventana.cruza_medianoche
+    assert ventana.abierta(LUNES.replace(hour=23))
+    assert ventana.abierta(LUNES.replace(day=7, hour=5))  # Madrugada del martes: sigue la del lunes
+    assert not ventana.abierta(LUNES.replace(day=7, hour=6))
+    assert not ventana.abierta(LUNES.replace(hour=5))  # La del domingo no está habilitada
+    assert not ventana.abierta(LUNES.replace(day=7, hour=23))
+    assert ventana.segundos_hasta_abrir(LUNES.replace(hour=7)) == 15 * 3600
+    assert ventana.segundos_hasta_abrir(LUNES.replace(day=7, hour=7)) == (6 * 24 + 15) * 3600
+
+
+def test_ventana_sin_dias_habilitados():
+    with pytest.raises(ValueError):
+        VentanaEnvio(dias=()).segundos_hasta_abrir(LUNES)
+
+
+def test_cubeta_tokens_permite_rafaga_y_luego_ritmo(reloj):
+    cubeta = CubetaTokens(tasa=0.5, capacidad=2)
+    for _ in range(2):
+        assert cubeta.espera(0.0) == 0
+        cubeta.consumir(0.0)
+    assert cubeta.espera(0.0) == pytest.approx(2.0)
+    assert cubeta.espera(1.0) == pytest.approx(1.0)
+    assert cubeta.espera(2.0) == 0
+
+
+def test_cupo_periodo_cuenta_los_envios_del_periodo():
+    cupo = CupoPeriodo(limite=2, periodo=60)
+    cupo.consumir(0.0)
+    cupo.consumir(10.0)
+    assert cupo.espera(30.0) == pytest.approx(30.0)
+    assert cupo.espera(60.0) == 0
+
+
+def test_espera_respeta_cupo_por_hora_y_por_dia(reloj):
+    planificador_envios = PlanificadorEnvios(LimitesEnvio(por_hora=30, por_dia=300))
+    momentos = enviar(planificador_envios, reloj, "a@x.com", 301)
+    assert momentos[299] < 10 * 3600  # El cupo diario no frena el ritmo por hora
+    assert momentos[300] >= 24 * 3600  # El envío 301 espera a que se libere el cupo diario
+    for i in range(30, 300):
+        assert momentos[i] - momentos[i - 30] >= 3600
+
+
+def test_espera_con_rafaga_respeta_cupo_por_minuto(reloj):
+    planificador_envios = PlanificadorEnvios(LimitesEnvio(por_minuto=2, rafaga=3))
+    assert enviar(planificador_envios, reloj, "a@x.com", 6) == [0, 0, 60, 60, 120, 120]
+
+
+def test_espera_por_cuenta(reloj):
+    planificador_envios = PlanificadorEnvios(LimitesEnvio(intervalo_minimo=10),
+                                             {"Lenta@x.com": LimitesEnvio(intervalo_minimo=100)})
+    assert enviar(planificador_envios, reloj, "rapida@x.com", 2) == [0, 10]
+    reloj.ahora = 0.0
+    assert enviar(planificador_envios, reloj, "lenta@x.com", 2) == [0, 100]
+
+
+def test_intervalo_no_relaja_el_configurado(reloj):
+    configurados = {"a@x.com": LimitesEnvio(intervalo_minimo=120)}
+    planificador_envios = planificador.crear_planificador(60, configurados)
+    assert planificador_envios.limites_de("a@x.com").intervalo_minimo == 120
+    assert planificador_envios.limites_de("b@x.com").intervalo_minimo == 60
+    assert configurados["a@x.com"].intervalo_minimo == 120
+
+
+def test_fijar_intervalo_conserva_los_cupos(reloj):
+    planificador_envios = PlanificadorEnvios(LimitesEnvio(por_hora=2, rafaga=2), intervalo_minimo=10)
+    assert enviar(planificador_envios, reloj, "a@x.com", 2) == [0, 0]
+    planificador_envios.fijar_intervalo_minimo(20)
+    assert planificador_envios.limites_de("a@x.com").intervalo_minimo == 20
+    assert enviar(planificador_envios, reloj, "a@x.com", 1) == [3600]
+
+
+def test_estimar_duracion():
+    planificador_envios = PlanificadorEnvios(LimitesEnvio(por_hora=30, por_dia=300))
+    assert planificador_envios.estimar_duracion("a@x.com", 300) == pytest.approx(299 * 120)
+    assert planificador_envios.estimar_duracion("a@x.com", 301) == 24 * 3600
+    assert planificador_envios.estimar_duracion("a@x.com", 0) == 0
+
+    planificador_envios = PlanificadorEnvios(LimitesEnvio(intervalo_minimo=10, rafaga=5, jitter=4))
+    assert planificador_envios.estimar_duracion("a@x.com", 10) == pytest.approx(5 * 10 + 10 * 2)
+
+
+def test_cargar_limites_omite_solo_la_entrada_invalida(tmp_path):
+    ruta = tmp_path / "limites_envio.json"
+    ruta.write_text(
+        '{"*": {"por_hora": 30},'
+        ' "mala@x.com": {"por_minutos": 3},'
+        ' "ventana@x.com": {"ventana": {"inicio": "09:00", "fin": "09:00"}},'
+        ' "buena@x.com": {"intervalo_minimo": 120, "ventana": {"inicio": "22:00", "fin": "06:00"}}}',
+        encoding="utf-8",
+    )
+    errores = []
+    limites = cargar_limites(str(ruta), errores)
+    assert set(limites) == {"*", "buena@x.com"}
+    assert limites["buena@x.com"].ventana.cruza_medianoche
+    assert len(errores) == 2 and "mala@x.com" in errores[0] and "ventana@x.com" in errores[1]
+
+
+def test_cargar_limites_archivo_ilegible(tmp_path):
+    ruta = tmp_path / "limites_envio.json"
+    ruta.write_text("{no es json", encoding="utf-8")
+    errores = []
+    assert cargar_limites(str(ruta), errores) == {}
+    assert len(errores) == 1
+    assert cargar_limites(str(tmp_path / "no_existe.json"), errores) == {}
+    assert len(errores) == 1
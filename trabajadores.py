@@ -0,0 +1,147 @@
+import threading
+from logger_utils import configurar_logger
+from eventos import bus_eventos
+from reporte_errores import ReporteErrores
+
+logger = configurar_logger("trabajadores")
+
+
+class ControlEjecucion:
+    """
+    Pausa y cancelación cooperativas para un proceso en segundo plano.
+    El proceso llama a esperar_si_pausado() entre fila y fila; la interfaz llama a pausar(), reanudar() o cancelar().
+    """
+
+    def __init__(self):
+        self._cancelado = threading.Event()
+        self._en_marcha = threading.Event()
+        self._en_marcha.set()
+
+    @property
+    def cancelado(self) -> bool:
+        return self._cancelado.is_set()
+
+    @property
+    def pausado(self) -> bool:
+        return not self._en_marcha.is_set()
+
+    def pausar(self):
+        self._en_marcha.clear()
+
+    def reanudar(self):
+        self._en_marcha.set()
+
+    def cancelar(self):
+        self._cancelado.set()
+        self._en_marcha.set()  # Libera al proceso si estaba en pausa
+
+    def esperar_si_pausado(self) -> bool:
+        """
+        Bloquea mientras el proceso esté en pausa.
+        Returns: bool: False si el proceso fue cancelado y debe terminar.
+        """
+        self._en_marcha.wait()
+        return not self.cancelado
+
+
+class TrabajadorValidacion(threading.Thread):
+    """
+    Valida el Excel (validar_hoja) en un hilo propio, para que la ventana no se congele con hojas grandes.
+    Publica "fin_validacion" (reporte, error y los `parametros` recibidos) en bus_eventos al terminar;
+    la interfaz decide entonces si se crean los borradores.
+    Args:
+        ruta_excel (str): Excel a validar.
+        parametros (dict): Datos que se devuelven tal cual con el resultado (p. ej. los de la creación de borradores).
+    """
+
+    def __init__(self, ruta_excel: str, parametros: dict = None):
+        super().__init__(name="TrabajadorValidacion", daemon=True)
+        self.ruta_excel = ruta_excel
+        self.parametros = parametros or {}
+
+    def run(self):
+        from validacion import validar_hoja
+
+        reporte, error = None, None
+        try:
+            reporte = validar_hoja(self.ruta_excel)
+        except Exception as e:
+            logger.exception("No se pudo validar el Excel")
+            error = e
+        finally:
+            bus_eventos.publicar("fin_validacion", reporte=reporte, error=error, parametros=self.parametros)
+
+
+class TrabajadorBorradores(threading.Thread):
+    """
+    Ejecuta generar_borradores en un hilo propio, con su propio apartamento COM (lo abre el backend),
+    para que la ventana siga respondiendo durante lotes largos.
+    El avance y el final se publican en bus_eventos ("progreso_borradores" y "fin_borradores"),
+    salvo que se indique callback_progreso.
+    Args:
+        al_terminar (callable): Se llama desde el hilo del trabajador con (cantidad, error) al finalizar (opcional).
+        **parametros: Argumentos de generar_borradores.
+    """
+
+    def __init__(self, al_terminar=None, **parametros):
+        super().__init__(name="TrabajadorBorradores", daemon=True)
+        self.control = ControlEjecucion()
+        self.al_terminar = al_terminar
+        self.parametros = parametros
+        self.reporte_errores = parametros.setdefault("reporte_errores", ReporteErrores("borradores", parametros.get("cuenta", "")))
+        if not self.parametros.get("callback_progreso"):
+            self.parametros["callback_progreso"] = self._publicar_progreso
+
+    @staticmethod
+    def _publicar_progreso(fila_actual, total_filas):
+        bus_eventos.publicar("progreso_borradores", fila_actual=fila_actual, total_filas=total_filas)
+
+    def run(self):
+        from borradores import generar_borradores
+
+        cantidad, error = 0, None
+        try:
+            cantidad = generar_borradores(control=self.control, **self.parametros)
+            logger.info(f"{cantidad} borradores creados correctamente.")
+        except Exception as e:
+            logger.exception("Fallo al crear borradores en segundo plano")
+            error = e
+        finally:
+            bus_eventos.publicar("fin_borradores", cantidad=cantidad, error=error, cancelado=self.control.cancelado,
+                                 reporte=self.reporte_errores)
+            if self.al_terminar:
+                self.al_terminar(cantidad, error)
+
+
+class TrabajadorEnvios(threading.Thread):
+    """
+    Ejecuta enviar_borradores para una cuenta en un hilo propio, con su propio apartamento COM
+    (lo abre el backend) y su propio control de detención.
+    El avance y el final se publican en bus_eventos ("progreso_envio" y "fin_envio") con la cuenta.
+    Args:
+        cuenta (str): Cuenta SMTP desde la que se envía.
+        al_terminar (callable): Se llama desde el hilo del trabajador con (cuenta, enviados, error) al finalizar (opcional).
+        **parametros: Argumentos adicionales de enviar_borradores (intervalo, planificador, politica_reintentos...).
+    """
+
+    def __init__(self, cuenta: str, al_terminar=None, **parametros):
+        super().__init__(name=f"TrabajadorEnvios-{cuenta}", daemon=True)
+        self.cuenta = cuenta
+        self.control = ControlEjecucion()
+        self.al_terminar = al_terminar
+        self.parametros = parametros
+        self.reporte_errores = parametros.setdefault("reporte_errores", ReporteErrores("envios", cuenta))
+        self.enviados = 0
+        self.error = None
+
+    def run(self):
+        from envios import enviar_borradores
+
+        try:
+            self.enviados = enviar_borradores(self.cuenta, control=self.control, **self.parametros)
+        except Exception as e:
+            logger.exception(f"Fallo al enviar borradores de {self.cuenta} en segundo plano")
+            self.error = e
+        finally:
+            if self.al_terminar:
+                self.al_terminar(self.cuenta, self.enviados, self.error)
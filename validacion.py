@@ -0,0 +1,95 @@
+import re
+from dataclasses import dataclass, field
+
+from logger_utils import configurar_logger
+from lector_excel import LectorExcel, indice_a_letra_columna
+
+logger = configurar_logger("validacion")
+
+COLUMNAS_OBLIGATORIAS = ("Correo", "Asunto", "Nombre")
+PATRON_EMAIL = re.compile(r"^[\w\.-]+@[\w\.-]+\.\w+$")
+
+
+@dataclass
+class ErrorValidacion:
+    fila: int
+    columna: str
+    celda: str
+    motivo: str
+    valor: str = ""
+
+    def __str__(self):
+        detalle = f": {self.valor}" if self.valor else ""
+        return f"Fila {self.fila}, celda {self.celda} ({self.columna}): {self.motivo}{detalle}"
+
+
+@dataclass
+class ReporteValidacion:
+    total_filas: int = 0
+    errores: list = field(default_factory=list)
+
+    @property
+    def filas_invalidas(self) -> set:
+        return {error.fila for error in self.errores}
+
+    @property
+    def valido(self) -> bool:
+        return not self.errores
+
+    def resumen(self, limite: int = 15) -> str:
+        """
+        Texto con el total de filas con errores y el detalle de los primeros.
+        """
+        if self.valido:
+            return f"Las {self.total_filas} filas son válidas."
+        lineas = [f"{len(self.filas_invalidas)} de {self.total_filas} filas tienen errores:"]
+        lineas += [str(error) for error in self.errores[:limite]]
+        if len(self.errores) > limite:
+            lineas.append(f"... y {len(self.errores) - limite} errores más.")
+        return "\n".join(lineas)
+
+
+def validar_hoja(ruta_excel: str) -> ReporteValidacion:
+    """
+    Valida toda la primera hoja del Excel en una sola pasada, antes de tocar Outlook. La hoja se recorre fila a
+    fila con LectorExcel, guardando solo las columnas obligatorias, y luego se valida columna por columna.
+    Revisa que Correo, Asunto y Nombre no estén vacíos y que Correo tenga formato de email.
+    Las filas completamente vacías se ignoran, igual que al generar los borradores.
+    Args: ruta_excel (str): Ruta del archivo Excel.
+    Returns: ReporteValidacion: Todas las filas con errores, con su celda (p. ej. "D7").
+    """
+    with LectorExcel(ruta_excel) as lector:
+        faltantes = [c for c in COLUMNAS_OBLIGATORIAS if c not in lector.indices]
+        if faltantes:
+            raise ValueError(f"El Excel debe contener las columnas: {', '.join(COLUMNAS_OBLIGATORIAS)}")
+
+        # En el orden de la hoja, para listar los errores de cada fila de izquierda a derecha
+        columnas = sorted(COLUMNAS_OBLIGATORIAS, key=lector.indices.get)
+        letras = {c: indice_a_letra_columna(lector.indices[c]) for c in columnas}
+        numeros = []
+        valores = {c: [] for c in columnas}
+        for fila in lector.filas(columnas):
+            numeros.append(fila.numero)
+            for columna in columnas:
+                valores[columna].append(fila[columna])
+
+    errores = []  # (fila, posición de la columna, error)
+    for posicion, columna in enumerate(columnas):
+        letra = letras[columna]
+        errores += [
+            (numero, posicion, ErrorValidacion(numero, columna, f"{letra}{numero}", "campo vacío"))
+            for numero, valor in zip(numeros, valores[columna]) if not valor
+        ]
+        if columna == "Correo":
+            errores += [
+                (numero, posicion, ErrorValidacion(numero, columna, f"{letra}{numero}", "correo inválido", valor))
+                for numero, valor in zip(numeros, valores[columna]) if valor and not PATRON_EMAIL.match(valor)
+            ]
+    errores.sort(key=lambda e: e[:2])
+    reporte = ReporteValidacion(len(numeros), [error for _, _, error in errores])
+
+    if reporte.valido:
+        logger.info(f"Validación correcta: {reporte.total_filas} filas.")
+    else:
+        logger.warning(f"Validación: {len(reporte.filas_invalidas)} de {reporte.total_filas} filas con errores.")
+    return reporte
@@ -0,0 +1,329 @@
+import sys
+import os
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from logger_utils import configurar_logger
+from coordinador_envios import CoordinadorEnvios
+from contador_borradores import ContadorBorradores
+from eventos import bus_eventos
+from planificador import PlanificadorEnvios, cargar_limites, crear_planificador
+
+logger = configurar_logger("ventana_envios")
+
+_ventana_abierta = None  # Única VentanaEnvios del proceso (ver lanzar_envio_desde_gui)
+
+
+def formato_duracion(segundos) -> str:
+    horas, resto = divmod(max(int(segundos), 0), 3600)
+    minutos, segundos = divmod(resto, 60)
+    return f"{horas:02}:{minutos:02}:{segundos:02}"
+
+
+class FilaCuenta:
+    """
+    Widgets y estado de una cuenta en la ventana de envíos.
+    """
+
+    def __init__(self, master, cuenta: str, seleccionada: bool, al_detener):
+        self.cuenta = cuenta
+        self.seleccionada = tk.BooleanVar(value=seleccionada)
+        self.restantes = 0
+        self.enviados = 0
+        self.segundos_restantes = 0
+        self.en_marcha = False
+
+        self.frame = tk.Frame(master)
+        self.frame.pack(fill="x", padx=10, pady=2)
+        self.check = tk.Checkbutton(self.frame, text=cuenta, variable=self.seleccionada, font=("Arial", 10), anchor="w")
+        self.check.pack(side="left", fill="x", expand=True)
+        self.boton_detener = tk.Button(self.frame, text="Detener", command=lambda: al_detener(cuenta),
+                                       font=("Arial", 9), state="disabled")
+        self.boton_detener.pack(side="right", padx=(5, 0))
+        self.estado_label = tk.Label(self.frame, text="", font=("Arial", 10), width=34, anchor="e")
+        self.estado_label.pack(side="right")
+
+    def mostrar(self, texto: str = None):
+        if texto is None:
+            texto = f"Restantes: {self.restantes} | Enviados: {self.enviados}"
+            if self.en_marcha:
+                texto += f" | {formato_duracion(self.segundos_restantes)}"
+        self.estado_label.config(text=texto)
+
+
+class VentanaEnvios:
+    """
+    Ventana de envío de borradores para una o varias cuentas a la vez.
+    Cada cuenta marcada envía en su propio hilo (ver CoordinadorEnvios); la ventana muestra el avance de cada una
+    y el total, con lo que recibe por bus_eventos. Se abre una sola por proceso (ver lanzar_envio_desde_gui),
+    para que una cuenta no envíe desde dos coordinadores a la vez y gaste dos veces su cupo.
+    Args:
+        cuentas (list): Cuentas SMTP disponibles.
+        seleccionadas (iterable): Cuentas marcadas al abrir la ventana.
+        master (tk.Misc): Ventana principal; si se indica, esta se abre como Toplevel suya.
+    """
+
+    def __init__(self, cuentas, seleccionadas=(), master=None):
+        self.root = tk.Toplevel(master) if master is not None else tk.Tk()
+        self.root.title("Enviar Borradores Outlook")
+        self.root.geometry("620x" + str(230 + 32 * len(cuentas)))
+
+        try:
+            base_path = getattr(sys, '_MEIPASS', os.path.abspath("."))
+            icon_path = os.path.join(base_path, "config", "icono.ico")
+            self.root.iconbitmap(icon_path)
+        except Exception as e:
+            logger.warning(f"No se pudo cargar el ícono: {e}")
+
+        errores_limites = []
+        limites = cargar_limites(errores=errores_limites)
+        self.coordinador = CoordinadorEnvios(crear_planificador(limites_por_cuenta=limites))
+        self.after_id = None
+        # Las cantidades llegan por el bus y se mantienen al día con los avisos de la carpeta de cada cuenta
+        self.contador = ContadorBorradores(cuentas)
+
+        tk.Label(self.root, text="Intervalo mínimo de envío (segundos):", font=("Arial", 12)).pack(pady=5)
+        self.combo_intervalo = ttk.Combobox(self.root, values=["Seleccione intervalo.", "60", "120", "180"],
+                                            state="readonly", font=("Arial", 10), width=20)
+        self.combo_intervalo.bind("<<ComboboxSelected>>", self.actualizar_contador)
+        self.combo_intervalo.pack(pady=5)
+        self.combo_intervalo.current(0)
+
+        tk.Label(self.root, text="Cuentas:", font=("Arial", 10, "bold")).pack(anchor="w", padx=10)
+        seleccionadas = {c.lower() for c in seleccionadas}
+        self.filas = {
+            cuenta.lower(): FilaCuenta(self.root, cuenta, cuenta.lower() in seleccionadas, self.detener_envio)
+            for cuenta in cuentas
+        }
+
+        frame_botones = tk.Frame(self.root)
+        frame_botones.pack(pady=8)
+        self.start_button = tk.Button(frame_botones, text="Iniciar Envío", command=self.iniciar_envio,
+                                      font=("Arial", 12), bg="lightgreen", state="disabled")
+        self.start_button.pack(side="left", padx=5)
+        tk.Button(frame_botones, text="Detener Todo", command=self.detener_envio, font=("Arial", 10),
+                  bg="red").pack(side="left", padx=5)
+
+        self.status_label = tk.Label(self.root, text="", font=("Arial", 14))
+        self.status_label.pack(pady=5)
+        self.estimado_label = tk.Label(self.root, text="Tiempo restante: --", font=("Arial", 12), fg="blue")
+        self.estimado_label.pack(pady=5)
+
+        self.validar_intervalo()
+
+        self.manejadores = {
+            "progreso_envio": self.mostrar_progreso_envio,
+            "fin_envio": self.mostrar_fin_envio,
+            "conteo_borradores": self.mostrar_conteo,
+        }
+        for tipo, manejador in self.manejadores.items():
+            bus_eventos.suscribir(tipo, manejador)
+        bus_eventos.conectar(self.root)  # Si la ventana principal ya drena el bus, no hace nada
+        self.root.protocol("WM_DELETE_WINDOW", self.cerrar)
+        self.contador.start()
+        if errores_limites:
+            messagebox.showwarning("Límites de envío", "\n".join(errores_limites), parent=self.root)
+
+    def intervalo(self):
+        intervalo_str = self.combo_intervalo.get()
+        return int(intervalo_str) if intervalo_str.isdigit() else None
+
+    def marcar(self, cuenta: str):
+        """
+        Marca la cuenta (si está en la lista y no está enviando) y trae la ventana al frente.
+        """
+        fila = self.filas.get(cuenta.lower()) if cuenta else None
+        if fila is not None and not fila.en_marcha:
+            fila.seleccionada.set(True)
+            self.mostrar_estimaciones()
+        self.root.deiconify()
+        self.root.lift()
+        self.root.focus_force()
+
+    def cuentas_marcadas(self) -> list:
+        return [fila.cuenta for fila in self.filas.values() if fila.seleccionada.get()]
+
+    def validar_intervalo(self):
+        self.start_button.config(state="normal" if self.intervalo() else "disabled")
+
+    def actualizar_contador(self, event=None):
+        intervalo = self.intervalo()
+        if intervalo is None:
+            intervalo = 15
+            self.combo_intervalo.set(str(intervalo))
+        self.validar_intervalo()
+        self.mostrar_estimaciones()
+
+    def mostrar_estimaciones(self):
+        """
+        Cantidad y tiempo estimado de las cuentas marcadas que no están enviando, con la última cantidad conocida
+        por el contador (sin consultar Outlook).
+        """
+        intervalo = self.intervalo()
+        if intervalo is None:
+            return
+        actual = self.coordinador.planificador
+        planificador = PlanificadorEnvios(actual.limites, actual.limites_por_cuenta, intervalo)
+        for fila in self.filas.values():
+            if not fila.seleccionada.get() or fila.en_marcha:
+                continue
+            cantidad = self.contador.cantidad(fila.cuenta)
+            if cantidad is None:
+                fila.mostrar("Contando borradores...")
+                continue
+            fila.restantes = cantidad
+            fila.segundos_restantes = planificador.estimar_duracion(fila.cuenta, fila.restantes)
+            fila.mostrar()
+        self.mostrar_totales()
+        if any(f.en_marcha for f in self.filas.values()):
+            return  # El reloj de los envíos en curso muestra el tiempo restante
+
+        # Las cuentas envían en paralelo: el tiempo total es el de la cuenta más lenta
+        tiempo_total = max((f.segundos_restantes for f in self.filas.values() if f.seleccionada.get()), default=0)
+        self.estimado_label.config(text=f"Tiempo total estimado: {formato_duracion(tiempo_total)}")
+
+    def mostrar_conteo(self, cuenta, cantidad, error):
+        fila = self.filas.get(cuenta.lower())
+        if fila is None or fila.en_marcha:
+            return  # Durante el envío, el avance llega por progreso_envio
+        if error is not None:
+            fila.restantes = 0
+            fila.mostrar("Error al contar borradores")
+            messagebox.showerror("Error al contar borradores", f"{cuenta}:\n{error}", parent=self.root)
+            return
+        fila.restantes = cantidad
+        if self.intervalo() is not None:
+            self.mostrar_estimaciones()
+        else:
+            fila.mostrar()
+            self.mostrar_totales()
+
+    def mostrar_totales(self):
+        restantes = sum(f.restantes for f in self.filas.values())
+        enviados = sum(f.enviados for f in self.filas.values())
+        self.status_label.config(text=f"Borradores restantes: {restantes} | Enviados: {enviados}")
+
+    def iniciar_envio(self):
+        cuentas = [c for c in self.cuentas_marcadas() if not self.filas[c.lower()].en_marcha]
+        if not cuentas:
+            messagebox.showerror("Error", "Marque al menos una cuenta.", parent=self.root)
+            return
+
+        # Las cuentas que ya envían comparten el planificador: se cambia su intervalo sin reemplazarlo
+        self.coordinador.planificador.fijar_intervalo_minimo(self.intervalo())
+        for cuenta in cuentas:
+            fila = self.filas[cuenta.lower()]
+            fila.en_marcha = True
+            fila.enviados = 0
+            fila.segundos_restantes = self.coordinador.planificador.estimar_duracion(cuenta, fila.restantes)
+            fila.check.config(state="disabled")
+            fila.boton_detener.config(state="normal")
+            fila.mostrar()
+        self.coordinador.iniciar_varias(cuentas)
+        self.iniciar_temporizador()
+
+    def iniciar_temporizador(self):
+        if self.after_id is None:
+            self.actualizar_reloj()
+
+    def actualizar_reloj(self):
+        """
+        Descuenta un segundo del tiempo estimado de cada cuenta en marcha (corre en el hilo de Tk).
+        """
+        self.after_id = None
+        en_marcha = [f for f in self.filas.values() if f.en_marcha]
+        if not en_marcha:
+            return
+        for fila in en_marcha:
+            fila.segundos_restantes = max(fila.segundos_restantes - 1, 0)
+            fila.mostrar()
+        tiempo_total = max(f.segundos_restantes for f in en_marcha)
+        try:
+            self.estimado_label.config(text=f"Tiempo restante: {formato_duracion(tiempo_total)}")
+            self.after_id = self.root.after(1000, self.actualizar_reloj)
+        except tk.TclError:
+            logger.warning("after() cancelado tras cierre de ventana")
+
+    def detener_envio(self, cuenta: str = None):
+        self.coordinador.detener(cuenta)
+        filas = self.filas.values() if cuenta is None else [self.filas[cuenta.lower()]]
+        for fila in filas:
+            if fila.en_marcha:
+                fila.boton_detener.config(state="disabled")
+                fila.mostrar("Deteniendo...")
+        logger.info(f"Envío detenido manualmente ({cuenta or 'todas las cuentas'}).")
+
+    def mostrar_progreso_envio(self, cuenta, restantes, enviados):
+        fila = self.filas.get(cuenta.lower())
+        if fila is None:
+            return
+        fila.restantes = restantes
+        fila.enviados = enviados
+        fila.segundos_restantes = self.coordinador.planificador.estimar_duracion(cuenta, restantes)
+        fila.mostrar()
+        self.mostrar_totales()
+
+    def mostrar_fin_envio(self, cuenta, enviados, reporte):
+        fila = self.filas.get(cuenta.lower())
+        if fila is None:
+            return
+        fila.en_marcha = False
+        fila.enviados = enviados
+        fila.check.config(state="normal")
+        fila.boton_detener.config(state="disabled")
+        fila.mostrar(f"Finalizado | Enviados: {enviados}")
+        self.mostrar_totales()
+        if not any(f.en_marcha for f in self.filas.values()):
+            self.status_label.config(text="Proceso finalizado")
+            self.estimado_label.config(text="Tiempo restante: 00:00:00")
+        if len(reporte):
+            messagebox.showwarning(f"Envío con errores ({cuenta})", reporte.resumen(), parent=self.root)
+
+    def cerrar(self):
+        if self.coordinador.en_marcha() and not messagebox.askyesno(
+            "Envío en curso", "Hay envíos en curso. ¿Detenerlos y cerrar la ventana?", parent=self.root
+        ):
+            return
+        global _ventana_abierta
+        if _ventana_abierta is self:
+            _ventana_abierta = None
+        self.coordinador.detener()
+        self.contador.detener()
+        for tipo, manejador in self.manejadores.items():
+            bus_eventos.desuscribir(tipo, manejador)
+        if self.after_id is not None:
+            try:
+                self.root.after_cancel(self.after_id)
+            except Exception:
+                pass
+        self.root.destroy()
+
+
+# Función principal para ser llamada desde gui.py
+def lanzar_envio_desde_gui(cuenta, cuentas=None, master=None):
+    """
+    Abre la ventana de envíos con la cuenta indicada marcada. Si se indican más cuentas, también se listan.
+    Si la ventana ya está abierta, solo marca la cuenta y la trae al frente.
+    Sin master, la ventana es independiente y esta función no vuelve hasta que se cierra.
+    """
+    global _ventana_abierta
+    if _ventana_abierta is not None:
+        try:
+            _ventana_abierta.marcar(cuenta)
+            return _ventana_abierta
+        except tk.TclError:
+            _ventana_abierta = None  # Se destruyó sin pasar por cerrar()
+
+    cuentas = list(cuentas or [cuenta])
+    if cuenta and cuenta.lower() not in {c.lower() for c in cuentas}:
+        cuentas.insert(0, cuenta)
+    ventana = _ventana_abierta = VentanaEnvios(cuentas, seleccionadas=[cuenta], master=master)
+    if master is None:
+        ventana.root.mainloop()
+    return ventana
+
+
+# Soporte para ejecución directa en desarrollo
+if __name__ == "__main__":
+    cuentas = sys.argv[1:] or [""]
+    lanzar_envio_desde_gui(cuentas[0], cuentas)